@@ -2,37 +2,12 @@
 Vertex AI RAG Agent
 
 A package for interacting with Google Cloud Vertex AI RAG capabilities.
-"""
-
-import os
 
-import vertexai
-from dotenv import load_dotenv
+Vertex AI is initialised lazily, the first time a tool needs it
+(see `app.utils.vertex.ensure_vertexai_initialized`), so importing this
+package has no network or environment side effects.
+"""
 
 from . import agent
 
-# Load environment variables
-from pathlib import Path
-dotenv_path = Path(__file__).parent / '.env'
-load_dotenv(dotenv_path=dotenv_path, override=True)
-
-# Get Vertex AI configuration from environment
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
-
-# Initialize Vertex AI at package load time
-try:
-    if PROJECT_ID and LOCATION:
-        print(f"Initializing Vertex AI with project={PROJECT_ID}, location={LOCATION}")
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
-        print("Vertex AI initialization successful")
-    else:
-        print(
-            f"Missing Vertex AI configuration. PROJECT_ID={PROJECT_ID}, LOCATION={LOCATION}. "
-            f"Tools requiring Vertex AI may not work properly."
-        )
-except Exception as e:
-    print(f"Failed to initialize Vertex AI: {e!s}")
-    print("Please check your Google Cloud credentials and project settings.")
-
 __all__ = ["agent"]
@@ -1,5 +1,7 @@
 from google.adk.agents import Agent
 
+from app.utils.session_compaction import compact_history
+
 from .tools.add_data import add_data
 from .tools.create_corpus import create_corpus
 from .tools.delete_corpus import delete_corpus
@@ -12,6 +14,7 @@ rag_agent = Agent(
     name="rag_agent",
     model="gemini-2.5-flash",
     description="Vertex AI RAG Agent",
+    before_model_callback=compact_history,
     tools=[
         rag_query,
         list_corpora,
@@ -2,21 +2,10 @@
 Configuration settings for the RAG Agent.
 
 These settings are used by the various RAG tools.
-Vertex AI initialization is performed in the package's __init__.py
+Project and location come from the shared settings object in
+`app.utils.settings`; Vertex AI itself is initialised lazily by the tools.
 """
 
-import os
-
-from dotenv import load_dotenv
-
-# Load environment variables (this is redundant if __init__.py is imported first,
-# but included for safety when importing config directly)
-load_dotenv()
-
-# Vertex AI settings
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
-
 # RAG settings
 DEFAULT_CHUNK_SIZE = 512
 DEFAULT_CHUNK_OVERLAP = 100
@@ -24,3 +13,9 @@ DEFAULT_TOP_K = 3
 DEFAULT_DISTANCE_THRESHOLD = 0.5
 DEFAULT_EMBEDDING_MODEL = "publishers/google/models/text-embedding-005"
 DEFAULT_EMBEDDING_REQUESTS_PER_MIN = 1000
+
+# How long the corpus listing used to resolve corpus names is reused
+CORPUS_CACHE_TTL_SECONDS = 60.0
+
+# How many confirmed corpus names a session remembers (least recent dropped)
+MAX_KNOWN_CORPORA = 32
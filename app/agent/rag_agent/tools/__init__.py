@@ -11,19 +11,29 @@ from .list_corpora import list_corpora
 from .rag_query import rag_query
 from .utils import (
     check_corpus_exists,
+    corpus_key,
     get_corpus_resource_name,
+    invalidate_corpora_cache,
+    is_known_corpus,
+    list_corpora_cached,
+    remember_corpus,
     set_current_corpus,
 )
 
 __all__ = [
     "add_data",
     "check_corpus_exists",
+    "corpus_key",
     "create_corpus",
     "delete_corpus",
     "delete_document",
     "get_corpus_info",
     "get_corpus_resource_name",
+    "invalidate_corpora_cache",
+    "is_known_corpus",
     "list_corpora",
+    "list_corpora_cached",
     "rag_query",
+    "remember_corpus",
     "set_current_corpus",
 ]
@@ -7,6 +7,8 @@ import re
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 from ..config import (
     DEFAULT_CHUNK_OVERLAP,
     DEFAULT_CHUNK_SIZE,
@@ -36,6 +38,8 @@ def add_data(
     Returns:
         dict: Information about the added data and status
     """
+    ensure_vertexai_initialized()
+
     # Check if the corpus exists
     if not check_corpus_exists(corpus_name, tool_context):
         return {
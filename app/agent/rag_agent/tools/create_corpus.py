@@ -7,10 +7,16 @@ import re
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 from ..config import (
     DEFAULT_EMBEDDING_MODEL,
 )
-from .utils import check_corpus_exists
+from .utils import (
+    check_corpus_exists,
+    invalidate_corpora_cache,
+    remember_corpus,
+)
 
 
 def create_corpus(
@@ -27,6 +33,8 @@ def create_corpus(
     Returns:
         dict: Status information about the operation
     """
+    ensure_vertexai_initialized()
+
     # Check if corpus already exists
     if check_corpus_exists(corpus_name, tool_context):
         return {
@@ -54,9 +62,10 @@ def create_corpus(
                 rag_embedding_model_config=embedding_model_config
             ),
         )
+        invalidate_corpora_cache()
 
         # Update state to track corpus existence
-        tool_context.state[f"corpus_exists_{corpus_name}"] = True
+        remember_corpus(corpus_name, tool_context, resource_name=rag_corpus.name)
 
         # Set this as the current corpus
         tool_context.state["current_corpus"] = corpus_name
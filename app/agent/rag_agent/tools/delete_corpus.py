@@ -5,7 +5,14 @@ Tool for deleting a Vertex AI RAG corpus when it's no longer needed.
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
-from .utils import check_corpus_exists, get_corpus_resource_name
+from app.utils.vertex import ensure_vertexai_initialized
+
+from .utils import (
+    check_corpus_exists,
+    get_corpus_resource_name,
+    invalidate_corpora_cache,
+    remember_corpus,
+)
 
 
 def delete_corpus(
@@ -26,6 +33,8 @@ def delete_corpus(
     Returns:
         dict: Status information about the deletion operation
     """
+    ensure_vertexai_initialized()
+
     # Check if corpus exists
     if not check_corpus_exists(corpus_name, tool_context):
         return {
@@ -48,8 +57,15 @@ def delete_corpus(
 
         # Delete the corpus
         rag.delete_corpus(corpus_resource_name)
+        invalidate_corpora_cache()
 
-        # Remove from state by setting to False
+        # Remove from state
+        remember_corpus(
+            corpus_name,
+            tool_context,
+            exists=False,
+            resource_name=corpus_resource_name,
+        )
         state_key = f"corpus_exists_{corpus_name}"
         if state_key in tool_context.state:
             tool_context.state[state_key] = False
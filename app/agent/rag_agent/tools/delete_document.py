@@ -5,6 +5,8 @@ Tool for deleting a specific document from a Vertex AI RAG corpus.
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 from .utils import check_corpus_exists, get_corpus_resource_name
 
 
@@ -26,6 +28,8 @@ def delete_document(
     Returns:
         dict: Status information about the deletion operation
     """
+    ensure_vertexai_initialized()
+
     # Check if corpus exists
     if not check_corpus_exists(corpus_name, tool_context):
         return {
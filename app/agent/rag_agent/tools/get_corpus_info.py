@@ -5,6 +5,8 @@ Tool for retrieving detailed information about a specific RAG corpus.
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 from .utils import check_corpus_exists, get_corpus_resource_name
 
 
@@ -23,6 +25,8 @@ def get_corpus_info(
     Returns:
         dict: Information about the corpus and its files
     """
+    ensure_vertexai_initialized()
+
     try:
         # Check if corpus exists
         if not check_corpus_exists(corpus_name, tool_context):
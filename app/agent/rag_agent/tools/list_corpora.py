@@ -2,7 +2,9 @@
 Tool for listing all available Vertex AI RAG corpora.
 """
 
-from vertexai import rag
+from app.utils.vertex import ensure_vertexai_initialized
+
+from .utils import invalidate_corpora_cache, list_corpora_cached
 
 
 def list_corpora() -> dict:
@@ -16,9 +18,12 @@ def list_corpora() -> dict:
             - create_time: When the corpus was created
             - update_time: When the corpus was last updated
     """
+    ensure_vertexai_initialized()
+
     try:
-        # Get the list of corpora
-        corpora = rag.list_corpora()
+        # Always list afresh when asked, and refresh the cached listing
+        invalidate_corpora_cache()
+        corpora = list_corpora_cached()
 
         # Process corpus information into a more usable format
         corpus_info: list[dict[str, str | int]] = []
@@ -7,6 +7,8 @@ import logging
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 from ..config import (
     DEFAULT_DISTANCE_THRESHOLD,
     DEFAULT_TOP_K,
@@ -31,6 +33,8 @@ def rag_query(
     Returns:
         dict: The query results and status
     """
+    ensure_vertexai_initialized()
+
     try:
         # Check if the corpus exists
         if not check_corpus_exists(corpus_name, tool_context):
@@ -4,17 +4,66 @@ Utility functions for the RAG tools.
 
 import logging
 import re
+import threading
+import time
 
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
-from ..config import (
-    LOCATION,
-    PROJECT_ID,
-)
+from app.utils.settings import get_settings
+
+from ..config import CORPUS_CACHE_TTL_SECONDS, MAX_KNOWN_CORPORA
 
 logger = logging.getLogger(__name__)
 
+# Session state key holding the corpora confirmed to exist, least recently
+# confirmed first: by resource name once known, otherwise by the name used.
+KNOWN_CORPORA_STATE_KEY = "known_corpora"
+# Session state key mapping the other names a known corpus was referred to by
+# (e.g. its display name) to its resource name.
+CORPUS_NAMES_STATE_KEY = "corpus_names"
+
+_RESOURCE_NAME_PATTERN = re.compile(
+    r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$"
+)
+
+_corpora_lock = threading.Lock()
+_corpora_cache: tuple[float, list] | None = None
+
+
+def list_corpora_cached(max_age_seconds: float = CORPUS_CACHE_TTL_SECONDS) -> list:
+    """
+    List the RAG corpora, reusing a recent listing.
+
+    Resolving a corpus name used to list every corpus on each call, often twice
+    per tool invocation. The listing is now shared for `max_age_seconds` and
+    dropped whenever a tool creates or deletes a corpus.
+
+    Args:
+        max_age_seconds (float): How old a cached listing may be
+
+    Returns:
+        list: The corpora returned by `rag.list_corpora`
+    """
+    global _corpora_cache
+    with _corpora_lock:
+        if _corpora_cache is not None:
+            fetched_at, corpora = _corpora_cache
+            if time.monotonic() - fetched_at < max_age_seconds:
+                return corpora
+
+    corpora = list(rag.list_corpora())
+    with _corpora_lock:
+        _corpora_cache = (time.monotonic(), corpora)
+    return corpora
+
+
+def invalidate_corpora_cache() -> None:
+    """Forget the cached corpus listing after a corpus is created or deleted."""
+    global _corpora_cache
+    with _corpora_lock:
+        _corpora_cache = None
+
 
 def get_corpus_resource_name(corpus_name: str) -> str:
     """
@@ -30,13 +79,13 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     logger.info(f"Getting resource name for corpus: {corpus_name}")
 
     # If it's already a full resource name with the projects/locations/ragCorpora format
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if _RESOURCE_NAME_PATTERN.match(corpus_name):
         return corpus_name
 
     # Check if this is a display name of an existing corpus
     try:
         # List all corpora and check if there's a match with the display name
-        corpora = rag.list_corpora()
+        corpora = list_corpora_cached()
         for corpus in corpora:
             if hasattr(corpus, "display_name") and corpus.display_name == corpus_name:
                 return corpus.name
@@ -56,7 +105,97 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     corpus_id = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_id)
 
     # Construct the standardized resource name
-    return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
+    settings = get_settings()
+    return (
+        f"projects/{settings.project_id}/locations/{settings.location}"
+        f"/ragCorpora/{corpus_id}"
+    )
+
+
+def corpus_key(corpus_name: str, tool_context: ToolContext) -> str:
+    """
+    The session-state key of a corpus.
+
+    A full resource name is its own key, and so is any other name the corpus
+    was remembered under with its resource name (see `remember_corpus`).
+    Names not seen before are used as they are: two corpora whose display
+    names differ only in punctuation are not conflated.
+
+    Args:
+        corpus_name (str): The corpus name, display name or resource name
+        tool_context (ToolContext): The tool context for state management
+
+    Returns:
+        str: The corpus's resource name if known, else `corpus_name`
+    """
+    name = corpus_name.strip()
+    if _RESOURCE_NAME_PATTERN.match(name):
+        return name
+    names = tool_context.state.get(CORPUS_NAMES_STATE_KEY) or {}
+    return names.get(name, name)
+
+
+def is_known_corpus(corpus_name: str, tool_context: ToolContext) -> bool:
+    """
+    Check whether this session has already confirmed the corpus exists.
+
+    Args:
+        corpus_name (str): The corpus name, display name or resource name
+        tool_context (ToolContext): The tool context for state management
+
+    Returns:
+        bool: True if the corpus was confirmed earlier in the session
+    """
+    known = tool_context.state.get(KNOWN_CORPORA_STATE_KEY) or []
+    if corpus_key(corpus_name, tool_context) in known:
+        return True
+    # Sessions created before the state was compacted used one key per name.
+    return bool(tool_context.state.get(f"corpus_exists_{corpus_name}"))
+
+
+def remember_corpus(
+    corpus_name: str,
+    tool_context: ToolContext,
+    exists: bool = True,
+    resource_name: str | None = None,
+) -> None:
+    """
+    Record in session state whether a corpus exists.
+
+    At most `MAX_KNOWN_CORPORA` corpora are kept; the least recently confirmed
+    are dropped first, along with the names they were referred to by. Only
+    changes are written, so repeated confirmations of the most recent corpus
+    do not grow the session's state deltas.
+
+    Args:
+        corpus_name (str): The corpus name, display name or resource name
+        tool_context (ToolContext): The tool context for state management
+        exists (bool): False to forget the corpus (e.g. after deleting it)
+        resource_name (str | None): The corpus's resource name, if known;
+            `corpus_name` then resolves to it in later lookups
+    """
+    key = resource_name or corpus_key(corpus_name, tool_context)
+    names = dict(tool_context.state.get(CORPUS_NAMES_STATE_KEY) or {})
+    name = corpus_name.strip()
+    known = list(tool_context.state.get(KNOWN_CORPORA_STATE_KEY) or [])
+    unchanged_names = not exists or name == key or names.get(name) == key
+    if exists and known and known[-1] == key and unchanged_names:
+        return
+    if not exists and key not in known:
+        return
+
+    known = [known_key for known_key in known if known_key != key]
+    if exists:
+        known.append(key)
+        if name != key:
+            names[name] = key
+    known = known[-MAX_KNOWN_CORPORA:]
+    tool_context.state[KNOWN_CORPORA_STATE_KEY] = known
+    kept_names = {
+        other: resource for other, resource in names.items() if resource in known
+    }
+    if kept_names != (tool_context.state.get(CORPUS_NAMES_STATE_KEY) or {}):
+        tool_context.state[CORPUS_NAMES_STATE_KEY] = kept_names
 
 
 def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
@@ -71,7 +210,7 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
         bool: True if the corpus exists, False otherwise
     """
     # Check state first if tool_context is provided
-    if tool_context.state.get(f"corpus_exists_{corpus_name}"):
+    if is_known_corpus(corpus_name, tool_context):
         return True
 
     try:
@@ -79,14 +218,14 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
         # List all corpora and check if this one exists
-        corpora = rag.list_corpora()
+        corpora = list_corpora_cached()
         for corpus in corpora:
             if (
                 corpus.name == corpus_resource_name
                 or corpus.display_name == corpus_name
             ):
                 # Update state
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
+                remember_corpus(corpus_name, tool_context, resource_name=corpus.name)
                 # Also set this as the current corpus if no current corpus is set
                 if not tool_context.state.get("current_corpus"):
                     tool_context.state["current_corpus"] = corpus_name
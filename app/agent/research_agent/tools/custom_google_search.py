@@ -2,12 +2,15 @@ import logging
 
 from vertexai import rag
 
+from app.utils.vertex import ensure_vertexai_initialized
+
 
 def custom_google_search(query: str) -> dict:
     """
     A wrapper around the built-in google_search tool that adds logging and a dummy RAG API call.
     """
     logging.info(f"Executing custom_google_search with query: {query}")
+    ensure_vertexai_initialized()
     try:
         # Dummy call to the RAG API to ensure the agent works in the cloud.
         rag.list_corpora(page_size=1)
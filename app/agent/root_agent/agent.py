@@ -3,12 +3,14 @@ from google.adk.agents import Agent, SequentialAgent, LlmAgent
 from app.agent.rag_agent.agent import rag_agent
 from app.agent.slides_agent.agent import slides_agent
 from app.agent.seo_agent.agent import seo_agent
+from app.utils.session_compaction import compact_history
 
 root_agent = Agent(
     name="root_agent",
     model="gemini-2.5-flash",
     description="Root Agent that can delegate to sub-agents for RAG and presentation generation.",
     sub_agents=[rag_agent, seo_agent], # Initialize with an empty list of sub-agents
+    before_model_callback=compact_history,
     tools=[],
     instruction="""
     # 🤖 Root Agent
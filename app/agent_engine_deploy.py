@@ -0,0 +1,700 @@
+# Agent Engine Deploy - Deploy your agent to Google Cloud
+
+# This file contains the logic to deploy your agent to Vertex AI Agent Engine.
+# It is only run from a developer machine or CI (`make deploy-adk`); the
+# deployed runtime loads `app/agent_engine_app.py` and never imports this module.
+
+import argparse
+import datetime
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, TypedDict
+
+import vertexai
+from google.adk.artifacts import GcsArtifactService
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud import resourcemanager_v3
+from google.cloud.iam_admin_v1 import IAMClient
+from google.cloud.iam_admin_v1.types import CreateServiceAccountRequest, ServiceAccount
+from google.iam.v1 import policy_pb2
+from vertexai import agent_engines
+
+from app.agent.research_agent.config import DeploymentConfig, get_deployment_config
+from app.agent.root_agent.agent import root_agent
+from app.agent_engine_app import AgentEngineApp
+from app.utils.bundler import compute_bundle, report_bundle
+from app.utils.capacity import WorkerConfig
+from app.utils.deployment_fingerprint import (
+    AGENT,
+    FINGERPRINT_VERSION,
+    PACKAGES,
+    REQUIREMENTS,
+    changed_components,
+    compute_deployment_fingerprint,
+    load_previous_fingerprint,
+)
+from app.utils.gcs import create_bucket_if_not_exists
+from app.utils.provisioning import Provisioner, ProvisioningClients
+from app.utils.settings import get_settings
+from app.utils.trace_sampling import TraceSamplingConfig
+
+
+# Agent create/update operations are long-running and mostly waiting on the
+# Agent Engine API, so a handful can safely run side by side.
+DEFAULT_DEPLOY_CONCURRENCY = 4
+
+# Older google-cloud-aiplatform releases cannot set per-replica concurrency.
+_SDK_SUPPORTS_CONTAINER_CONCURRENCY = all(
+    "container_concurrency" in inspect.signature(method).parameters
+    for method in (agent_engines.create, agent_engines.AgentEngine.update)
+)
+
+
+class AgentDeploymentConfig(TypedDict):
+    agent: Any
+    name: str
+    description: str
+    # When None, packages and requirements are derived from the agent's import
+    # graph (see app/utils/bundler.py).
+    packages: list[str] | None
+    agent_id: str | None
+    # Worker processes and per-worker concurrency, sized with
+    # `python -m benchmarks.load_test`. None keeps a single worker.
+    worker_config: WorkerConfig | None
+    # Which traces to export; None leaves tracing off.
+    trace_sampling: TraceSamplingConfig | None
+
+
+def _create_service_account(
+    project_id: str, service_account_id: str, client: IAMClient | None = None
+) -> str:
+    """
+    Creates a service account in the given project if it doesn't already exist.
+    
+    Args:
+        project_id: GCP project ID.
+        service_account_id: Unique service account ID (without domain).
+        client: IAM client to use instead of creating a new one.
+        
+    Returns:
+        The email address of the created or existing service account.
+    """
+    client = client or IAMClient()
+    parent = f"projects/{project_id}"
+
+    try:
+        # Create service account
+        request = CreateServiceAccountRequest(
+            name=parent,
+            account_id=service_account_id,
+            service_account=ServiceAccount(display_name=service_account_id),
+        )
+        service_account = client.create_service_account(request=request)
+        print(f"✅ Created service account: {service_account.email}")
+        return service_account.email
+
+    except AlreadyExists:
+        # If it already exists, fetch the existing service account
+        sa_name = f"projects/{project_id}/serviceAccounts/{service_account_id}@{project_id}.iam.gserviceaccount.com"
+        existing_sa = client.get_service_account(name=sa_name)
+        print(f"ℹ️ Service account already exists: {existing_sa.email}")
+        return existing_sa.email
+
+
+def _grant_service_account_roles(
+    project_id: str,
+    service_account_email: str,
+    roles: list[str],
+    client: resourcemanager_v3.ProjectsClient | None = None,
+):
+    """
+    Grants project-level roles to a service account using Cloud Resource Manager API.
+    """
+    client = client or resourcemanager_v3.ProjectsClient()
+    project_name = f"projects/{project_id}"
+
+    try:
+        policy = client.get_iam_policy(request={"resource": project_name})
+    except NotFound:
+        raise ValueError(f"Project {project_id} not found. Cannot grant roles.")
+
+    modified = False
+    member = f"serviceAccount:{service_account_email}"
+
+    # Convert bindings to dict-like lookup by role
+    bindings_by_role = {b.role: b for b in policy.bindings}
+
+    for role in roles:
+        if role in bindings_by_role:
+            if member not in bindings_by_role[role].members:
+                bindings_by_role[role].members.append(member)
+                modified = True
+        else:
+            new_binding = policy_pb2.Binding(role=role, members=[member])
+            policy.bindings.append(new_binding)
+            modified = True
+
+    if modified:
+        client.set_iam_policy(request={"resource": project_name, "policy": policy})
+        print(f"✅ Granted roles {roles} to {service_account_email}")
+    else:
+        print(f"ℹ️ {service_account_email} already has all requested roles.")
+
+
+def _artifacts_bucket_name(project: str, agent_name: str) -> str:
+    return f"{project}-{agent_name}-logs-data"
+
+
+def _staging_dir_name(agent_name: str) -> str:
+    """The staging bucket directory an agent's pickle and packages go to."""
+    return f"agent_engine/{agent_name}"
+
+
+def _ensure_bucket(
+    provisioner: Provisioner, bucket_name: str, location: str
+) -> None:
+    """Create `bucket_name` unless it is already known to exist."""
+
+    def provision() -> dict[str, str]:
+        create_bucket_if_not_exists(
+            bucket_name=bucket_name,
+            project=provisioner.project,
+            location=location,
+            storage_client=provisioner.clients.storage(provisioner.project),
+        )
+        return {"name": bucket_name}
+
+    provisioner.ensure("bucket", bucket_name, provision, location=location)
+
+
+def _ensure_service_account(
+    provisioner: Provisioner, service_account_id: str, roles: list[str]
+) -> str:
+    """Create the service account and grant `roles`, unless already done."""
+
+    def provision_account() -> dict[str, str]:
+        email = _create_service_account(
+            provisioner.project, service_account_id, client=provisioner.clients.iam()
+        )
+        return {"email": email}
+
+    email = provisioner.ensure(
+        "service-account", service_account_id, provision_account
+    )["email"]
+
+    def provision_roles() -> dict[str, Any]:
+        _grant_service_account_roles(
+            provisioner.project,
+            email,
+            roles,
+            client=provisioner.clients.projects(),
+        )
+        return {"roles": sorted(roles)}
+
+    provisioner.ensure(
+        "project-roles",
+        email,
+        provision_roles,
+        satisfied=lambda record: set(roles) <= set(record.get("roles", [])),
+    )
+    return email
+
+
+@dataclass
+class SharedDeploymentContext:
+    """Provisioning shared by every agent in a deployment run."""
+
+    deployment_config: DeploymentConfig
+    env_vars: dict[str, str]
+    requirements: list[str]
+    service_account_email: str
+    provisioner: Provisioner | None = None
+
+
+@dataclass
+class AgentDeploymentResult:
+    """Outcome of deploying a single agent, used for the combined summary."""
+
+    agent_name: str
+    duration_seconds: float
+    resource_name: str | None = None
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def prepare_shared_deployment(
+    agent_names: list[str] | None = None,
+    verify: bool = False,
+    clients: ProvisioningClients | None = None,
+) -> SharedDeploymentContext:
+    """
+    Run the provisioning steps that are identical for every agent.
+
+    This resolves the deployment configuration, creates the service account and
+    grants its roles, initializes Vertex AI and reads the requirements file, so
+    that a multi-agent deployment does these once rather than once per agent.
+
+    Provisioned resources are recorded in `logs/provisioning_state.json` and
+    skipped on later runs. Those that do need a check are checked concurrently.
+
+    Args:
+        agent_names: Agents whose artifacts buckets are provisioned up front.
+        verify: Re-check every resource even if it is recorded as provisioned.
+        clients: The GCP clients to provision with (fakes in tests).
+
+    Returns:
+        The shared context to pass to `deploy_agent`.
+    """
+    # Step 1: Get deployment configuration
+    deployment_config = get_deployment_config()
+    print(f"📋 Project: {deployment_config.project}")
+    print(f"📋 Location: {deployment_config.location}")
+    print(f"📋 Staging bucket: {deployment_config.staging_bucket}")
+
+    # Step 2: Set up environment variables for the deployed agent
+    mcp_server_url = get_settings().remote_mcp_server_url
+    if not mcp_server_url:
+        raise ValueError(
+            "REMOTE_MCP_SERVER_URL environment variable not set in .env file."
+        )
+
+    # NUM_WORKERS is set per agent, from its WorkerConfig.
+    env_vars = {
+        "MCP_SERVER_URL": mcp_server_url,
+        "ENVIRONMENT": "cloud",
+        "SERVICE_ACCOUNT_EMAIL": "ai-agent-account@timberyard-brain.iam.gserviceaccount.com",
+    }
+
+    # Step 3: Create and configure the service account and buckets, skipping
+    # those already provisioned by an earlier run
+    provisioner = Provisioner(
+        deployment_config.project, clients=clients, verify=verify
+    )
+    bucket_names = [deployment_config.staging_bucket] + [
+        _artifacts_bucket_name(deployment_config.project, agent_name)
+        for agent_name in agent_names or []
+    ]
+    with ThreadPoolExecutor(
+        max_workers=len(bucket_names) + 1, thread_name_prefix="provision"
+    ) as executor:
+        service_account_future = executor.submit(
+            _ensure_service_account,
+            provisioner,
+            "ai-agent-account",
+            ["roles/aiplatform.user"],
+        )
+        bucket_futures = [
+            executor.submit(
+                _ensure_bucket, provisioner, bucket_name, deployment_config.location
+            )
+            for bucket_name in bucket_names
+        ]
+        service_account_email = service_account_future.result()
+        for future in bucket_futures:
+            future.result()
+    print(
+        f"🔐 Provisioning: {provisioner.cache_hits} cached, "
+        f"{provisioner.checks} checked"
+        + (" (verify)" if verify else "")
+    )
+    print(f"Using service account: {service_account_email} for agent deployment.")
+
+    # Step 4: Initialize Vertex AI for deployment
+    vertexai.init(
+        project=deployment_config.project,
+        location=deployment_config.location,
+        staging_bucket=f"gs://{deployment_config.staging_bucket}",
+    )
+
+    # Step 5: Read requirements file
+    with open(deployment_config.requirements_file) as f:
+        requirements = f.read().strip().split("\n")
+
+    return SharedDeploymentContext(
+        deployment_config=deployment_config,
+        env_vars=env_vars,
+        requirements=requirements,
+        service_account_email=service_account_email,
+        provisioner=provisioner,
+    )
+
+
+def deploy_agent(
+    agent: Any,
+    agent_name: str,
+    agent_description: str,
+    extra_packages: list[str],
+    agent_id: str | None = None,
+    shared: SharedDeploymentContext | None = None,
+    force: bool = False,
+    requirements: list[str] | None = None,
+    worker_config: WorkerConfig | None = None,
+    trace_sampling: TraceSamplingConfig | None = None,
+) -> agent_engines.AgentEngine:
+    """
+    Deploy a single agent to Vertex AI Agent Engine.
+
+    Args:
+        agent: The agent instance to deploy.
+        agent_name: The display name for the agent.
+        agent_description: A description for the agent.
+        extra_packages: A list of extra packages to include in the deployment.
+        agent_id: The resource name of the agent to update.
+        shared: Provisioning already done by `prepare_shared_deployment`. When
+            omitted, the shared steps are run for this agent alone.
+        force: Update the agent even if its fingerprint matches the one recorded
+            in `logs/deployment_metadata_{agent_name}.json`.
+        requirements: The requirements to install for this agent. Defaults to
+            the full requirements file read by `prepare_shared_deployment`.
+        worker_config: Worker count and per-worker concurrency of each replica;
+            defaults to a single worker.
+        trace_sampling: Which traces the deployed app exports.
+
+    Returns:
+        The deployed agent engine instance.
+    """
+    print(f"🚀 Starting deployment for agent: {agent_name}...")
+
+    if shared is None:
+        shared = prepare_shared_deployment()
+    deployment_config = shared.deployment_config
+
+    artifacts_bucket_name = _artifacts_bucket_name(
+        deployment_config.project, agent_name
+    )
+    staging_dir_name = _staging_dir_name(agent_name)
+    if worker_config is None:
+        worker_config = WorkerConfig()
+    env_vars = {**shared.env_vars, **worker_config.env_vars()}
+    requirements = list(
+        shared.requirements if requirements is None else requirements
+    )
+    metadata_file = Path("logs") / f"deployment_metadata_{agent_name}.json"
+
+    # Step 6: Fingerprint what would be deployed
+    fingerprint = compute_deployment_fingerprint(
+        agent=agent,
+        extra_packages=extra_packages,
+        requirements=requirements,
+        env_vars=env_vars,
+        display_name=agent_name,
+        description=agent_description,
+        extra_agent_state={
+            "artifacts_bucket_name": artifacts_bucket_name,
+            "warmup_on_set_up": True,
+            "trace_sampling": trace_sampling and asdict(trace_sampling),
+        },
+    )
+
+    # Step 7: Find the agent to update, if any, and skip it when nothing changed
+    agent_to_update = None
+    if agent_id:
+        print(f"🔎 [{agent_name}] Found existing agent by ID: {agent_id}")
+        agent_to_update = agent_engines.get(agent_id)
+    else:
+        existing_agents = list(
+            agent_engines.list(filter=f"display_name='{agent_name}'")
+        )
+        if existing_agents:
+            print(f"🔎 [{agent_name}] Found existing agent by name")
+            agent_to_update = existing_agents[0]
+
+    changed = set(fingerprint)
+    if agent_to_update is not None and not force:
+        changed = changed_components(
+            load_previous_fingerprint(metadata_file, agent_to_update.resource_name),
+            fingerprint,
+        )
+        if not changed:
+            print(
+                f"⏭️ [{agent_name}] Fingerprint unchanged since last deployment, "
+                "skipping update. Use --force to redeploy anyway."
+            )
+            return agent_to_update
+        print(f"🧾 [{agent_name}] Changed components: {', '.join(sorted(changed))}")
+
+    # Step 8: Create the per-agent Google Cloud Storage bucket
+    print(f"📦 [{agent_name}] Ensuring artifacts bucket: {artifacts_bucket_name}")
+    if shared.provisioner is not None:
+        _ensure_bucket(
+            shared.provisioner, artifacts_bucket_name, deployment_config.location
+        )
+    else:
+        create_bucket_if_not_exists(
+            bucket_name=artifacts_bucket_name,
+            project=deployment_config.project,
+            location=deployment_config.location,
+        )
+
+    # Step 9: Create the agent engine app
+    agent_engine = AgentEngineApp(
+        agent_name=agent_name,
+        agent=agent,
+        artifact_service_builder=lambda: GcsArtifactService(
+            bucket_name=artifacts_bucket_name
+        ),
+        warmup_on_set_up=True,
+        trace_sampling=trace_sampling,
+        trace_bucket_name=artifacts_bucket_name,
+    )
+
+    # Step 10: Configure the agent for deployment
+    agent_config: dict[str, Any] = {
+        "agent_engine": agent_engine,
+        "display_name": agent_name,
+        "description": agent_description,
+        "extra_packages": extra_packages,
+        "env_vars": env_vars,
+        "requirements": requirements,
+        # The SDK's default directory is shared by every agent; agents deployed
+        # side by side would overwrite each other's staged artifacts.
+        "gcs_dir_name": staging_dir_name,
+    }
+    if worker_config.container_concurrency:
+        if _SDK_SUPPORTS_CONTAINER_CONCURRENCY:
+            agent_config["container_concurrency"] = worker_config.container_concurrency
+        else:
+            print(
+                f"⚠️ [{agent_name}] This google-cloud-aiplatform version cannot set "
+                "container_concurrency; only NUM_WORKERS is applied."
+            )
+
+    # Step 11: Deploy or update the agent
+    if agent_to_update is not None:
+        print(f"🔄 [{agent_name}] Updating existing agent")
+        # The engine rebuilds from the staged artifacts it was last given, so
+        # unchanged ones are only left out if they were staged in this agent's
+        # own directory; a shared directory may since have been overwritten.
+        previous_staging_dir_name = _recorded_staging_dir_name(
+            metadata_file, agent_to_update.resource_name
+        )
+        if previous_staging_dir_name != staging_dir_name:
+            changed |= set(_UPLOADED_COMPONENTS)
+        remote_agent = agent_to_update.update(
+            **_update_kwargs_for_changes(agent_config, changed)
+        )
+    else:
+        print(f"🆕 [{agent_name}] Creating new agent")
+        remote_agent = agent_engines.create(**agent_config)
+
+    # Step 12: Save deployment metadata
+    metadata = {
+        "remote_agent_engine_id": remote_agent.resource_name,
+        "deployment_timestamp": datetime.datetime.now().isoformat(),
+        "agent_name": agent_name,
+        "project": deployment_config.project,
+        "location": deployment_config.location,
+        "fingerprint_version": FINGERPRINT_VERSION,
+        "fingerprint": fingerprint,
+        "gcs_dir_name": staging_dir_name,
+    }
+
+    metadata_file.parent.mkdir(exist_ok=True)
+    with open(metadata_file, "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✅ Agent {agent_name} deployed successfully!")
+    print(f"📄 Deployment metadata saved to: {metadata_file}")
+    print(f"🆔 Agent Engine ID: {remote_agent.resource_name}")
+
+    return remote_agent
+
+
+# Update arguments that are only uploaded when their component changed. Env vars
+# and display metadata are always sent: they cost no upload, and omitting
+# env_vars would let the SDK replace them with its telemetry default.
+_UPLOADED_COMPONENTS = {
+    AGENT: "agent_engine",
+    PACKAGES: "extra_packages",
+    REQUIREMENTS: "requirements",
+}
+
+
+def _recorded_staging_dir_name(metadata_file: Path, resource_name: str) -> str | None:
+    """The gcs_dir_name recorded by the last deployment of `resource_name`."""
+    try:
+        metadata = json.loads(metadata_file.read_text())
+    except (OSError, ValueError):
+        return None
+    if metadata.get("remote_agent_engine_id") != resource_name:
+        return None
+    return metadata.get("gcs_dir_name")
+
+
+def _update_kwargs_for_changes(
+    agent_config: dict[str, Any], changed: set[str]
+) -> dict[str, Any]:
+    """Drop the uploaded artifacts whose fingerprint did not change."""
+    unchanged = {
+        argument
+        for component, argument in _UPLOADED_COMPONENTS.items()
+        if component not in changed
+    }
+    return {key: value for key, value in agent_config.items() if key not in unchanged}
+
+
+def _deploy_and_record(
+    agent_config: AgentDeploymentConfig,
+    shared: SharedDeploymentContext,
+    force: bool,
+) -> AgentDeploymentResult:
+    """Deploy one agent and capture its outcome instead of raising."""
+    start = time.monotonic()
+    try:
+        extra_packages, requirements = agent_config["packages"], None
+        if extra_packages is None:
+            bundle = compute_bundle(agent_config["agent"], shared.requirements)
+            report_bundle(agent_config["name"], bundle, shared.requirements)
+            extra_packages, requirements = bundle.packages, bundle.requirements
+        remote_agent = deploy_agent(
+            agent=agent_config["agent"],
+            agent_name=agent_config["name"],
+            agent_description=agent_config["description"],
+            extra_packages=extra_packages,
+            agent_id=agent_config.get("agent_id"),
+            shared=shared,
+            force=force,
+            requirements=requirements,
+            worker_config=agent_config.get("worker_config"),
+            trace_sampling=agent_config.get("trace_sampling"),
+        )
+    except Exception as e:
+        print(f"❌ Agent {agent_config['name']} failed to deploy: {e}")
+        return AgentDeploymentResult(
+            agent_name=agent_config["name"],
+            duration_seconds=time.monotonic() - start,
+            error=str(e),
+        )
+    return AgentDeploymentResult(
+        agent_name=agent_config["name"],
+        duration_seconds=time.monotonic() - start,
+        resource_name=remote_agent.resource_name,
+    )
+
+
+def deploy_agents(
+    agents_to_deploy: list[AgentDeploymentConfig],
+    max_concurrency: int = DEFAULT_DEPLOY_CONCURRENCY,
+    force: bool = False,
+    verify: bool = False,
+) -> list[AgentDeploymentResult]:
+    """
+    Deploy several agents: shared provisioning once, then agents in parallel.
+
+    Args:
+        agents_to_deploy: The agents to create or update.
+        max_concurrency: Maximum number of agent create/update operations
+            running at the same time.
+        force: Redeploy agents whose fingerprint has not changed.
+        verify: Re-check cloud resources recorded as already provisioned.
+
+    Returns:
+        One result per agent, in the order of `agents_to_deploy`.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+
+    shared = prepare_shared_deployment(
+        agent_names=[agent_config["name"] for agent_config in agents_to_deploy],
+        verify=verify,
+    )
+
+    workers = min(max_concurrency, len(agents_to_deploy)) or 1
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="deploy-agent"
+    ) as executor:
+        results = list(
+            executor.map(
+                lambda agent_config: _deploy_and_record(agent_config, shared, force),
+                agents_to_deploy,
+            )
+        )
+
+    _print_deployment_summary(results)
+    return results
+
+
+def _print_deployment_summary(results: list[AgentDeploymentResult]) -> None:
+    print("\n📊 Deployment summary")
+    for result in results:
+        status = "✅" if result.succeeded else "❌"
+        detail = result.resource_name if result.succeeded else result.error
+        print(
+            f"  {status} {result.agent_name:<24} {result.duration_seconds:8.1f}s  {detail}"
+        )
+    failed = sum(not result.succeeded for result in results)
+    print(f"  {len(results) - failed} succeeded, {failed} failed")
+
+
+def deploy_all_agents(
+    max_concurrency: int = DEFAULT_DEPLOY_CONCURRENCY,
+    force: bool = False,
+    verify: bool = False,
+) -> None:
+    """Deploys all agents defined in the application."""
+    agents_to_deploy: list[AgentDeploymentConfig] = [
+        {
+            "agent": root_agent,
+            "name": "root_agent",
+            "description": "A root agent that orchestrates sub-agents.",
+            "packages": None,
+            "worker_config": WorkerConfig(num_workers=1),
+            "trace_sampling": TraceSamplingConfig(),
+            "agent_id": "projects/timberyard-brain/locations/europe-west4/reasoningEngines/3164658347529994240",
+        },
+    ]
+
+    results = deploy_agents(
+        agents_to_deploy,
+        max_concurrency=max_concurrency,
+        force=force,
+        verify=verify,
+    )
+    failed = [result.agent_name for result in results if not result.succeeded]
+    if failed:
+        raise RuntimeError(f"Deployment failed for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Deploy the agents to Vertex AI Agent Engine."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_DEPLOY_CONCURRENCY,
+        help="Maximum number of agents created/updated in parallel.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Redeploy even when the deployment fingerprint is unchanged.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Re-check buckets, service accounts and IAM roles recorded as "
+        "provisioned in logs/provisioning_state.json.",
+    )
+    args = parser.parse_args()
+
+    print(
+        """
+    ╔═══════════════════════════════════════════════════════════╗
+    ║                                                           ║
+    ║   🤖 DEPLOYING AGENT TO VERTEX AI AGENT ENGINE 🤖         ║
+    ║                                                           ║
+    ╚═══════════════════════════════════════════════════════════╝
+    """
+    )
+
+    deploy_all_agents(
+        max_concurrency=args.concurrency, force=args.force, verify=args.verify
+    )
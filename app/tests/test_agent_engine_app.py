@@ -4,14 +4,14 @@ from google.api_core.exceptions import AlreadyExists, NotFound
 from google.cloud.iam_admin_v1.types import ServiceAccount
 from google.iam.v1.policy_pb2 import Binding
 
-# Assuming _create_service_account is in app.agent_engine_app
-from app.agent_engine_app import _create_service_account, _grant_service_account_roles, deploy_agent
+# _create_service_account lives in the deploy-time module app.agent_engine_deploy
+from app.agent_engine_deploy import _create_service_account, _grant_service_account_roles, deploy_agent
 from app.agent.root_agent.agent import root_agent
 from google.adk.artifacts import GcsArtifactService
 
 class TestServiceAccountCreation(unittest.TestCase):
 
-    @patch('app.agent_engine_app.IAMClient')
+    @patch('app.agent_engine_deploy.IAMClient')
     def test_create_service_account_success(self, MockIAMClient):
         mock_client_instance = MockIAMClient.return_value
         mock_client_instance.create_service_account.return_value = ServiceAccount(email='test-sa@test-project.iam.gserviceaccount.com')
@@ -29,7 +29,7 @@ class TestServiceAccountCreation(unittest.TestCase):
         )
         self.assertEqual(email, 'test-sa@test-project.iam.gserviceaccount.com')
 
-    @patch('app.agent_engine_app.IAMClient')
+    @patch('app.agent_engine_deploy.IAMClient')
     def test_create_service_account_already_exists(self, MockIAMClient):
         mock_client_instance = MockIAMClient.return_value
         mock_client_instance.create_service_account.side_effect = AlreadyExists('Service account already exists')
@@ -47,7 +47,7 @@ class TestServiceAccountCreation(unittest.TestCase):
         )
         self.assertEqual(email, 'existing-sa@test-project.iam.gserviceaccount.com')
 
-    @patch('app.agent_engine_app.IAMClient')
+    @patch('app.agent_engine_deploy.IAMClient')
     def test_create_service_account_other_exception(self, MockIAMClient):
         mock_client_instance = MockIAMClient.return_value
         mock_client_instance.create_service_account.side_effect = Exception('Some other error')
@@ -62,7 +62,7 @@ class TestServiceAccountCreation(unittest.TestCase):
 
 class TestServiceAccountRoleGranting(unittest.TestCase):
 
-    @patch('app.agent_engine_app.IAMClient')
+    @patch('app.agent_engine_deploy.IAMClient')
     def test_grant_service_account_roles_success(self, MockIAMClient):
         mock_client_instance = MockIAMClient.return_value
         mock_policy = MagicMock()
@@ -86,7 +86,7 @@ class TestServiceAccountRoleGranting(unittest.TestCase):
             policy=mock_policy
         )
 
-    @patch('app.agent_engine_app.IAMClient')
+    @patch('app.agent_engine_deploy.IAMClient')
     def test_grant_service_account_roles_not_found(self, MockIAMClient):
         mock_client_instance = MockIAMClient.return_value
         mock_client_instance.get_iam_policy.side_effect = NotFound('Service account not found')
@@ -96,7 +96,7 @@ class TestServiceAccountRoleGranting(unittest.TestCase):
         roles = ['roles/vertexai.user']
         
         # Expect no exception, but a print statement
-        with patch('app.agent_engine_app.logging.info') as mock_logging_info:
+        with patch('app.agent_engine_deploy.logging.info') as mock_logging_info:
             _grant_service_account_roles(project_id, service_account_email, roles)
             mock_logging_info.assert_called_once_with(f"Service account {service_account_email} not found. Cannot grant roles.")
         
@@ -106,18 +106,18 @@ class TestServiceAccountRoleGranting(unittest.TestCase):
         )
         mock_client_instance.set_iam_policy.assert_not_called()
 
-from app.agent_engine_app import deploy_agent
+from app.agent_engine_deploy import deploy_agent
 from app.agent.root_agent.agent import root_agent
 from google.adk.artifacts import GcsArtifactService
 
 class TestAgentDeploymentIntegration(unittest.TestCase):
 
-    @patch('app.agent_engine_app.get_deployment_config')
-    @patch('app.agent_engine_app._create_service_account')
-    @patch('app.agent_engine_app._grant_service_account_roles')
-    @patch('app.agent_engine_app.create_bucket_if_not_exists')
-    @patch('app.agent_engine_app.vertexai.init')
-    @patch('app.agent_engine_app.agent_engines')
+    @patch('app.agent_engine_deploy.get_deployment_config')
+    @patch('app.agent_engine_deploy._create_service_account')
+    @patch('app.agent_engine_deploy._grant_service_account_roles')
+    @patch('app.agent_engine_deploy.create_bucket_if_not_exists')
+    @patch('app.agent_engine_deploy.vertexai.init')
+    @patch('app.agent_engine_deploy.agent_engines')
     @patch('builtins.open', new_callable=MagicMock)
     @patch('pathlib.Path.mkdir')
     @patch('json.dump')
@@ -168,12 +168,12 @@ class TestAgentDeploymentIntegration(unittest.TestCase):
         self.assertIn('service_account', kwargs)
         self.assertEqual(kwargs['service_account'], 'new-sa@test-project.iam.gserviceaccount.com')
 
-    @patch('app.agent_engine_app.get_deployment_config')
-    @patch('app.agent_engine_app._create_service_account')
-    @patch('app.agent_engine_app._grant_service_account_roles')
-    @patch('app.agent_engine_app.create_bucket_if_not_exists')
-    @patch('app.agent_engine_app.vertexai.init')
-    @patch('app.agent_engine_app.agent_engines')
+    @patch('app.agent_engine_deploy.get_deployment_config')
+    @patch('app.agent_engine_deploy._create_service_account')
+    @patch('app.agent_engine_deploy._grant_service_account_roles')
+    @patch('app.agent_engine_deploy.create_bucket_if_not_exists')
+    @patch('app.agent_engine_deploy.vertexai.init')
+    @patch('app.agent_engine_deploy.agent_engines')
     @patch('builtins.open', new_callable=MagicMock)
     @patch('pathlib.Path.mkdir')
     @patch('json.dump')
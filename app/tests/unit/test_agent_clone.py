@@ -0,0 +1,67 @@
+from google.adk.agents import Agent
+from google.adk.tools import FunctionTool
+
+from app.utils.agent_clone import clone_agent
+
+
+def lookup(query: str) -> dict:
+    """Look something up."""
+    return {"query": query}
+
+
+def summarize(text: str) -> dict:
+    """Summarize some text."""
+    return {"text": text}
+
+
+def _build_tree() -> Agent:
+    child = Agent(
+        name="child_agent",
+        model="gemini-2.5-flash",
+        instruction="You are a child agent. " * 200,
+        tools=[lookup, FunctionTool(summarize)],
+    )
+    return Agent(
+        name="parent_agent",
+        model="gemini-2.5-flash",
+        instruction="You are the root agent. " * 200,
+        sub_agents=[child],
+    )
+
+
+def test_clone_shares_immutable_parts():
+    original = _build_tree()
+    cloned = clone_agent(original)
+
+    assert cloned is not original
+    assert cloned.instruction is original.instruction
+    assert cloned.model is original.model
+
+    cloned_child, original_child = cloned.sub_agents[0], original.sub_agents[0]
+    assert cloned_child is not original_child
+    assert cloned_child.instruction is original_child.instruction
+    assert cloned_child.tools[0] is lookup
+
+
+def test_clone_copies_mutable_state():
+    original = _build_tree()
+    cloned = clone_agent(original)
+    cloned_child, original_child = cloned.sub_agents[0], original.sub_agents[0]
+
+    assert cloned.sub_agents is not original.sub_agents
+    assert cloned_child.tools is not original_child.tools
+    # Tool objects may hold per-instance state, so they are copied.
+    assert cloned_child.tools[1] is not original_child.tools[1]
+
+    cloned_child.tools.append(summarize)
+    assert len(original_child.tools) == 2
+
+
+def test_clone_rewires_parent_links():
+    original = _build_tree()
+    cloned = clone_agent(original)
+
+    assert cloned.parent_agent is None
+    assert cloned.sub_agents[0].parent_agent is cloned
+    assert original.sub_agents[0].parent_agent is original
+    assert cloned.find_agent("child_agent") is cloned.sub_agents[0]
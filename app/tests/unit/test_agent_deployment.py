@@ -0,0 +1,142 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.adk.agents import Agent
+
+from app import agent_engine_deploy
+from app.agent.research_agent.config import DeploymentConfig
+from app.agent_engine_deploy import (
+    AgentDeploymentConfig,
+    SharedDeploymentContext,
+    deploy_agents,
+)
+
+
+def _agent_configs(count: int) -> list[AgentDeploymentConfig]:
+    return [
+        {
+            "agent": MagicMock(),
+            "name": f"agent_{i}",
+            "description": "test agent",
+            "packages": ["./app/utils"],
+            "agent_id": None,
+            "worker_config": None,
+            "trace_sampling": None,
+        }
+        for i in range(count)
+    ]
+
+
+class _ConcurrencyProbe:
+    """Fake deploy_agent that records how many calls overlap."""
+
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.fail = fail or set()
+        self.active = 0
+        self.peak = 0
+        self.shared_seen: list = []
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.shared_seen.append(kwargs["shared"])
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if kwargs["agent_name"] in self.fail:
+            raise RuntimeError("boom")
+        remote_agent = MagicMock()
+        remote_agent.resource_name = f"reasoningEngines/{kwargs['agent_name']}"
+        return remote_agent
+
+
+@pytest.fixture
+def shared_context():
+    with patch.object(
+        agent_engine_deploy, "prepare_shared_deployment"
+    ) as mock_prepare:
+        yield mock_prepare
+
+
+def test_shared_provisioning_runs_once(shared_context):
+    probe = _ConcurrencyProbe()
+    with patch.object(agent_engine_deploy, "deploy_agent", side_effect=probe):
+        results = deploy_agents(_agent_configs(5), max_concurrency=5)
+
+    shared_context.assert_called_once()
+    assert all(shared is shared_context.return_value for shared in probe.shared_seen)
+    assert [result.agent_name for result in results] == [
+        f"agent_{i}" for i in range(5)
+    ]
+    assert all(result.succeeded for result in results)
+
+
+def test_concurrency_is_capped(shared_context):
+    probe = _ConcurrencyProbe()
+    with patch.object(agent_engine_deploy, "deploy_agent", side_effect=probe):
+        deploy_agents(_agent_configs(6), max_concurrency=2)
+
+    assert probe.peak == 2
+
+
+def test_failures_are_reported_in_summary(shared_context, capsys):
+    probe = _ConcurrencyProbe(fail={"agent_1"})
+    with patch.object(agent_engine_deploy, "deploy_agent", side_effect=probe):
+        results = deploy_agents(_agent_configs(3), max_concurrency=3)
+
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert results[1].error == "boom"
+    assert results[0].resource_name == "reasoningEngines/agent_0"
+    assert "2 succeeded, 1 failed" in capsys.readouterr().out
+
+
+def test_invalid_concurrency_is_rejected(shared_context):
+    with pytest.raises(ValueError):
+        deploy_agents(_agent_configs(1), max_concurrency=0)
+
+
+def test_concurrently_deployed_agents_stage_to_their_own_directories(
+    shared_context, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    shared_context.return_value = SharedDeploymentContext(
+        deployment_config=DeploymentConfig(
+            project="p",
+            location="l",
+            staging_bucket="p-adk-staging",
+            requirements_file=".requirements.txt",
+        ),
+        env_vars={"ENVIRONMENT": "cloud"},
+        requirements=["google-adk==1.6.1"],
+        service_account_email="sa@p.iam.gserviceaccount.com",
+    )
+    configs: list[AgentDeploymentConfig] = [
+        {
+            "agent": Agent(name=f"agent_{i}", model="gemini-2.5-flash"),
+            "name": f"agent_{i}",
+            "description": "test agent",
+            "packages": [],
+            "agent_id": None,
+            "worker_config": None,
+            "trace_sampling": None,
+        }
+        for i in range(2)
+    ]
+    with (
+        patch.object(agent_engine_deploy, "agent_engines") as mock_engines,
+        patch.object(agent_engine_deploy, "create_bucket_if_not_exists"),
+        patch.object(agent_engine_deploy, "AgentEngineApp"),
+    ):
+        mock_engines.list.return_value = []
+        mock_engines.create.return_value = MagicMock(resource_name="engines/1")
+        results = deploy_agents(configs, max_concurrency=2)
+
+    assert all(result.succeeded for result in results)
+    staging_dirs = {
+        call.kwargs["gcs_dir_name"] for call in mock_engines.create.call_args_list
+    }
+    assert staging_dirs == {"agent_engine/agent_0", "agent_engine/agent_1"}
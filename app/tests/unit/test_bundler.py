@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from app.agent.root_agent.agent import root_agent
+from app.utils.bundler import (
+    DistributionIndex,
+    compute_bundle,
+    filter_requirements,
+    walk_imports,
+)
+
+
+def _write(root, relative_path, source=""):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source)
+
+
+def test_walk_imports_follows_first_party_graph(tmp_path):
+    _write(tmp_path, "app/__init__.py")
+    _write(tmp_path, "app/agent/my_agent/__init__.py", "from . import agent\n")
+    _write(
+        tmp_path,
+        "app/agent/my_agent/agent.py",
+        "import requests\n"
+        "from google.cloud import storage\n"
+        "from .tools import lookup\n"
+        "from app.utils.settings import get_settings\n",
+    )
+    _write(tmp_path, "app/agent/my_agent/tools.py", "from ..shared.helpers import x\n")
+    _write(tmp_path, "app/agent/shared/helpers.py", "x = 1\n")
+    _write(tmp_path, "app/agent/unrelated/agent.py", "import fastapi\n")
+    _write(tmp_path, "app/utils/settings.py", "import os\n")
+
+    modules, units, external = walk_imports(["app.agent.my_agent.agent"], tmp_path)
+
+    assert units == {"app/agent/my_agent", "app/agent/shared", "app/utils"}
+    assert "app.agent.my_agent.tools" in modules
+    assert "app.agent.my_agent" in modules
+    assert {"requests", "google.cloud.storage", "os"} <= external
+    assert "fastapi" not in external
+
+
+def test_filter_requirements_keeps_unattributable_lines():
+    requirements = [
+        "google-adk==1.6.1",
+        "FastAPI==0.115.0",
+        "google_cloud_storage==2.19.0 ; python_version >= '3.10'",
+        "# a comment",
+        "--extra-index-url https://example.com/simple",
+    ]
+
+    assert filter_requirements(requirements, {"google-adk", "google-cloud-storage"}) == [
+        "google-adk==1.6.1",
+        "google_cloud_storage==2.19.0 ; python_version >= '3.10'",
+        "--extra-index-url https://example.com/simple",
+    ]
+
+
+def test_root_agent_bundle():
+    requirements = [
+        "google-adk==1.6.1",
+        "google-cloud-aiplatform==1.104.0",
+        "langchain==0.3.26",
+        "requests-mock==1.12.1",
+    ]
+
+    bundle = compute_bundle(root_agent, requirements)
+
+    assert "./app/agent_engine_app.py" in bundle.packages
+    assert {"./app/agent/root_agent", "./app/agent/rag_agent", "./app/utils"} <= set(
+        bundle.packages
+    )
+    # Only imported by the local research agent and the FastAPI server.
+    assert "./app/agent/research_agent" not in bundle.packages
+    assert "./app/agent_engine_deploy.py" not in bundle.packages
+    assert bundle.requirements == [
+        "google-adk==1.6.1",
+        "google-cloud-aiplatform==1.104.0",
+    ]
+
+
+def _distribution(name, *requires):
+    return SimpleNamespace(metadata={"Name": name}, requires=list(requires), files=[])
+
+
+def test_dependency_closure_follows_extras():
+    index = DistributionIndex(
+        [
+            _distribution("google-adk", "google-cloud-aiplatform[agent-engines]"),
+            _distribution(
+                "google-cloud-aiplatform",
+                "proto-plus",
+                "aiohttp ; extra == 'agent-engines'",
+                "pytest ; extra == 'testing'",
+            ),
+            _distribution("proto-plus"),
+            _distribution("aiohttp"),
+        ]
+    )
+
+    assert index.dependency_closure(["google-adk"]) == {
+        "google-adk",
+        "google-cloud-aiplatform",
+        "proto-plus",
+        "aiohttp",
+    }
+    # pytest is required but not installed, so the closure is unknown.
+    assert index.dependency_closure(["google-cloud-aiplatform[testing]"]) is None
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.adk.agents import Agent
+
+from app import agent_engine_deploy
+from app.agent.research_agent.config import DeploymentConfig
+from app.agent_engine_deploy import SharedDeploymentContext, deploy_agent
+from app.utils.capacity import LoadPoint, WorkerConfig, recommend_worker_config
+
+
+def _point(concurrency, throughput, p95_ms, cpu=0.2, errors=0):
+    duration = 10.0
+    return LoadPoint(
+        concurrency=concurrency,
+        requests=int(throughput * duration) + errors,
+        errors=errors,
+        duration_seconds=duration,
+        cpu_seconds=cpu * duration,
+        p50_ms=p95_ms * 0.8,
+        p95_ms=p95_ms,
+    )
+
+
+def test_knee_is_where_throughput_stops_growing():
+    points = [
+        _point(1, 2, 600),
+        _point(4, 8, 620),
+        _point(16, 8.4, 900),
+        _point(64, 8.5, 1100),
+    ]
+
+    recommendation = recommend_worker_config(points, replica_cpus=4)
+
+    assert recommendation.worker_config.per_worker_concurrency == 4
+    # 4 vCPUs at 80% utilization, 0.2 cores per worker.
+    assert recommendation.worker_config.num_workers == 8
+    assert recommendation.replica_throughput_rps == pytest.approx(64)
+
+
+def test_levels_over_the_latency_budget_or_error_budget_are_ignored():
+    points = [
+        _point(1, 2, 500, cpu=0.5),
+        _point(4, 7, 900, cpu=0.5),
+        _point(8, 14, 1500, cpu=0.5),
+        _point(16, 30, 700, cpu=0.5, errors=50),
+    ]
+
+    recommendation = recommend_worker_config(points, replica_cpus=2)
+    assert recommendation.worker_config == WorkerConfig(
+        num_workers=3, per_worker_concurrency=4
+    )
+
+    recommendation = recommend_worker_config(points, latency_slo_ms=2000)
+    assert recommendation.worker_config.per_worker_concurrency == 8
+
+    with pytest.raises(ValueError):
+        recommend_worker_config(points, latency_slo_ms=100)
+
+
+def test_worker_count_is_capped_for_idle_workers():
+    points = [_point(1, 2, 500, cpu=0.001)]
+
+    assert recommend_worker_config(points, replica_cpus=4).worker_config == (
+        WorkerConfig(num_workers=8, per_worker_concurrency=1)
+    )
+
+
+def test_deploy_agent_applies_the_worker_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shared = SharedDeploymentContext(
+        deployment_config=DeploymentConfig(
+            project="p",
+            location="l",
+            staging_bucket="p-adk-staging",
+            requirements_file=".requirements.txt",
+        ),
+        env_vars={"ENVIRONMENT": "cloud"},
+        requirements=["google-adk==1.6.1"],
+        service_account_email="sa@p.iam.gserviceaccount.com",
+    )
+    with (
+        patch.object(agent_engine_deploy, "agent_engines") as mock_engines,
+        patch.object(agent_engine_deploy, "create_bucket_if_not_exists"),
+        patch.object(agent_engine_deploy, "AgentEngineApp"),
+        patch.object(
+            agent_engine_deploy, "_SDK_SUPPORTS_CONTAINER_CONCURRENCY", True
+        ),
+    ):
+        mock_engines.create.return_value = MagicMock(resource_name="engines/1")
+        deploy_agent(
+            agent=Agent(name="test_agent", model="gemini-2.5-flash"),
+            agent_name="test_agent",
+            agent_description="A test agent",
+            extra_packages=[],
+            shared=shared,
+            worker_config=WorkerConfig(num_workers=3, per_worker_concurrency=8),
+        )
+        deploy_agent(
+            agent=Agent(name="default_agent", model="gemini-2.5-flash"),
+            agent_name="default_agent",
+            agent_description="A test agent",
+            extra_packages=[],
+            shared=shared,
+        )
+
+    configured, default = (
+        call.kwargs for call in mock_engines.create.call_args_list
+    )
+    assert configured["env_vars"] == {"NUM_WORKERS": "3", "ENVIRONMENT": "cloud"}
+    assert configured["container_concurrency"] == 24
+    assert default["env_vars"] == {"NUM_WORKERS": "1", "ENVIRONMENT": "cloud"}
+    assert "container_concurrency" not in default
+    assert shared.env_vars == {"ENVIRONMENT": "cloud"}
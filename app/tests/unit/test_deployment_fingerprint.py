@@ -0,0 +1,157 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.adk.agents import Agent
+
+from app import agent_engine_deploy
+from app.agent.research_agent.config import DeploymentConfig
+from app.agent_engine_deploy import SharedDeploymentContext, deploy_agent
+from app.utils.deployment_fingerprint import (
+    FINGERPRINT_VERSION,
+    changed_components,
+    compute_deployment_fingerprint,
+    fingerprint_packages,
+)
+
+RESOURCE_NAME = "projects/p/locations/l/reasoningEngines/123"
+
+
+def lookup(query: str) -> dict:
+    """Look something up."""
+    return {"query": query}
+
+
+def _agent(instruction: str = "Be helpful.") -> Agent:
+    return Agent(
+        name="test_agent",
+        model="gemini-2.5-flash",
+        instruction=instruction,
+        tools=[lookup],
+    )
+
+
+@pytest.fixture
+def package_dir(tmp_path):
+    package = tmp_path / "my_agent"
+    package.mkdir()
+    (package / "agent.py").write_text("VALUE = 1\n")
+    return package
+
+
+def test_package_fingerprint_tracks_content_not_bytecode(package_dir):
+    before = fingerprint_packages([str(package_dir)])
+
+    cache_dir = package_dir / "__pycache__"
+    cache_dir.mkdir()
+    (cache_dir / "agent.cpython-311.pyc").write_bytes(b"\x00\x01")
+    assert fingerprint_packages([str(package_dir)]) == before
+
+    (package_dir / "agent.py").write_text("VALUE = 2\n")
+    assert fingerprint_packages([str(package_dir)]) != before
+
+
+def test_fingerprint_components_change_independently(package_dir):
+    kwargs = {
+        "agent": _agent(),
+        "extra_packages": [str(package_dir)],
+        "requirements": ["google-adk==1.6.1"],
+        "env_vars": {"NUM_WORKERS": "1"},
+        "display_name": "test_agent",
+        "description": "A test agent",
+    }
+    baseline = compute_deployment_fingerprint(**kwargs)
+    assert compute_deployment_fingerprint(**kwargs) == baseline
+
+    changed = compute_deployment_fingerprint(
+        **{**kwargs, "agent": _agent("Be terse."), "env_vars": {"NUM_WORKERS": "2"}}
+    )
+    assert changed_components(baseline, changed) == {"agent", "env_vars"}
+    assert changed_components(None, changed) == set(changed)
+
+
+@pytest.fixture
+def deploy_env(tmp_path, monkeypatch, package_dir):
+    monkeypatch.chdir(tmp_path)
+    shared = SharedDeploymentContext(
+        deployment_config=DeploymentConfig(
+            project="p",
+            location="l",
+            staging_bucket="p-adk-staging",
+            requirements_file=".requirements.txt",
+        ),
+        env_vars={"ENVIRONMENT": "cloud"},
+        requirements=["google-adk==1.6.1"],
+        service_account_email="sa@p.iam.gserviceaccount.com",
+    )
+    existing = MagicMock()
+    existing.resource_name = RESOURCE_NAME
+    existing.update.return_value = existing
+    with (
+        patch.object(agent_engine_deploy, "agent_engines") as mock_engines,
+        patch.object(agent_engine_deploy, "create_bucket_if_not_exists"),
+        patch.object(agent_engine_deploy, "AgentEngineApp"),
+    ):
+        mock_engines.get.return_value = existing
+        yield shared, existing, [str(package_dir)]
+
+
+def _deploy(shared, packages, agent=None, force=False):
+    return deploy_agent(
+        agent=agent or _agent(),
+        agent_name="test_agent",
+        agent_description="A test agent",
+        extra_packages=packages,
+        agent_id=RESOURCE_NAME,
+        shared=shared,
+        force=force,
+    )
+
+
+def test_unchanged_redeploy_is_skipped(deploy_env, tmp_path):
+    shared, existing, packages = deploy_env
+
+    _deploy(shared, packages)
+    assert existing.update.call_count == 1
+    metadata = json.loads(
+        (tmp_path / "logs" / "deployment_metadata_test_agent.json").read_text()
+    )
+    assert metadata["fingerprint_version"] == FINGERPRINT_VERSION
+    assert metadata["remote_agent_engine_id"] == RESOURCE_NAME
+
+    assert _deploy(shared, packages) is existing
+    assert existing.update.call_count == 1
+
+    _deploy(shared, packages, force=True)
+    assert existing.update.call_count == 2
+
+
+def test_only_changed_artifacts_are_uploaded(deploy_env):
+    shared, existing, packages = deploy_env
+    _deploy(shared, packages)
+
+    _deploy(shared, packages, agent=_agent("Be terse."))
+
+    update_kwargs = existing.update.call_args.kwargs
+    assert "agent_engine" in update_kwargs
+    assert "extra_packages" not in update_kwargs
+    assert "requirements" not in update_kwargs
+    assert update_kwargs["env_vars"] == {"NUM_WORKERS": "1", "ENVIRONMENT": "cloud"}
+
+
+def test_artifacts_staged_in_a_shared_directory_are_all_reuploaded(
+    deploy_env, tmp_path
+):
+    shared, existing, packages = deploy_env
+    _deploy(shared, packages)
+    # A deployment from before agents had their own staging directories.
+    metadata_file = tmp_path / "logs" / "deployment_metadata_test_agent.json"
+    metadata = json.loads(metadata_file.read_text())
+    del metadata["gcs_dir_name"]
+    metadata_file.write_text(json.dumps(metadata))
+
+    _deploy(shared, packages, agent=_agent("Be terse."))
+
+    update_kwargs = existing.update.call_args.kwargs
+    assert update_kwargs["gcs_dir_name"] == "agent_engine/test_agent"
+    assert {"agent_engine", "extra_packages", "requirements"} <= set(update_kwargs)
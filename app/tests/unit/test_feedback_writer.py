@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.feedback import BufferedFeedbackWriter, CloudLoggingSink, JsonlFileSink
+
+
+class RecordingSink:
+    def __init__(self, fail_first: bool = False) -> None:
+        self.batches: list[list[dict]] = []
+        self.fail_first = fail_first
+        self.written = threading.Event()
+
+    def write_batch(self, entries):
+        if self.fail_first:
+            self.fail_first = False
+            raise RuntimeError("sink unavailable")
+        self.batches.append(list(entries))
+        self.written.set()
+
+
+def _entry(i: int) -> dict:
+    return {"score": 5, "text": f"feedback {i}", "invocation_id": str(i)}
+
+
+def test_entries_are_drained_to_a_file_on_close(tmp_path):
+    path = tmp_path / "feedback.jsonl"
+    writer = BufferedFeedbackWriter(
+        JsonlFileSink(path), max_batch_size=10, flush_interval_seconds=60
+    )
+
+    for i in range(25):
+        assert writer.submit(_entry(i))
+    writer.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["invocation_id"] for line in lines] == [str(i) for i in range(25)]
+    assert not writer.submit(_entry(25))
+
+
+def test_batches_respect_the_size_threshold():
+    sink = RecordingSink()
+    writer = BufferedFeedbackWriter(sink, max_batch_size=10, flush_interval_seconds=60)
+
+    for i in range(25):
+        writer.submit(_entry(i))
+    writer.close()
+
+    assert [len(batch) for batch in sink.batches] == [10, 10, 5]
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    sink = RecordingSink()
+    writer = BufferedFeedbackWriter(
+        sink, max_batch_size=100, flush_interval_seconds=0.1
+    )
+
+    writer.submit(_entry(0))
+
+    assert sink.written.wait(timeout=2)
+    assert sink.batches == [[_entry(0)]]
+    writer.close()
+
+
+def test_submit_does_not_block_when_the_queue_is_full():
+    release = threading.Event()
+
+    class BlockedSink:
+        def write_batch(self, entries):
+            release.wait()
+
+    writer = BufferedFeedbackWriter(
+        BlockedSink(), max_batch_size=1, flush_interval_seconds=0.01, max_queue_size=2
+    )
+    writer.submit(_entry(0))
+    time.sleep(0.1)  # the writer thread is now blocked on the first entry
+
+    start = time.monotonic()
+    results = [writer.submit(_entry(i)) for i in range(1, 5)]
+    assert time.monotonic() - start < 0.5
+    assert results == [True, True, False, False]
+    assert writer.dropped == 2
+
+    release.set()
+    writer.close()
+
+
+def test_sink_errors_do_not_stop_the_writer():
+    sink = RecordingSink(fail_first=True)
+    writer = BufferedFeedbackWriter(sink, max_batch_size=1, flush_interval_seconds=60)
+
+    writer.submit(_entry(0))
+    writer.submit(_entry(1))
+    writer.close()
+
+    assert sink.batches == [[_entry(1)]]
+
+
+def test_every_accepted_entry_is_written_when_closed_during_submits():
+    sink = RecordingSink()
+    writer = BufferedFeedbackWriter(sink, max_batch_size=10, flush_interval_seconds=60)
+    accepted = []
+
+    def submit_many(start):
+        for i in range(start, start + 200):
+            if writer.submit(_entry(i)):
+                accepted.append(str(i))
+
+    threads = [threading.Thread(target=submit_many, args=(n * 200,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    writer.close()
+    for thread in threads:
+        thread.join()
+
+    written = [entry["invocation_id"] for batch in sink.batches for entry in batch]
+    assert sorted(written) == sorted(accepted)
+    assert writer.written == len(accepted)
+
+
+def test_each_writer_registers_its_close_at_exit_once():
+    with patch("app.utils.feedback.atexit") as mock_atexit:
+        writer = BufferedFeedbackWriter(RecordingSink())
+        writer.close()
+
+    mock_atexit.register.assert_called_once_with(writer.close)
+    mock_atexit.unregister.assert_called_once_with(writer.close)
+
+
+def test_cloud_logging_sink_writes_one_batch():
+    logger = MagicMock()
+
+    CloudLoggingSink(logger).write_batch([_entry(0), _entry(1)])
+
+    batch = logger.batch.return_value
+    assert batch.log_struct.call_count == 2
+    batch.commit.assert_called_once()
+    logger.log_struct.assert_not_called()
+
+
+def test_invalid_batch_size_is_rejected():
+    with pytest.raises(ValueError):
+        BufferedFeedbackWriter(RecordingSink(), max_batch_size=0)
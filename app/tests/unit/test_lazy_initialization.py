@@ -0,0 +1,168 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import vertex
+from app.utils.settings import Settings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Budget for the self time of first-party (app.*) modules while importing the
+# RAG agent package. Third-party import cost (google-adk, vertexai) is excluded
+# so the test tracks what this repo executes at import time, e.g. eager
+# `.env` loading or `vertexai.init`. Override with IMPORT_TIME_BUDGET_MS.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "250"))
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+        timeout=300,
+    )
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    timings: dict[str, tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        timings[module.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def test_rag_agent_first_party_import_time_within_budget():
+    result = _run_python("-X", "importtime", "-c", "import app.agent.rag_agent")
+    assert result.returncode == 0, result.stderr
+
+    timings = parse_importtime(result.stderr)
+    first_party = {
+        name: self_us
+        for name, (self_us, _) in timings.items()
+        if name == "app" or name.startswith("app.")
+    }
+    assert "app.agent.rag_agent" in first_party
+
+    total_ms = sum(first_party.values()) / 1000
+    slowest = sorted(first_party.items(), key=lambda item: item[1], reverse=True)[:5]
+    assert total_ms < IMPORT_TIME_BUDGET_MS, (
+        f"First-party import time {total_ms:.1f} ms exceeds budget "
+        f"{IMPORT_TIME_BUDGET_MS} ms. Slowest modules (us): {slowest}"
+    )
+
+
+def test_importing_rag_agent_does_not_initialize_vertexai():
+    code = (
+        "import vertexai\n"
+        "def _fail(*args, **kwargs):\n"
+        "    raise SystemExit('vertexai.init called at import time')\n"
+        "vertexai.init = _fail\n"
+        "import app.agent.rag_agent\n"
+    )
+    result = _run_python("-c", code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_agent_engine_app_does_not_import_deploy_time_modules():
+    deploy_time_modules = [
+        "app.agent_engine_deploy",
+        "app.agent.root_agent.agent",
+        "google.cloud.iam_admin_v1",
+        "google.cloud.logging",
+        "opentelemetry.sdk.trace",
+    ]
+    code = (
+        "import sys\n"
+        "import app.agent_engine_app\n"
+        f"print([m for m in {deploy_time_modules!r} if m in sys.modules])\n"
+    )
+    result = _run_python("-c", code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+@pytest.fixture
+def fresh_vertex_state():
+    vertex.reset_vertexai_initialization()
+    yield
+    vertex.reset_vertexai_initialization()
+
+
+def test_ensure_vertexai_initialized_runs_once_across_threads(fresh_vertex_state):
+    settings = Settings(
+        project_id="test-project",
+        location="us-central1",
+        remote_mcp_server_url=None,
+    )
+    with (
+        patch.object(vertex, "get_settings", return_value=settings),
+        patch.object(vertex.vertexai, "init") as mock_init,
+    ):
+        threads = [
+            threading.Thread(target=vertex.ensure_vertexai_initialized)
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert vertex.ensure_vertexai_initialized() is True
+
+    mock_init.assert_called_once_with(project="test-project", location="us-central1")
+
+
+def test_ensure_vertexai_initialized_retries_after_failure(fresh_vertex_state):
+    settings = Settings(
+        project_id="test-project",
+        location="us-central1",
+        remote_mcp_server_url=None,
+    )
+    with (
+        patch.object(vertex, "get_settings", return_value=settings),
+        patch.object(
+            vertex.vertexai, "init", side_effect=[RuntimeError("no creds"), None]
+        ) as mock_init,
+    ):
+        assert vertex.ensure_vertexai_initialized() is False
+        assert vertex.ensure_vertexai_initialized() is True
+
+    assert mock_init.call_count == 2
+
+
+def test_set_up_loads_the_dotenv_files_before_the_adk_app():
+    from google.adk.agents import Agent
+    from vertexai.preview.reasoning_engines import AdkApp
+
+    from app import agent_engine_app
+
+    calls = []
+    # AdkApp records the project and location Vertex AI is initialized with.
+    with patch("google.cloud.aiplatform.initializer.global_config"):
+        app = agent_engine_app.AgentEngineApp(
+            agent_name="test",
+            agent=Agent(name="test_agent", model="gemini-2.0-flash"),
+        )
+    with (
+        patch.object(
+            agent_engine_app,
+            "get_settings",
+            side_effect=lambda: calls.append("get_settings"),
+        ),
+        patch.object(AdkApp, "set_up", side_effect=lambda: calls.append("set_up")),
+        patch("google.cloud.logging.Client"),
+        patch.object(agent_engine_app, "BufferedFeedbackWriter"),
+    ):
+        app.set_up()
+
+    assert calls == ["get_settings", "set_up"]
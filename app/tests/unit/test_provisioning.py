@@ -0,0 +1,178 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from google.api_core.exceptions import NotFound
+
+from app import agent_engine_deploy
+from app.agent.research_agent.config import DeploymentConfig
+from app.agent_engine_deploy import prepare_shared_deployment
+from app.utils.provisioning import (
+    Provisioner,
+    ProvisioningCache,
+    ProvisioningClients,
+)
+from app.utils.settings import Settings
+
+SERVICE_ACCOUNT_EMAIL = "ai-agent-account@p.iam.gserviceaccount.com"
+
+
+class FakeStorageClient:
+    def __init__(self) -> None:
+        self.buckets: set[str] = set()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_bucket(self, name):
+        with self._lock:
+            self.calls += 1
+            if name not in self.buckets:
+                raise NotFound(name)
+        return SimpleNamespace(name=name)
+
+    def create_bucket(self, name, location, project):
+        with self._lock:
+            self.calls += 1
+            self.buckets.add(name)
+        return SimpleNamespace(name=name, location=location)
+
+
+class FakeIAMClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def create_service_account(self, request):
+        self.calls += 1
+        project = request.name.split("/")[1]
+        return SimpleNamespace(
+            email=f"{request.account_id}@{project}.iam.gserviceaccount.com"
+        )
+
+
+class FakeProjectsClient:
+    def __init__(self) -> None:
+        self.policy = SimpleNamespace(bindings=[])
+        self.calls = 0
+
+    def get_iam_policy(self, request):
+        self.calls += 1
+        return self.policy
+
+    def set_iam_policy(self, request):
+        self.calls += 1
+        self.policy = request["policy"]
+
+
+@pytest.fixture
+def fake_clients():
+    return SimpleNamespace(
+        storage=FakeStorageClient(),
+        iam=FakeIAMClient(),
+        projects=FakeProjectsClient(),
+    )
+
+
+@pytest.fixture
+def deploy_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".requirements.txt").write_text("google-adk==1.6.1\n")
+    config = DeploymentConfig(
+        project="p",
+        location="l",
+        staging_bucket="p-adk-staging",
+        requirements_file=".requirements.txt",
+    )
+    settings = Settings(
+        project_id="p", location="l", remote_mcp_server_url="http://mcp"
+    )
+    with (
+        patch.object(
+            agent_engine_deploy, "get_deployment_config", return_value=config
+        ),
+        patch.object(agent_engine_deploy, "get_settings", return_value=settings),
+        patch.object(agent_engine_deploy.vertexai, "init"),
+    ):
+        yield tmp_path
+
+
+def _prepare(fakes, verify=False):
+    clients = ProvisioningClients(
+        storage_client=fakes.storage,
+        iam_client=fakes.iam,
+        projects_client=fakes.projects,
+    )
+    return prepare_shared_deployment(
+        agent_names=["agent_a", "agent_b"], verify=verify, clients=clients
+    )
+
+
+def _total_calls(fakes):
+    return fakes.storage.calls + fakes.iam.calls + fakes.projects.calls
+
+
+def test_second_deploy_makes_no_provisioning_calls(deploy_env, fake_clients):
+    shared = _prepare(fake_clients)
+
+    assert shared.service_account_email == SERVICE_ACCOUNT_EMAIL
+    assert fake_clients.storage.buckets == {
+        "p-adk-staging",
+        "p-agent_a-logs-data",
+        "p-agent_b-logs-data",
+    }
+    assert (deploy_env / "logs" / "provisioning_state.json").exists()
+
+    calls = _total_calls(fake_clients)
+    shared = _prepare(fake_clients)
+    assert _total_calls(fake_clients) == calls
+    assert shared.provisioner.checks == 0
+    assert shared.service_account_email == SERVICE_ACCOUNT_EMAIL
+
+
+def test_verify_rechecks_every_resource(deploy_env, fake_clients):
+    _prepare(fake_clients)
+    calls = _total_calls(fake_clients)
+
+    shared = _prepare(fake_clients, verify=True)
+
+    assert _total_calls(fake_clients) > calls
+    assert shared.provisioner.checks == 5
+    assert shared.provisioner.cache_hits == 0
+
+
+def test_cached_roles_must_cover_the_request(tmp_path):
+    provisioner = Provisioner("p", cache=ProvisioningCache(tmp_path / "state.json"))
+    provisioned = []
+
+    def grant(roles):
+        def provision():
+            provisioned.append(roles)
+            return {"roles": roles}
+
+        return provision
+
+    def covers(roles):
+        return lambda record: set(roles) <= set(record["roles"])
+
+    for roles in (["roles/a", "roles/b"], ["roles/a"], ["roles/c"]):
+        provisioner.ensure(
+            "project-roles", "sa", grant(roles), satisfied=covers(roles)
+        )
+
+    assert provisioned == [["roles/a", "roles/b"], ["roles/c"]]
+
+
+def test_failed_provisioning_is_not_cached(tmp_path):
+    cache = ProvisioningCache(tmp_path / "state.json")
+    provisioner = Provisioner("p", cache=cache)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        provisioner.ensure("bucket", "b", fail, location="l")
+    assert cache.get("p/l/bucket/b") is None
+
+    provisioner.ensure("bucket", "b", lambda: {"name": "b"}, location="l")
+    reloaded = ProvisioningCache(tmp_path / "state.json")
+    assert reloaded.get("p/l/bucket/b")["name"] == "b"
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from app.agent.rag_agent.config import MAX_KNOWN_CORPORA
+from app.agent.rag_agent.tools.utils import (
+    CORPUS_NAMES_STATE_KEY,
+    KNOWN_CORPORA_STATE_KEY,
+    is_known_corpus,
+    remember_corpus,
+)
+from app.utils.session_compaction import (
+    SUMMARY_PREFIX,
+    HistoryCompactor,
+    compact_contents,
+)
+
+
+def _text(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def _tool_round(name):
+    call = types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name=name, args={}))],
+    )
+    response = types.Content(
+        role="user",
+        parts=[
+            types.Part(
+                function_response=types.FunctionResponse(name=name, response={})
+            )
+        ],
+    )
+    return [call, response]
+
+
+def _conversation(turns):
+    contents = []
+    for i in range(turns):
+        contents.append(_text("user", f"question {i}"))
+        contents.extend(_tool_round("rag_query"))
+        contents.append(_text("model", f"answer {i}"))
+    return contents
+
+
+def test_history_is_cut_at_a_turn_boundary():
+    contents = _conversation(10)  # 4 contents per turn
+
+    compacted = compact_contents(contents, max_contents=10)
+
+    # The last 10 contents start mid-turn, so the cut moves to the next turn.
+    assert compacted == contents[-8:]
+    assert compacted[0].parts[0].text == "question 8"
+
+
+def test_dropped_turns_are_summarized():
+    contents = _conversation(10)
+
+    compacted = compact_contents(contents, max_contents=8, summary_chars=500)
+
+    # The summary is the first part of the first kept user turn.
+    summary = compacted[0].parts[0].text
+    assert compacted[0].role == "user"
+    assert compacted[0].parts[1:] == contents[-8].parts
+    assert compacted[1:] == contents[-7:]
+    assert len(contents[-8].parts) == 1
+    assert summary.startswith(SUMMARY_PREFIX)
+    assert "user: question 0" in summary
+    assert "model: answer 7" in summary
+    assert "question 8" not in summary
+
+
+def test_short_or_unbreakable_history_is_kept():
+    contents = _conversation(2)
+    assert compact_contents(contents, max_contents=40) is contents
+
+    one_long_turn = [_text("user", "go")] + _tool_round("a") * 10
+    assert compact_contents(one_long_turn, max_contents=5) is one_long_turn
+
+
+def test_compactor_callback_rewrites_the_request():
+    request = LlmRequest(contents=_conversation(10))
+
+    result = HistoryCompactor(max_contents=4, summary_chars=0)(
+        callback_context=None, llm_request=request
+    )
+
+    assert result is None
+    assert [content.role for content in request.contents] == [
+        "user",
+        "model",
+        "user",
+        "model",
+    ]
+
+
+def test_known_corpora_are_keyed_by_resource_name_and_capped():
+    tool_context = SimpleNamespace(state={})
+    resource_name = "projects/p/locations/l/ragCorpora/123"
+
+    remember_corpus("my docs", tool_context, resource_name=resource_name)
+    assert is_known_corpus(resource_name, tool_context)
+    assert is_known_corpus("my docs", tool_context)
+    # Another corpus whose name only differs in punctuation.
+    assert not is_known_corpus("my_docs", tool_context)
+    assert tool_context.state[CORPUS_NAMES_STATE_KEY] == {"my docs": resource_name}
+
+    for i in range(MAX_KNOWN_CORPORA + 5):
+        remember_corpus(f"corpus-{i}", tool_context)
+    known = tool_context.state[KNOWN_CORPORA_STATE_KEY]
+    assert len(known) == MAX_KNOWN_CORPORA
+    assert not is_known_corpus("my docs", tool_context)
+    assert tool_context.state[CORPUS_NAMES_STATE_KEY] == {}
+    assert known[-1] == f"corpus-{MAX_KNOWN_CORPORA + 4}"
+
+    remember_corpus(f"corpus-{MAX_KNOWN_CORPORA + 4}", tool_context, exists=False)
+    assert not is_known_corpus(f"corpus-{MAX_KNOWN_CORPORA + 4}", tool_context)
+
+
+def test_legacy_state_keys_are_still_honoured():
+    tool_context = SimpleNamespace(state={"corpus_exists_docs": True})
+
+    assert is_known_corpus("docs", tool_context)
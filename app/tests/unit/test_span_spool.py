@@ -0,0 +1,119 @@
+import time
+from unittest import mock
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from app.utils.span_spool import SpanSpool
+from app.utils.tracing import CloudTraceLoggingSpanExporter
+from benchmarks.fakes import FakeLoggingClient
+
+
+def _spans(count):
+    tracer = TracerProvider().get_tracer(__name__)
+    spans = []
+    for i in range(count):
+        span = tracer.start_span(f"span {i}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def _exporter(logging_client, spool, **kwargs):
+    return CloudTraceLoggingSpanExporter(
+        project_id="test-project",
+        client=mock.Mock(),
+        logging_client=logging_client,
+        storage_client=mock.Mock(),
+        spool=spool,
+        replay_interval_seconds=3600,
+        **kwargs,
+    )
+
+
+def test_segments_rotate_and_the_oldest_are_dropped(tmp_path):
+    spool = SpanSpool(tmp_path, max_segment_bytes=100, max_total_bytes=500)
+
+    for i in range(20):
+        spool.append({"record": i, "padding": "x" * 40})
+
+    segments = sorted(tmp_path.glob("spool-*.jsonl"))
+    assert sum(segment.stat().st_size for segment in segments) <= 500
+    assert spool.segments_dropped > 0
+    oldest = spool.oldest_segment()
+    assert spool.read(oldest)[0]["record"] > 0
+
+    # A new spool picks up where the last one left off.
+    assert SpanSpool(tmp_path).oldest_segment() == oldest
+
+
+def test_failed_exports_are_spooled_and_replayed(tmp_path):
+    logging_client = FakeLoggingClient()
+    exporter = _exporter(logging_client, SpanSpool(tmp_path))
+
+    with mock.patch.object(
+        FakeLoggingClient._Batch, "commit", side_effect=RuntimeError("outage")
+    ):
+        assert exporter.export(_spans(3)).name == "SUCCESS"
+        exporter.export(_spans(2))
+    assert not exporter.spool.is_empty()
+    assert exporter.client.batch_write_spans.call_count == 0
+
+    assert exporter.replay_spool() == 2
+    assert exporter.spool.is_empty()
+    assert logging_client.entries == 5
+    replayed = [
+        call.kwargs["request"].spans
+        for call in exporter.client.batch_write_spans.call_args_list
+    ]
+    assert [len(spans) for spans in replayed] == [3, 2]
+    assert replayed[0][0].display_name.value == "span 0"
+
+    exporter.export(_spans(1))
+    assert exporter.spool.is_empty()
+    assert logging_client.entries == 6
+    exporter.shutdown()
+
+
+def test_export_does_not_wait_past_the_deadline(tmp_path):
+    logging_client = FakeLoggingClient(latency_seconds=0.5)
+    exporter = _exporter(
+        logging_client, SpanSpool(tmp_path), export_deadline_seconds=0.05
+    )
+
+    start = time.monotonic()
+    exporter.export(_spans(1))
+    exporter.export(_spans(1))
+    assert time.monotonic() - start < 0.4
+
+    deadline = time.monotonic() + 5
+    while logging_client.requests == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The late write went through; the second export was spooled meanwhile.
+    assert exporter.replay_spool() == 1
+    assert logging_client.entries == 2
+    exporter.shutdown()
+
+
+def test_a_restarted_worker_replays_the_spool_it_left(tmp_path):
+    logging_client = FakeLoggingClient()
+    first = SpanSpool.claim(tmp_path)
+    other_worker = SpanSpool.claim(tmp_path)
+    assert first.directory != other_worker.directory
+
+    exporter = _exporter(logging_client, first)
+    with mock.patch.object(
+        FakeLoggingClient._Batch, "commit", side_effect=RuntimeError("outage")
+    ):
+        exporter.export(_spans(2))
+    exporter.shutdown()
+    assert not first.is_empty()
+    # The worker exits; its replacement takes over the free slot.
+    first.release()
+
+    restarted = SpanSpool.claim(tmp_path)
+    assert restarted.directory == first.directory
+    exporter = _exporter(logging_client, restarted)
+    assert exporter.replay_spool() == 1
+    assert restarted.is_empty()
+    assert logging_client.entries == 2
+    exporter.shutdown()
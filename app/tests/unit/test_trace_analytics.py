@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+pytest.importorskip("pyarrow")
+
+from app.utils import tracing  # noqa: E402
+from app.utils.trace_analytics import ParquetSpanExporter  # noqa: E402
+from app.utils.trace_queries import latency_breakdown, load_spans  # noqa: E402
+from app.utils.trace_sampling import TraceSamplingConfig  # noqa: E402
+
+MS = 1_000_000
+# 2025-01-31T14:00:00Z
+START = 1_738_332_000 * 1_000_000_000
+
+
+def _span(tracer, name, parent, start_ms, duration_ms, **attributes):
+    context = trace.set_span_in_context(parent) if parent else None
+    span = tracer.start_span(
+        name, context=context, start_time=START + start_ms * MS, attributes=attributes
+    )
+    return span, START + (start_ms + duration_ms) * MS
+
+
+def _invocation(tracer, offset_ms, rag_query_ms):
+    invocation, invocation_end = _span(tracer, "invocation", None, offset_ms, 900)
+    root, root_end = _span(
+        tracer, "agent_run [root_agent]", invocation, offset_ms, 900
+    )
+    llm, llm_end = _span(
+        tracer, "call_llm", root, offset_ms, 300, **{"gen_ai.request.model": "flash"}
+    )
+    rag, rag_end = _span(tracer, "agent_run [rag_agent]", root, offset_ms + 300, 600)
+    tool, tool_end = _span(
+        tracer,
+        "execute_tool rag_query",
+        rag,
+        offset_ms + 300,
+        rag_query_ms,
+        **{"gen_ai.tool.name": "rag_query"},
+    )
+    for span, end in [
+        (llm, llm_end),
+        (tool, tool_end),
+        (rag, rag_end),
+        (root, root_end),
+        (invocation, invocation_end),
+    ]:
+        span.end(end_time=end)
+
+
+def test_latency_breakdown_over_partitioned_files(tmp_path):
+    exporter = ParquetSpanExporter(tmp_path, service_name="root_agent-service")
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+
+    for i in range(20):
+        _invocation(tracer, offset_ms=i * 1000, rag_query_ms=100 + 10 * i)
+    # Two hours later, in another partition.
+    _invocation(tracer, offset_ms=2 * 3600 * 1000, rag_query_ms=500)
+    provider.shutdown()
+
+    assert sorted(path.parent.name for path in tmp_path.glob("*/*/*.parquet")) == [
+        "hour=14",
+        "hour=16",
+    ]
+
+    table = load_spans(tmp_path, until=datetime(2025, 1, 31, 15, tzinfo=timezone.utc))
+    assert table.num_rows == 100
+
+    tools = latency_breakdown(table, by="tool").to_pylist()
+    assert len(tools) == 1
+    assert tools[0]["agent_name"] == "rag_agent"
+    assert tools[0]["tool_name"] == "rag_query"
+    assert tools[0]["count"] == 20
+    assert tools[0]["p50_ms"] == pytest.approx(195, abs=10)
+    assert tools[0]["max_ms"] == pytest.approx(290)
+
+    llm = latency_breakdown(table, by="llm").to_pylist()
+    assert [(row["agent_name"], row["model"]) for row in llm] == [
+        ("root_agent", "flash")
+    ]
+
+
+def test_analytics_files_get_every_span_alongside_the_sampled_export(tmp_path):
+    # A sampler with this configuration would drop every trace.
+    config = TraceSamplingConfig(head_ratio=0, slow_percentile=None, keep_errors=False)
+    with (
+        mock.patch.object(tracing, "_installed_provider", None),
+        mock.patch.object(tracing, "CloudTraceLoggingSpanExporter") as cloud_exporter,
+        mock.patch.object(tracing, "DEFAULT_SPOOL_DIRECTORY", tmp_path / "spool"),
+        mock.patch.object(tracing.trace, "set_tracer_provider"),
+    ):
+        provider = tracing.set_up_sampled_tracing(
+            config, "root_agent-service", analytics_directory=str(tmp_path / "spans")
+        )
+    tracer = provider.get_tracer(__name__)
+    for i in range(3):
+        _invocation(tracer, offset_ms=i * 1000, rag_query_ms=100)
+    processors = provider._active_span_processor._span_processors
+    provider.shutdown()
+
+    sampled, analytics = processors
+    assert isinstance(sampled, tracing.SamplingSpanProcessor)
+    assert sampled.processor.span_exporter is cloud_exporter.return_value
+    assert isinstance(analytics.span_exporter, ParquetSpanExporter)
+    assert load_spans(tmp_path / "spans").num_rows == 15
+    cloud_exporter.return_value.export.assert_not_called()
@@ -0,0 +1,100 @@
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.trace import Status, StatusCode
+
+from app.utils.trace_sampling import TraceSamplingConfig
+from app.utils.tracing import SamplingSpanProcessor
+
+MS = 1_000_000
+
+
+class _Recorder(SpanProcessor):
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+
+def _pipeline(**config):
+    recorder = _Recorder()
+    sampler = SamplingSpanProcessor(recorder, TraceSamplingConfig(**config))
+    provider = TracerProvider()
+    provider.add_span_processor(sampler)
+    return provider.get_tracer(__name__), sampler, recorder
+
+
+def _trace(tracer, duration_ms=10, child="call_llm", error=False, start=0):
+    root = tracer.start_span("invocation", start_time=start)
+    context = trace.set_span_in_context(root)
+    span = tracer.start_span(child, context=context, start_time=start)
+    if error:
+        span.set_status(Status(StatusCode.ERROR, "failed"))
+    span.end(end_time=start + MS)
+    root.end(end_time=start + duration_ms * MS)
+    return root
+
+
+def test_only_errored_traces_are_kept_without_head_sampling():
+    tracer, sampler, recorder = _pipeline(head_ratio=0.0, slow_percentile=None)
+
+    _trace(tracer)
+    _trace(tracer, error=True)
+
+    assert [span.name for span in recorder.spans] == ["call_llm", "invocation"]
+    assert recorder.spans[0].status.status_code is StatusCode.ERROR
+    assert (sampler.traces_kept, sampler.traces_dropped) == (1, 1)
+
+
+def test_slow_traces_are_kept():
+    tracer, sampler, recorder = _pipeline(
+        head_ratio=0.0, slow_threshold_ms=1000, slow_percentile=0.99, slow_window=200
+    )
+
+    for _ in range(150):
+        _trace(tracer, duration_ms=10)
+    assert recorder.spans == []
+
+    _trace(tracer, duration_ms=200)  # slower than the recent p99
+    _trace(tracer, duration_ms=5000)  # over the fixed threshold
+    _trace(tracer, duration_ms=10)
+
+    assert sampler.traces_kept == 2
+
+
+def test_head_sampling_and_operation_overrides():
+    tracer, sampler, _ = _pipeline(
+        head_ratio=1.0,
+        operation_ratios={"execute_tool rag": 0.0},
+        slow_percentile=None,
+    )
+    _trace(tracer)
+    _trace(tracer, child="execute_tool rag_query")
+    assert (sampler.traces_kept, sampler.traces_dropped) == (1, 1)
+
+    with pytest.raises(ValueError):
+        TraceSamplingConfig(operation_ratios={"call_llm": 2.0})
+
+
+def test_buffer_is_bounded_and_late_spans_follow_the_decision():
+    tracer, sampler, recorder = _pipeline(
+        head_ratio=1.0, slow_percentile=None, max_buffered_spans=3
+    )
+    roots = [tracer.start_span("invocation") for _ in range(3)]
+    for root in roots:
+        for _ in range(2):
+            child = tracer.start_span("call_llm", trace.set_span_in_context(root))
+            child.end()
+    assert sampler.spans_evicted == 4
+
+    late = tracer.start_span("call_llm", trace.set_span_in_context(roots[2]))
+    roots[2].end()
+    late.end()
+
+    assert [span.name for span in recorder.spans] == [
+        "call_llm",
+        "call_llm",
+        "invocation",
+        "call_llm",
+    ]
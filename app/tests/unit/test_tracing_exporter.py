@@ -0,0 +1,176 @@
+import gzip
+import json
+import threading
+import time
+from unittest import mock
+
+from google.api_core.exceptions import ServiceUnavailable
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.trace import Link, Status, StatusCode
+
+from app.utils import tracing
+from app.utils.trace_sampling import TraceSamplingConfig
+from app.utils.tracing import CloudTraceLoggingSpanExporter, set_up_sampled_tracing
+from benchmarks.fakes import FakeLoggingClient
+
+
+def _spans(count):
+    tracer = TracerProvider().get_tracer(__name__)
+    spans = []
+    for i in range(count):
+        span = tracer.start_span(f"span {i}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def _exporter(logging_client, **kwargs):
+    return CloudTraceLoggingSpanExporter(
+        project_id="test-project",
+        client=mock.Mock(),
+        logging_client=logging_client,
+        storage_client=mock.Mock(),
+        **kwargs,
+    )
+
+
+def test_each_export_is_written_in_batches():
+    logging_client = FakeLoggingClient()
+    exporter = _exporter(logging_client, log_batch_size=4)
+
+    exporter.export(_spans(10))
+
+    assert logging_client.requests == 3
+    assert logging_client.entries == 10
+    assert exporter.client.batch_write_spans.call_count == 1
+
+
+def test_entries_are_buffered_across_exports_until_the_interval():
+    logging_client = FakeLoggingClient()
+    exporter = _exporter(logging_client, log_flush_interval_seconds=0.2)
+
+    for span in _spans(5):
+        exporter.export([span])
+    assert logging_client.requests == 0
+
+    deadline = time.monotonic() + 5
+    while logging_client.requests == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (logging_client.requests, logging_client.entries) == (1, 5)
+
+    exporter.export(_spans(2))
+    exporter.shutdown()
+    assert (logging_client.requests, logging_client.entries) == (2, 7)
+
+
+def test_failed_log_write_does_not_fail_the_trace_export():
+    logging_client = FakeLoggingClient()
+    exporter = _exporter(logging_client)
+
+    with mock.patch.object(
+        FakeLoggingClient._Batch, "commit", side_effect=RuntimeError("boom")
+    ):
+        result = exporter.export(_spans(2))
+
+    assert result.name == "SUCCESS"
+
+
+def test_log_entry_matches_the_span_json():
+    tracer = TracerProvider().get_tracer(__name__)
+    with tracer.start_as_current_span("parent") as parent:
+        span = tracer.start_span(
+            "child", links=[Link(parent.get_span_context(), {"weight": 1})]
+        )
+        span.set_attribute("tools", ("rag_query", "list_corpora"))
+        span.set_attribute("tokens", 42)
+        span.add_event("retry", {"attempt": 2})
+        span.set_status(Status(StatusCode.ERROR, "quota exceeded"))
+        span.end()
+    exporter = _exporter(FakeLoggingClient())
+
+    for finished in (span, parent):
+        assert exporter._span_to_dict(finished) == json.loads(finished.to_json())
+
+
+def test_only_the_largest_attributes_are_offloaded():
+    tracer = TracerProvider().get_tracer(__name__)
+    span = tracer.start_span("call_llm")
+    span.set_attribute("llm_request", "q" * 200 * 1024)
+    span.set_attribute("llm_response", "r" * 150 * 1024)
+    span.set_attribute("invocation_id", "e-1")
+    span.end()
+    logging_client = FakeLoggingClient()
+    exporter = _exporter(logging_client, bucket_name="logs-bucket")
+
+    span_dict = exporter._process_large_attributes(
+        exporter._span_to_dict(span), span_id="abc"
+    )
+
+    attributes = span_dict["attributes"]
+    assert attributes["llm_request"] == "gs://logs-bucket/spans/abc.json"
+    assert attributes["llm_response"] == "r" * 150 * 1024
+    assert attributes["invocation_id"] == "e-1"
+    assert attributes["uri_payload"] == "gs://logs-bucket/spans/abc.json"
+    assert attributes["upload_queue_depth"] in (0, 1)
+    assert exporter.force_flush()
+    blob = exporter.bucket.blob.return_value
+    assert blob.content_encoding == "gzip"
+    uploaded = gzip.decompress(blob.upload_from_string.call_args.args[0])
+    assert json.loads(uploaded) == {"llm_request": "q" * 200 * 1024}
+
+
+def test_payload_uploads_are_retried_and_bounded():
+    exporter = _exporter(
+        FakeLoggingClient(),
+        upload_workers=1,
+        max_pending_uploads=2,
+        upload_initial_backoff_seconds=0.01,
+    )
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def upload_from_string(data, content_type):
+        calls.append(data)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+            raise ServiceUnavailable("try again")
+
+    exporter.bucket.blob.return_value.upload_from_string = upload_from_string
+
+    uri = exporter.store_in_gcs("{}", "a")
+    assert uri == f"gs://{exporter.bucket_name}/spans/a.json"
+    assert started.wait(5)
+    exporter.store_in_gcs("{}", "b")
+    assert exporter.upload_queue_depth == 2
+    with mock.patch("app.utils.tracing.logging") as mock_logging:
+        assert exporter.store_in_gcs("{}", "c") == "GCS upload queue full"
+    assert exporter.uploads_dropped == 1
+    assert "2 of 2 pending" in mock_logging.warning.call_args.args[0]
+    release.set()
+
+    assert exporter.force_flush()
+    assert len(calls) == 3
+    assert exporter.uploads_failed == 0
+    assert exporter.bucket.exists.call_count == 1
+
+
+def test_sampled_tracing_is_set_up_once_with_the_given_bucket(tmp_path):
+    with (
+        mock.patch.object(tracing, "_installed_provider", None),
+        mock.patch.object(tracing, "CloudTraceLoggingSpanExporter") as exporter,
+        mock.patch.object(tracing, "DEFAULT_SPOOL_DIRECTORY", tmp_path),
+        mock.patch.object(tracing.trace, "set_tracer_provider") as set_provider,
+    ):
+        provider = set_up_sampled_tracing(
+            TraceSamplingConfig(), "agent-service", bucket_name="p-agent-logs-data"
+        )
+        # E.g. the set_up of a cloned app.
+        again = set_up_sampled_tracing(TraceSamplingConfig(), "agent-service")
+
+    assert again is provider
+    exporter.assert_called_once()
+    assert exporter.call_args.kwargs["bucket_name"] == "p-agent-logs-data"
+    set_provider.assert_called_once_with(provider)
+    provider.shutdown()
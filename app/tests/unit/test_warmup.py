@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.adk.agents import Agent
+
+from app.agent.rag_agent.tools import utils as rag_utils
+from app.agent.root_agent.agent import root_agent
+from app.utils import warmup
+
+
+def lookup(query: str) -> dict:
+    """Look something up."""
+    return {"query": query}
+
+
+def _app(agent, **attrs):
+    return SimpleNamespace(_tmpl_attrs={"agent": agent, **attrs}, logger=MagicMock())
+
+
+@pytest.fixture(autouse=True)
+def fresh_corpora_cache():
+    rag_utils.invalidate_corpora_cache()
+    yield
+    rag_utils.invalidate_corpora_cache()
+
+
+def test_rag_step_only_for_agents_with_rag_tools():
+    plain = Agent(name="plain", model="gemini-2.5-flash", tools=[lookup])
+
+    assert "rag" not in warmup.warmup_steps(_app(plain))
+    assert "rag" in warmup.warmup_steps(_app(root_agent))
+
+
+def test_warm_up_reports_failures_without_raising():
+    bucket = MagicMock()
+    app = _app(root_agent, artifact_service=SimpleNamespace(bucket=bucket))
+
+    with (
+        patch.object(warmup, "ensure_vertexai_initialized", return_value=True),
+        patch.object(
+            rag_utils.rag, "list_corpora", side_effect=RuntimeError("no network")
+        ),
+    ):
+        report = warmup.warm_up(app)
+
+    assert report["status"] == "partial"
+    assert report["steps"]["rag"] == {
+        "ok": False,
+        "error": "no network",
+        "duration_ms": report["steps"]["rag"]["duration_ms"],
+    }
+    for step in ("cloud_logging", "artifacts", "tool_declarations"):
+        assert report["steps"][step]["ok"], step
+    bucket.exists.assert_called_once()
+
+
+def test_warm_up_primes_the_corpus_cache():
+    corpus = SimpleNamespace(
+        name="projects/p/locations/l/ragCorpora/1", display_name="docs"
+    )
+
+    with (
+        patch.object(warmup, "ensure_vertexai_initialized", return_value=True),
+        patch.object(rag_utils.rag, "list_corpora", return_value=[corpus]) as listing,
+    ):
+        assert warmup.warm_up(_app(root_agent))["status"] == "ok"
+        assert rag_utils.get_corpus_resource_name("docs") == corpus.name
+        assert listing.call_count == 1
+
+        rag_utils.invalidate_corpora_cache()
+        rag_utils.get_corpus_resource_name("docs")
+        assert listing.call_count == 2
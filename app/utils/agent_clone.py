@@ -0,0 +1,52 @@
+import copy
+from typing import Any, TypeVar
+
+from google.adk.agents import BaseAgent
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+
+AgentT = TypeVar("AgentT", bound=BaseAgent)
+
+# Fields rebuilt explicitly by `clone_agent` rather than copied generically.
+_TREE_FIELDS = {"parent_agent", "sub_agents", "tools"}
+
+
+def _clone_tool(tool: Any) -> Any:
+    """Share function tools; copy tool objects, which may carry per-instance state."""
+    if isinstance(tool, (BaseTool, BaseToolset)):
+        return copy.deepcopy(tool)
+    return tool
+
+
+def clone_agent(agent: AgentT) -> AgentT:
+    """
+    Clone an agent tree, sharing immutable parts instead of deep-copying them.
+
+    Instructions, descriptions, model names/config objects, callbacks and plain
+    function tools are shared with the original. Each agent node is a new object,
+    its `sub_agents`/`tools` lists (and any other list or dict field) are new
+    containers, `parent_agent` links point into the new tree, and tool objects
+    deriving from `BaseTool`/`BaseToolset` are deep-copied because they can
+    hold connections or caches.
+
+    :param agent: The root of the agent tree to clone
+    :return: A new agent tree that can be mutated without affecting `agent`
+    """
+    update: dict[str, Any] = {
+        "sub_agents": [clone_agent(sub_agent) for sub_agent in agent.sub_agents],
+    }
+    if "tools" in type(agent).model_fields:
+        update["tools"] = [_clone_tool(tool) for tool in agent.tools]  # type: ignore[attr-defined]
+
+    for field_name in type(agent).model_fields:
+        if field_name in _TREE_FIELDS:
+            continue
+        value = getattr(agent, field_name)
+        if isinstance(value, (list, dict)):
+            update[field_name] = copy.copy(value)
+
+    cloned = agent.model_copy(update=update)
+    cloned.parent_agent = None
+    for sub_agent in cloned.sub_agents:
+        sub_agent.parent_agent = cloned
+    return cloned
@@ -0,0 +1,480 @@
+"""
+Minimal deployment bundles derived from static import analysis.
+
+Starting from a deployed agent object, this finds the first-party modules that
+define its agents, tools and callbacks, follows their `import` statements (with
+`ast`, nothing is executed), and derives:
+
+- the package directories/files under `app/` that must be shipped as
+  `extra_packages`, and
+- the third-party distributions those modules import, plus their transitive
+  dependencies, used to filter the exported `.requirements.txt`.
+"""
+
+import ast
+import importlib.metadata
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from importlib.machinery import EXTENSION_SUFFIXES
+from pathlib import Path
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from packaging.requirements import InvalidRequirement, Requirement
+
+from app.utils.settings import PROJECT_ROOT
+
+FIRST_PARTY_PACKAGE = "app"
+
+# A module is shipped as part of the first directory (or file) below the deepest
+# of these roots that contains it, e.g. app/agent/rag_agent or app/utils.
+BUNDLE_ROOTS = ("app/agent", "app")
+
+# Modules every Agent Engine deployment needs, whatever the agent imports.
+ALWAYS_INCLUDED_MODULES = ("app.agent_engine_app",)
+
+# Distributions the Agent Engine runtime needs to load the pickled app.
+ALWAYS_REQUIRED_DISTRIBUTIONS = ("google-cloud-aiplatform", "cloudpickle")
+
+_AGENT_CALLBACK_FIELDS = (
+    "before_agent_callback",
+    "after_agent_callback",
+    "before_model_callback",
+    "after_model_callback",
+    "before_tool_callback",
+    "after_tool_callback",
+)
+
+
+def normalize_distribution_name(name: str) -> str:
+    """Normalize a distribution name as described in PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+@dataclass
+class Bundle:
+    """The result of bundling one agent."""
+
+    packages: list[str]
+    modules: list[str]
+    distributions: list[str]
+    requirements: list[str] = field(default_factory=list)
+    unresolved_imports: list[str] = field(default_factory=list)
+
+
+# --- Discovering the entry modules ---
+
+
+def _walk_agents(agent: BaseAgent) -> Iterator[BaseAgent]:
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _walk_agents(sub_agent)
+
+
+def _callable_modules(value: Any) -> Iterator[str]:
+    if value is None:
+        return
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _callable_modules(item)
+        return
+    module = getattr(value, "__module__", None)
+    if isinstance(module, str):
+        yield module
+    # FunctionTool and friends wrap the user function.
+    wrapped = getattr(value, "func", None)
+    if wrapped is not None and wrapped is not value:
+        yield from _callable_modules(wrapped)
+
+
+def entry_modules(agent: BaseAgent) -> set[str]:
+    """
+    Find the first-party modules the agent tree was built from.
+
+    Tools and callbacks carry their defining module. Agent instances do not, so
+    already-imported first-party modules are searched for a module-level
+    assignment whose value is a node of the tree (re-exports are ignored, so
+    e.g. the deploy script importing `root_agent` does not count).
+    """
+    nodes = list(_walk_agents(agent))
+    node_ids = {id(node) for node in nodes}
+    modules: set[str] = set(ALWAYS_INCLUDED_MODULES)
+
+    for node in nodes:
+        modules.update(_callable_modules(getattr(node, "tools", None)))
+        for callback_field in _AGENT_CALLBACK_FIELDS:
+            modules.update(_callable_modules(getattr(node, callback_field, None)))
+
+    for name, module in list(sys.modules.items()):
+        if not _is_first_party(name) or module is None:
+            continue
+        agent_globals = {
+            global_name
+            for global_name, value in vars(module).items()
+            if id(value) in node_ids
+        }
+        module_file = getattr(module, "__file__", None)
+        if agent_globals and module_file:
+            if agent_globals & _assigned_names(Path(module_file)):
+                modules.add(name)
+
+    return {name for name in modules if _is_first_party(name)}
+
+
+def _assigned_names(file_path: Path) -> set[str]:
+    """Names bound by module-level assignments (not imports) in a source file."""
+    tree = ast.parse(file_path.read_text(), filename=str(file_path))
+    names: set[str] = set()
+    for node in tree.body:
+        targets = []
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign):
+            targets = [node.target]
+        names.update(target.id for target in targets if isinstance(target, ast.Name))
+    return names
+
+
+# --- First-party import graph ---
+
+
+def _is_first_party(module: str) -> bool:
+    return module == FIRST_PARTY_PACKAGE or module.startswith(
+        f"{FIRST_PARTY_PACKAGE}."
+    )
+
+
+def _module_file(module: str, root: Path) -> Path | None:
+    base = root.joinpath(*module.split("."))
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _bundle_unit(file_path: Path, root: Path) -> str:
+    relative = file_path.relative_to(root).as_posix()
+    for bundle_root in BUNDLE_ROOTS:
+        prefix = f"{bundle_root}/"
+        if relative.startswith(prefix):
+            first = relative[len(prefix) :].split("/", 1)[0]
+            return f"{bundle_root}/{first}"
+    return relative
+
+
+def _imported_names(module: str, file_path: Path) -> Iterator[list[str]]:
+    """Yield, for each import, candidate module names (most specific first)."""
+    tree = ast.parse(file_path.read_text(), filename=str(file_path))
+    is_package = file_path.name == "__init__.py"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield [alias.name]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                package_parts = module.split(".")
+                if not is_package:
+                    package_parts = package_parts[:-1]
+                if node.level > 1:
+                    package_parts = package_parts[: -(node.level - 1)]
+                base = ".".join(package_parts)
+                target = f"{base}.{node.module}" if node.module else base
+            else:
+                target = node.module or ""
+            for alias in node.names:
+                if alias.name == "*":
+                    yield [target]
+                else:
+                    yield [f"{target}.{alias.name}", target]
+
+
+def _parent_packages_in_unit(module: str, root: Path, unit: str) -> Iterator[str]:
+    """Packages between the unit and `module`, whose __init__ runs on import."""
+    parts = module.split(".")
+    for depth in range(1, len(parts)):
+        parent = ".".join(parts[:depth])
+        parent_file = _module_file(parent, root)
+        if parent_file is None or parent_file.name != "__init__.py":
+            continue
+        if parent_file.relative_to(root).as_posix().startswith(f"{unit}/"):
+            yield parent
+
+
+def walk_imports(
+    modules: Iterable[str], root: Path = PROJECT_ROOT
+) -> tuple[set[str], set[str], set[str]]:
+    """
+    Follow first-party imports statically from `modules`.
+
+    :return: (first-party modules, bundle units, external module names)
+    """
+    seen: set[str] = set()
+    units: set[str] = set()
+    external: set[str] = set()
+    queue = list(modules)
+
+    while queue:
+        module = queue.pop()
+        if module in seen:
+            continue
+        file_path = _module_file(module, root)
+        if file_path is None:
+            continue
+        seen.add(module)
+        unit = _bundle_unit(file_path, root)
+        units.add(unit)
+        queue.extend(_parent_packages_in_unit(module, root, unit))
+
+        for candidates in _imported_names(module, file_path):
+            if _is_first_party(candidates[0]):
+                queue.extend(
+                    name for name in candidates if _module_file(name, root) is not None
+                )
+            else:
+                external.add(candidates[0])
+
+    return seen, units, external
+
+
+# --- Third-party distributions ---
+
+
+class DistributionIndex:
+    """Maps importable module names to the installed distribution providing them."""
+
+    def __init__(
+        self, distributions: Iterable[importlib.metadata.Distribution] | None = None
+    ) -> None:
+        """
+        :param distributions: The installed distributions; all of those on
+            `sys.path` by default
+        """
+        self._by_path: dict[str, str] = {}
+        self._distributions: dict[str, importlib.metadata.Distribution] = {}
+        if distributions is None:
+            distributions = importlib.metadata.distributions()
+        for distribution in distributions:
+            name = normalize_distribution_name(distribution.metadata["Name"] or "")
+            if not name or name in self._distributions:
+                continue
+            self._distributions[name] = distribution
+            for file in distribution.files or []:
+                self._by_path.setdefault(file.as_posix(), name)
+
+    def distribution_for_module(self, module: str) -> str | None:
+        parts = module.split(".")
+        while parts:
+            base = "/".join(parts)
+            candidates = [f"{base}/__init__.py", f"{base}.py"]
+            candidates += [f"{base}{suffix}" for suffix in EXTENSION_SUFFIXES]
+            for candidate in candidates:
+                if candidate in self._by_path:
+                    return self._by_path[candidate]
+            parts = parts[:-1]
+        return None
+
+    def installed_size(self, name: str) -> int:
+        distribution = self._distributions.get(name)
+        if distribution is None:
+            return 0
+        total = 0
+        for file in distribution.files or []:
+            try:
+                total += Path(str(distribution.locate_file(file))).stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def dependency_closure(self, names: Iterable[str]) -> set[str] | None:
+        """
+        The distributions `names` need, following requested extras.
+
+        A requirement such as `google-cloud-aiplatform[agent-engines]` adds the
+        requirements of that distribution whose markers match `extra ==
+        "agent-engines"`, as well as its unconditional ones.
+
+        :param names: Distribution names, optionally with extras
+        :return: The closure, or None if a distribution in it is not installed
+            (its requirements, and so the closure, are unknown)
+        """
+        closure: set[str] = set()
+        visited: set[tuple[str, str]] = set()
+        queue: list[tuple[str, str]] = []
+        for line in names:
+            requirement = Requirement(line)
+            name = normalize_distribution_name(requirement.name)
+            queue += [(name, extra) for extra in ["", *requirement.extras]]
+        while queue:
+            name, extra = queue.pop()
+            if (name, extra) in visited:
+                continue
+            visited.add((name, extra))
+            closure.add(name)
+            distribution = self._distributions.get(name)
+            if distribution is None:
+                return None
+            for requirement_line in distribution.requires or []:
+                try:
+                    requirement = Requirement(requirement_line)
+                except InvalidRequirement:
+                    continue
+                if requirement.marker and not requirement.marker.evaluate(
+                    {"extra": extra}
+                ):
+                    continue
+                if not requirement.marker and extra:
+                    # Already followed for the distribution without extras.
+                    continue
+                dependency = normalize_distribution_name(requirement.name)
+                queue += [
+                    (dependency, dependency_extra)
+                    for dependency_extra in ["", *requirement.extras]
+                ]
+        return closure
+
+
+def _is_stdlib(module: str) -> bool:
+    top_level = module.split(".", 1)[0]
+    return top_level in sys.stdlib_module_names or top_level == "__future__"
+
+
+def _requirement_names(
+    requirements: Iterable[str],
+) -> Iterator[tuple[str | None, str]]:
+    """
+    Yield (normalized distribution name, line) for each requirement line.
+
+    Lines that are not plain requirements (pip options, URLs, editable
+    installs) are yielded with a None name.
+    """
+    for line in requirements:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        try:
+            requirement = Requirement(stripped)
+        except InvalidRequirement:
+            yield None, stripped
+            continue
+        yield normalize_distribution_name(requirement.name), stripped
+
+
+def filter_requirements(requirements: Iterable[str], keep: set[str]) -> list[str]:
+    """
+    Keep the requirement lines whose distribution is in `keep`.
+
+    Lines that cannot be attributed to a distribution are kept as-is.
+    """
+    return [
+        line
+        for name, line in _requirement_names(requirements)
+        if name is None or name in keep
+    ]
+
+
+# --- Public API ---
+
+
+def compute_bundle(
+    agent: BaseAgent,
+    requirements: Iterable[str],
+    root: Path = PROJECT_ROOT,
+    index: DistributionIndex | None = None,
+) -> Bundle:
+    """
+    Compute the minimal packages and requirements needed to run `agent`.
+
+    :param agent: The root of the deployed agent tree
+    :param requirements: The full requirement lines (e.g. `.requirements.txt`)
+    :param root: The project root that contains the `app` package
+    :param index: Installed-distribution index, reused across agents if given
+    :return: The bundle to deploy
+    """
+    index = index or DistributionIndex()
+    modules, units, external = walk_imports(entry_modules(agent), root)
+
+    direct: set[str] = set(ALWAYS_REQUIRED_DISTRIBUTIONS)
+    unresolved: set[str] = set()
+    for module in external:
+        if _is_stdlib(module):
+            continue
+        distribution = index.distribution_for_module(module)
+        if distribution is None:
+            unresolved.add(module)
+        else:
+            direct.add(distribution)
+
+    closure = index.dependency_closure(direct)
+    requirements = list(requirements)
+    return Bundle(
+        packages=[f"./{unit}" for unit in sorted(units)],
+        modules=sorted(modules),
+        distributions=sorted(direct),
+        # Without a complete closure, keep every requirement rather than risk
+        # dropping one the runtime imports.
+        requirements=(
+            requirements
+            if closure is None
+            else filter_requirements(requirements, closure)
+        ),
+        unresolved_imports=sorted(unresolved),
+    )
+
+
+def _path_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(
+        file.stat().st_size
+        for file in path.rglob("*")
+        if file.is_file() and "__pycache__" not in file.parts
+    )
+
+
+def report_bundle(
+    agent_name: str,
+    bundle: Bundle,
+    all_requirements: list[str],
+    root: Path = PROJECT_ROOT,
+    index: DistributionIndex | None = None,
+    install_throughput_mb_s: float = 50.0,
+) -> None:
+    """
+    Print the bundle contents, its size and the estimated cold-start savings.
+
+    The saving is an estimate: the installed size of the dropped distributions
+    divided by an assumed install/extract throughput for the replica image.
+    """
+    index = index or DistributionIndex()
+    bundle_bytes = sum(
+        _path_size(root / package.removeprefix("./")) for package in bundle.packages
+    )
+
+    all_names = {name for name, _ in _requirement_names(all_requirements) if name}
+    kept = {name for name, _ in _requirement_names(bundle.requirements) if name}
+    dropped = sorted(all_names - kept)
+    dropped_bytes = sum(index.installed_size(name) for name in dropped)
+    dropped_mb = dropped_bytes / 1024 / 1024
+
+    print(f"\n📦 [{agent_name}] Deployment bundle")
+    print(f"  packages ({bundle_bytes / 1024:.1f} KiB):")
+    for package in bundle.packages:
+        print(f"    {package}")
+    print(
+        f"  requirements: {len(kept)} of {len(all_names)} kept, "
+        f"{len(dropped)} dropped ({dropped_mb:.1f} MiB installed)"
+    )
+    if dropped:
+        print(f"    dropped: {', '.join(dropped)}")
+    if bundle.unresolved_imports:
+        print(
+            "  ⚠️ imports not matched to an installed distribution: "
+            f"{', '.join(bundle.unresolved_imports)}"
+        )
+    print(
+        f"  estimated cold-start saving: ~{dropped_mb / install_throughput_mb_s:.1f}s "
+        f"(at {install_throughput_mb_s:.0f} MiB/s install throughput)"
+    )
+
@@ -0,0 +1,154 @@
+"""
+Worker sizing for Agent Engine deployments, derived from load-test curves.
+
+`benchmarks/load_test.py` measures one worker process at increasing request
+concurrency. From that curve, `recommend_worker_config` picks:
+
+- the per-worker concurrency: the highest level that still meets the latency
+  and error budgets, stopping where more concurrency no longer buys meaningful
+  throughput (the knee of the curve). Without an explicit latency SLO, the
+  budget is a multiple of the p95 latency at the lowest measured concurrency,
+  so queueing inside the worker is not mistaken for capacity, and
+- the number of workers per replica: as many as fit in the replica's CPUs at
+  the CPU cost one worker has at that concurrency.
+"""
+
+import math
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """Worker processes per replica and concurrent requests per worker."""
+
+    num_workers: int = 1
+    per_worker_concurrency: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+        concurrency = self.per_worker_concurrency
+        if concurrency is not None and concurrency < 1:
+            raise ValueError("per_worker_concurrency must be at least 1.")
+
+    @property
+    def container_concurrency(self) -> int | None:
+        """Concurrent requests per replica, if per-worker concurrency is set."""
+        if self.per_worker_concurrency is None:
+            return None
+        return self.num_workers * self.per_worker_concurrency
+
+    def env_vars(self) -> dict[str, str]:
+        # The per-worker concurrency is applied through `container_concurrency`;
+        # nothing in the worker reads it from the environment.
+        return {"NUM_WORKERS": str(self.num_workers)}
+
+
+@dataclass(frozen=True)
+class LoadPoint:
+    """The measurements of one worker at one concurrency level."""
+
+    concurrency: int
+    requests: int
+    errors: int
+    duration_seconds: float
+    cpu_seconds: float
+    p50_ms: float
+    p95_ms: float
+
+    @property
+    def throughput_rps(self) -> float:
+        return (self.requests - self.errors) / self.duration_seconds
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def cpu_utilization(self) -> float:
+        """CPU cores used by the worker while serving this load."""
+        return self.cpu_seconds / self.duration_seconds
+
+
+@dataclass(frozen=True)
+class CapacityRecommendation:
+    worker_config: WorkerConfig
+    knee: LoadPoint
+    replica_throughput_rps: float
+
+    def to_dict(self) -> dict:
+        return {
+            "worker_config": asdict(self.worker_config),
+            "knee": {
+                **asdict(self.knee),
+                "throughput_rps": self.knee.throughput_rps,
+                "cpu_utilization": self.knee.cpu_utilization,
+            },
+            "replica_throughput_rps": self.replica_throughput_rps,
+        }
+
+
+def recommend_worker_config(
+    points: Sequence[LoadPoint],
+    replica_cpus: int = 4,
+    latency_slo_ms: float | None = None,
+    max_latency_inflation: float = 2.0,
+    max_error_rate: float = 0.01,
+    min_throughput_gain: float = 0.1,
+    target_cpu_utilization: float = 0.8,
+) -> CapacityRecommendation:
+    """
+    Pick worker count and per-worker concurrency from a single-worker load curve.
+
+    :param points: Measurements of one worker at increasing concurrency
+    :param replica_cpus: vCPUs available to each replica
+    :param latency_slo_ms: p95 latency budget; levels above it are not used
+    :param max_latency_inflation: Without `latency_slo_ms`, the budget is this
+        multiple of the p95 latency at the lowest measured concurrency
+    :param max_error_rate: Levels with more errors than this are not used
+    :param min_throughput_gain: Stop raising concurrency once the next level
+        adds less than this fraction of throughput
+    :param target_cpu_utilization: Share of the replica's CPUs to plan for
+    :return: The recommended configuration and the measurements behind it
+    """
+    if not points:
+        raise ValueError("At least one load level is needed.")
+    if latency_slo_ms is None:
+        baseline = min(points, key=lambda point: point.concurrency)
+        latency_slo_ms = baseline.p95_ms * max_latency_inflation
+
+    usable = sorted(
+        (
+            point
+            for point in points
+            if point.error_rate <= max_error_rate and point.p95_ms <= latency_slo_ms
+        ),
+        key=lambda point: point.concurrency,
+    )
+    if not usable:
+        raise ValueError(
+            "No load level met the latency and error budgets; "
+            "relax them or measure lower concurrency."
+        )
+
+    knee = usable[0]
+    for point in usable[1:]:
+        if point.throughput_rps < knee.throughput_rps * (1 + min_throughput_gain):
+            break
+        knee = point
+
+    # An almost idle worker (all time spent waiting on the model) would give
+    # an unbounded worker count; past a few workers per CPU the memory of each
+    # process costs more than the extra concurrency is worth.
+    cpu_per_worker = max(knee.cpu_utilization, 0.05)
+    num_workers = math.floor(replica_cpus * target_cpu_utilization / cpu_per_worker)
+    num_workers = max(1, min(num_workers, 2 * replica_cpus))
+
+    return CapacityRecommendation(
+        worker_config=WorkerConfig(
+            num_workers=num_workers, per_worker_concurrency=knee.concurrency
+        ),
+        knee=knee,
+        replica_throughput_rps=num_workers * knee.throughput_rps,
+    )
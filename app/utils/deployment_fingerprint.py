@@ -0,0 +1,187 @@
+"""
+Content fingerprints for Agent Engine deployments.
+
+A deployment is described by a few independent components (the pickled agent,
+the shipped package directories, the requirements, the env vars and the display
+metadata). Each component is hashed separately so a redeploy can be skipped when
+nothing changed, or limited to the components that did.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from pydantic import BaseModel
+
+FINGERPRINT_VERSION = 1
+
+AGENT = "agent"
+PACKAGES = "packages"
+REQUIREMENTS = "requirements"
+ENV_VARS = "env_vars"
+METADATA = "metadata"
+
+# Files that never affect the deployed runtime.
+_IGNORED_DIRS = {"__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache"}
+_IGNORED_SUFFIXES = {".pyc", ".pyo"}
+_IGNORED_NAMES = {".DS_Store"}
+
+_AGENT_TREE_FIELDS = {"parent_agent", "sub_agents", "tools"}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _canonical_json(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _iter_package_files(path: Path) -> Iterable[Path]:
+    if path.is_file():
+        yield path
+        return
+    for file_path in sorted(path.rglob("*")):
+        if not file_path.is_file():
+            continue
+        if _IGNORED_DIRS.intersection(file_path.relative_to(path).parts):
+            continue
+        if file_path.suffix in _IGNORED_SUFFIXES or file_path.name in _IGNORED_NAMES:
+            continue
+        yield file_path
+
+
+def fingerprint_packages(extra_packages: Iterable[str]) -> str:
+    """Hash the contents and relative paths of every file in `extra_packages`."""
+    digest = hashlib.sha256()
+    for package in sorted(extra_packages):
+        package_path = Path(package)
+        if not package_path.exists():
+            # The SDK will reject the deployment; make sure it is never skipped.
+            digest.update(f"missing:{package}\n".encode())
+            continue
+        for file_path in _iter_package_files(package_path):
+            relative = file_path.relative_to(package_path.parent).as_posix()
+            digest.update(f"{relative}\0{_sha256(file_path.read_bytes())}\n".encode())
+    return digest.hexdigest()
+
+
+def _describe_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, BaseAgent):
+        return describe_agent(value)
+    if isinstance(value, BaseModel):
+        try:
+            return value.model_dump(mode="json", exclude_none=True)
+        except Exception:
+            return f"{type(value).__module__}.{type(value).__qualname__}"
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, Mapping):
+        return {str(key): _describe_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_describe_value(item) for item in value]
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    # Tool objects and other instances: identify by type and (if any) name.
+    name = getattr(value, "name", None)
+    type_name = f"{type(value).__module__}.{type(value).__qualname__}"
+    return f"{type_name}:{name}" if isinstance(name, str) else type_name
+
+
+def describe_agent(agent: BaseAgent) -> dict[str, Any]:
+    """Build a JSON-serialisable description of an agent tree.
+
+    Tool and callback implementations are identified by qualified name; their
+    code is covered by the package fingerprint.
+    """
+    description: dict[str, Any] = {
+        "type": f"{type(agent).__module__}.{type(agent).__qualname__}",
+    }
+    for field_name in type(agent).model_fields:
+        if field_name in _AGENT_TREE_FIELDS:
+            continue
+        description[field_name] = _describe_value(getattr(agent, field_name))
+    description["tools"] = [
+        _describe_value(tool) for tool in getattr(agent, "tools", None) or []
+    ]
+    description["sub_agents"] = [
+        describe_agent(sub_agent) for sub_agent in agent.sub_agents
+    ]
+    return description
+
+
+def compute_deployment_fingerprint(
+    *,
+    agent: BaseAgent,
+    extra_packages: list[str],
+    requirements: list[str],
+    env_vars: Mapping[str, str],
+    display_name: str,
+    description: str,
+    extra_agent_state: Mapping[str, Any] | None = None,
+) -> dict[str, str]:
+    """
+    Fingerprint each component of a deployment.
+
+    :param agent: The agent tree that gets pickled into the AgentEngineApp
+    :param extra_packages: Package directories/files shipped with the agent
+    :param requirements: The pip requirements lines
+    :param env_vars: Environment variables set on the deployed agent
+    :param display_name: The Agent Engine display name
+    :param description: The Agent Engine description
+    :param extra_agent_state: Other values baked into the pickled app (e.g. the
+        artifacts bucket name)
+    :return: A mapping of component name to hex digest
+    """
+    agent_description = {
+        "agent": describe_agent(agent),
+        "extra": _describe_value(dict(extra_agent_state or {})),
+    }
+    return {
+        AGENT: _sha256(_canonical_json(agent_description)),
+        PACKAGES: fingerprint_packages(extra_packages),
+        REQUIREMENTS: _sha256(_canonical_json(sorted(requirements))),
+        ENV_VARS: _sha256(_canonical_json(dict(env_vars))),
+        METADATA: _sha256(
+            _canonical_json({"display_name": display_name, "description": description})
+        ),
+    }
+
+
+def load_previous_fingerprint(
+    metadata_file: Path, resource_name: str
+) -> dict[str, str] | None:
+    """
+    Read the fingerprint recorded by the last deployment of `resource_name`.
+
+    :return: The stored fingerprint, or None if there is no usable record
+    """
+    if not metadata_file.exists():
+        return None
+    try:
+        metadata = json.loads(metadata_file.read_text())
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable deployment metadata {metadata_file}: {e}")
+        return None
+
+    if metadata.get("remote_agent_engine_id") != resource_name:
+        return None
+    if metadata.get("fingerprint_version") != FINGERPRINT_VERSION:
+        return None
+    fingerprint = metadata.get("fingerprint")
+    return fingerprint if isinstance(fingerprint, dict) else None
+
+
+def changed_components(
+    previous: Mapping[str, str] | None, current: Mapping[str, str]
+) -> set[str]:
+    """Return the components whose fingerprint differs (all of them if unknown)."""
+    if previous is None:
+        return set(current)
+    return {name for name, digest in current.items() if previous.get(name) != digest}
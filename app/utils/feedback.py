@@ -0,0 +1,188 @@
+"""
+Buffered, batched writing of user feedback.
+
+`AgentEngineApp.register_feedback` used to make a synchronous Cloud Logging call
+per feedback on the request path. Instead, feedback entries are put on a
+bounded in-memory queue and a background thread writes them to a sink in
+batches, flushing when a batch is full or a time threshold passes, and draining
+the queue on shutdown. Each writer registers its own `close` to run at exit.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+DEFAULT_MAX_QUEUE_SIZE = 10_000
+
+
+class FeedbackSink(Protocol):
+    """Where batches of feedback entries are written."""
+
+    def write_batch(self, entries: Sequence[dict[str, Any]]) -> None: ...
+
+
+class CloudLoggingSink:
+    """Writes each batch with a single Cloud Logging `entries.write` call."""
+
+    def __init__(self, logger: Any, severity: str = "INFO") -> None:
+        """
+        :param logger: A `google.cloud.logging.Logger`
+        :param severity: The severity of the written entries
+        """
+        self.logger = logger
+        self.severity = severity
+
+    def write_batch(self, entries: Sequence[dict[str, Any]]) -> None:
+        batch = self.logger.batch()
+        for entry in entries:
+            batch.log_struct(entry, severity=self.severity)
+        batch.commit()
+
+
+class JsonlFileSink:
+    """Appends entries to a local JSON Lines file (for local runs and tests)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write_batch(self, entries: Sequence[dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(lines)
+
+
+class BufferedFeedbackWriter:
+    """Queues feedback entries and writes them to a sink from a background thread."""
+
+    def __init__(
+        self,
+        sink: FeedbackSink,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+    ) -> None:
+        """
+        :param sink: Where batches are written
+        :param max_batch_size: Write as soon as this many entries are buffered
+        :param flush_interval_seconds: Write buffered entries at least this often
+        :param max_queue_size: Entries beyond this are dropped rather than
+            blocking the request path
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.sink = sink
+        self.max_batch_size = max_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max_queue_size)
+        # Guards `_closed` against concurrent submits, and the counters.
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="feedback-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry: dict[str, Any]) -> bool:
+        """
+        Queue an entry without blocking.
+
+        :return: False if the writer is closed or the queue is full and the
+            entry was dropped
+        """
+        with self._lock:
+            if self._closed.is_set():
+                logging.warning("Feedback writer is closed; dropping feedback.")
+                return False
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self.dropped += 1
+                logging.warning(
+                    f"Feedback queue is full ({self._queue.maxsize}); "
+                    "dropping feedback."
+                )
+                return False
+        return True
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until every entry submitted so far has been written (or failed)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """
+        Stop accepting entries and drain the queue.
+
+        Entries the writer thread left behind are written here, unless it is
+        still busy after `timeout` (e.g. on a hung sink).
+        """
+        with self._lock:
+            self._closed.set()
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.warning(
+                f"Feedback writer did not finish within {timeout}s; "
+                f"{self._queue.qsize()} entries were not written."
+            )
+            return
+        while batch := self._take(self.max_batch_size):
+            self._write(batch)
+
+    def _take(self, count: int) -> list[dict[str, Any]]:
+        """Up to `count` queued entries, without waiting."""
+        batch: list[dict[str, Any]] = []
+        while len(batch) < count:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _next_batch(self) -> list[dict[str, Any]]:
+        """Wait for entries until the batch is full or the interval elapses."""
+        batch: list[dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._closed.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            self.sink.write_batch(batch)
+            with self._lock:
+                self.written += len(batch)
+        except Exception as e:
+            logging.error(f"Failed to write {len(batch)} feedback entries: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
@@ -4,15 +4,21 @@ import google.cloud.storage as storage
 from google.api_core import exceptions
 
 
-def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -> None:
+def create_bucket_if_not_exists(
+    bucket_name: str,
+    project: str,
+    location: str,
+    storage_client: storage.Client | None = None,
+) -> None:
     """Creates a new bucket if it doesn't already exist.
 
     Args:
         bucket_name: Name of the bucket to create
         project: Google Cloud project ID
         location: Location to create the bucket in (defaults to us-central1)
+        storage_client: Client to use instead of creating a new one
     """
-    storage_client = storage.Client(project=project)
+    storage_client = storage_client or storage.Client(project=project)
 
     if bucket_name.startswith("gs://"):
         bucket_name = bucket_name[5:]
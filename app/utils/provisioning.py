@@ -0,0 +1,195 @@
+"""
+Cached, idempotent provisioning of deploy-time cloud resources.
+
+Buckets, service accounts and IAM bindings are created once and then almost
+never change, yet every deploy used to re-check them with fresh clients. The
+`Provisioner` records each resource it has confirmed in a small state file,
+keyed by project, location and resource, and skips the round trips on later
+runs unless asked to verify.
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+PROVISIONING_STATE_FILE = Path("logs") / "provisioning_state.json"
+
+# Resources that are not regional (service accounts, project IAM policy).
+GLOBAL_LOCATION = "global"
+
+
+def resource_key(project: str, location: str, kind: str, name: str) -> str:
+    """The cache key of a provisioned resource."""
+    return f"{project}/{location}/{kind}/{name}"
+
+
+class ProvisioningCache:
+    """A thread-safe, file-backed record of resources known to be provisioned."""
+
+    def __init__(self, path: Path | None = PROVISIONING_STATE_FILE) -> None:
+        """
+        :param path: The JSON state file, or None to keep the cache in memory
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: dict[str, dict[str, Any]] = self._load()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            records = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable provisioning state {self.path}: {e}")
+            return {}
+        return records if isinstance(records, dict) else {}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._records, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record is not None else None
+
+    def put(self, key: str, record: dict[str, Any]) -> None:
+        with self._lock:
+            verified_at = datetime.datetime.now(datetime.timezone.utc)
+            self._records[key] = {**record, "verified_at": verified_at.isoformat()}
+            self._save()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._records.pop(key, None) is not None:
+                self._save()
+
+
+class ProvisioningClients:
+    """
+    The GCP clients used for provisioning, created on first use and shared.
+
+    Pass client instances (or fakes exposing the same methods) to avoid real
+    API calls.
+    """
+
+    def __init__(
+        self,
+        storage_client: Any = None,
+        iam_client: Any = None,
+        projects_client: Any = None,
+    ) -> None:
+        self._clients: dict[str, Any] = {
+            "storage": storage_client,
+            "iam": iam_client,
+            "projects": projects_client,
+        }
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._clients[name] is None:
+                self._clients[name] = factory()
+            return self._clients[name]
+
+    def storage(self, project: str) -> Any:
+        def factory() -> Any:
+            from google.cloud import storage
+
+            return storage.Client(project=project)
+
+        return self._get("storage", factory)
+
+    def iam(self) -> Any:
+        def factory() -> Any:
+            from google.cloud.iam_admin_v1 import IAMClient
+
+            return IAMClient()
+
+        return self._get("iam", factory)
+
+    def projects(self) -> Any:
+        def factory() -> Any:
+            from google.cloud import resourcemanager_v3
+
+            return resourcemanager_v3.ProjectsClient()
+
+        return self._get("projects", factory)
+
+
+class Provisioner:
+    """Runs provisioning steps once per resource, remembering the outcome."""
+
+    def __init__(
+        self,
+        project: str,
+        cache: ProvisioningCache | None = None,
+        clients: ProvisioningClients | None = None,
+        verify: bool = False,
+    ) -> None:
+        """
+        :param project: The GCP project the resources belong to
+        :param cache: Where confirmed resources are recorded
+        :param clients: The clients passed to provisioning steps
+        :param verify: Re-check every resource even if it is cached
+        """
+        self.project = project
+        self.cache = cache if cache is not None else ProvisioningCache()
+        self.clients = clients if clients is not None else ProvisioningClients()
+        self.verify = verify
+        self.cache_hits = 0
+        self.checks = 0
+        self._lock = threading.Lock()
+        # Resources confirmed during this run are never re-checked, even in
+        # verify mode.
+        self._verified: set[str] = set()
+
+    def ensure(
+        self,
+        kind: str,
+        name: str,
+        provision: Callable[[], dict[str, Any]],
+        location: str = GLOBAL_LOCATION,
+        satisfied: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Return the record of a resource, provisioning it if needed.
+
+        :param kind: The resource type, e.g. "bucket"
+        :param name: The resource name
+        :param provision: Idempotently checks/creates the resource and returns
+            the record to cache
+        :param location: The resource location
+        :param satisfied: Whether a cached record still meets the request
+            (e.g. it grants every requested role); any record does by default
+        :return: The cached or freshly provisioned record
+        """
+        key = resource_key(self.project, location, kind, name)
+        record = self.cache.get(key)
+        usable = record is not None and (satisfied is None or satisfied(record))
+        with self._lock:
+            fresh = key in self._verified
+        if usable and (fresh or not self.verify):
+            with self._lock:
+                self.cache_hits += 1
+            return record
+
+        try:
+            record = provision()
+        except Exception:
+            self.cache.invalidate(key)
+            raise
+        self.cache.put(key, record)
+        with self._lock:
+            self.checks += 1
+            self._verified.add(key)
+        return record
@@ -0,0 +1,114 @@
+"""
+Keeping long conversations from growing the model request without bound.
+
+ADK sends the whole session history to the model on every turn, so each turn
+of a long session is slower and more expensive than the last. `HistoryCompactor`
+is a `before_model_callback` that keeps only the most recent turns of the
+request and, optionally, replaces the older ones with a short extractive
+summary. The session itself is not modified; only what is sent to the model.
+"""
+
+from dataclasses import dataclass
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+DEFAULT_MAX_HISTORY_CONTENTS = 40
+DEFAULT_SUMMARY_CHARS = 2000
+# How much of each omitted message the summary keeps.
+_SUMMARY_CHARS_PER_MESSAGE = 200
+
+SUMMARY_PREFIX = "Summary of earlier conversation (older turns omitted):"
+
+
+def _is_turn_start(content: types.Content) -> bool:
+    """A user message with text, i.e. not a function response."""
+    parts = content.parts or []
+    return (
+        content.role == "user"
+        and any(part.text for part in parts)
+        and not any(part.function_response for part in parts)
+    )
+
+
+def _summarize(contents: list[types.Content], max_chars: int) -> str:
+    lines = []
+    used = 0
+    for content in contents:
+        text = " ".join(part.text for part in content.parts or [] if part.text)
+        text = " ".join(text.split())
+        if not text:
+            continue
+        if len(text) > _SUMMARY_CHARS_PER_MESSAGE:
+            text = text[: _SUMMARY_CHARS_PER_MESSAGE - 1] + "…"
+        line = f"- {content.role}: {text}"
+        if used + len(line) > max_chars:
+            lines.append("- …")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join([SUMMARY_PREFIX, *lines])
+
+
+def compact_contents(
+    contents: list[types.Content],
+    max_contents: int,
+    summary_chars: int = 0,
+) -> list[types.Content]:
+    """
+    Keep roughly the last `max_contents` contents, cutting at a turn boundary.
+
+    The cut is moved forward to the next user message so that function calls
+    and their responses are never separated. Nothing is dropped when there is
+    no such boundary.
+
+    :param contents: The request contents, oldest first
+    :param max_contents: How many contents to keep at most
+    :param summary_chars: If positive, prepend a summary of the dropped
+        contents of at most about this many characters to the first kept
+        user message
+    :return: The compacted contents (the input list if nothing was dropped)
+    """
+    if len(contents) <= max_contents:
+        return contents
+    cut = next(
+        (
+            index
+            for index in range(len(contents) - max_contents, len(contents))
+            if _is_turn_start(contents[index])
+        ),
+        None,
+    )
+    if not cut:
+        return contents
+
+    kept = contents[cut:]
+    if summary_chars > 0:
+        # The summary goes into the first kept user turn rather than a turn of
+        # its own, so user and model turns still alternate. A new content is
+        # built: the kept one belongs to the session.
+        summary = _summarize(contents[:cut], summary_chars)
+        first = kept[0]
+        parts = [types.Part(text=summary), *(first.parts or [])]
+        kept = [types.Content(role=first.role, parts=parts), *kept[1:]]
+    return kept
+
+
+@dataclass(frozen=True)
+class HistoryCompactor:
+    """A `before_model_callback` that bounds the history sent to the model."""
+
+    max_contents: int = DEFAULT_MAX_HISTORY_CONTENTS
+    summary_chars: int = DEFAULT_SUMMARY_CHARS
+
+    def __call__(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        llm_request.contents = compact_contents(
+            llm_request.contents, self.max_contents, self.summary_chars
+        )
+        return None
+
+
+compact_history = HistoryCompactor()
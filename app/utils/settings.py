@@ -0,0 +1,49 @@
+"""
+Process-wide settings shared by the agents and the deployment tooling.
+
+The `.env` files are read once, the first time `get_settings()` is called,
+rather than as a side effect of importing an agent package.
+`AgentEngineApp.set_up` calls it first thing, so the variables are in the
+environment before the agents and their clients are set up.
+"""
+
+import functools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = APP_DIR.parent
+
+# (path, override) pairs, loaded in order. The RAG agent's own .env has always
+# overridden the process environment, so it keeps that precedence here.
+DOTENV_FILES: tuple[tuple[Path, bool], ...] = (
+    (PROJECT_ROOT / ".env", False),
+    (APP_DIR / ".env", False),
+    (APP_DIR / "agent" / "rag_agent" / ".env", True),
+)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Environment-derived configuration, resolved once per process."""
+
+    project_id: str | None
+    location: str | None
+    remote_mcp_server_url: str | None
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load the `.env` files and return the cached settings object."""
+    for dotenv_path, override in DOTENV_FILES:
+        if dotenv_path.exists():
+            load_dotenv(dotenv_path=dotenv_path, override=override)
+
+    return Settings(
+        project_id=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION"),
+        remote_mcp_server_url=os.environ.get("REMOTE_MCP_SERVER_URL"),
+    )
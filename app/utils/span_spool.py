@@ -0,0 +1,173 @@
+"""
+A local, append-only spool for telemetry that could not be exported.
+
+`CloudTraceLoggingSpanExporter` appends a record here when Cloud Logging or
+Cloud Trace fails or is too slow, and replays the records from a background
+thread once the backends respond again. Records are JSON lines in numbered
+segment files: the current segment is rotated when it reaches
+`max_segment_bytes`, and the oldest segments are deleted when the spool
+exceeds `max_total_bytes`, so an outage cannot fill the disk.
+
+Each worker process spools to a slot directory it holds a file lock on (see
+`SpanSpool.claim`). A restarted worker takes over a free slot, segments left
+there included, so nothing is stranded under a dead process's directory and
+the spools on disk stay as many as the workers running.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any
+
+DEFAULT_SPOOL_DIRECTORY = Path("/tmp") / "span-spool"
+DEFAULT_MAX_SEGMENT_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 256 * 1024 * 1024
+
+_SEGMENT_GLOB = "spool-*.jsonl"
+
+
+class SpanSpool:
+    """Append-only, size-capped JSON Lines spool with segment rotation."""
+
+    def __init__(
+        self,
+        directory: str | Path = DEFAULT_SPOOL_DIRECTORY,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+    ) -> None:
+        """
+        :param directory: Where segment files are kept; segments left by an
+            earlier process are replayed too
+        :param max_segment_bytes: Start a new segment beyond this size
+        :param max_total_bytes: Delete the oldest segments beyond this size
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self.segments_dropped = 0
+        self._lock = threading.Lock()
+        segments = self._segments()
+        self._next_number = self._number(segments[-1]) + 1 if segments else 0
+        self._current: Path | None = None
+        self._slot_lock: IO[str] | None = None
+
+    @classmethod
+    def claim(
+        cls, root: str | Path = DEFAULT_SPOOL_DIRECTORY, **kwargs: Any
+    ) -> "SpanSpool":
+        """
+        A spool in the first slot under `root` no other process holds.
+
+        Slots are `worker-0`, `worker-1`, ..., each held with an exclusive
+        `flock` on its lock file until `release` or the end of the process.
+
+        :param root: The directory of the slots
+        :param kwargs: Passed to `SpanSpool`
+        :return: The spool of the claimed slot
+        """
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        slot = 0
+        while True:
+            lock_file = (root / f"worker-{slot}.lock").open("a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+                continue
+            spool = cls(root / f"worker-{slot}", **kwargs)
+            spool._slot_lock = lock_file
+            return spool
+
+    def release(self) -> None:
+        """Let another process claim this spool's slot."""
+        if self._slot_lock is not None:
+            self._slot_lock.close()
+            self._slot_lock = None
+
+    @staticmethod
+    def _number(segment: Path) -> int:
+        return int(segment.stem.removeprefix("spool-"))
+
+    def _segments(self) -> list[Path]:
+        return sorted(self.directory.glob(_SEGMENT_GLOB), key=self._number)
+
+    def _new_segment(self) -> Path:
+        segment = self.directory / f"spool-{self._next_number:08d}.jsonl"
+        self._next_number += 1
+        return segment
+
+    def append(self, record: dict[str, Any]) -> None:
+        """
+        Append a record, rotating and trimming segments as needed.
+
+        :param record: A JSON-serializable record
+        """
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._current is None or (
+                self._current.exists()
+                and self._current.stat().st_size >= self.max_segment_bytes
+            ):
+                self._current = self._new_segment()
+            with self._current.open("a") as f:
+                f.write(line)
+            self._trim()
+
+    def _trim(self) -> None:
+        """Delete the oldest segments beyond the size cap; the lock is held."""
+        segments = self._segments()
+        sizes = [segment.stat().st_size for segment in segments]
+        total = sum(sizes)
+        for segment, size in zip(segments[:-1], sizes, strict=False):
+            if total <= self.max_total_bytes:
+                break
+            segment.unlink(missing_ok=True)
+            total -= size
+            self.segments_dropped += 1
+            logging.warning(f"Span spool over its size cap, dropped {segment.name}")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._segments()
+
+    def oldest_segment(self) -> Path | None:
+        """
+        The oldest segment to replay, sealing the current one if need be.
+
+        Appends after this go to a new segment, so the returned one is only
+        changed by `rewrite` and `remove`.
+        """
+        with self._lock:
+            segments = self._segments()
+            if not segments:
+                return None
+            if segments[0] == self._current:
+                self._current = None
+            return segments[0]
+
+    def read(self, segment: Path) -> list[dict[str, Any]]:
+        """The records of a segment; a torn last line is skipped."""
+        records = []
+        for line in segment.read_text().splitlines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping a corrupt record in {segment.name}")
+        return records
+
+    def rewrite(self, segment: Path, records: list[dict[str, Any]]) -> None:
+        """Replace a segment with the records still to be replayed."""
+        temporary = segment.with_suffix(".tmp")
+        temporary.write_text(
+            "".join(json.dumps(record, default=str) + "\n" for record in records)
+        )
+        os.replace(temporary, segment)
+
+    def remove(self, segment: Path) -> None:
+        segment.unlink(missing_ok=True)
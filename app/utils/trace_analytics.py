@@ -0,0 +1,187 @@
+"""
+A span exporter that writes columnar Parquet files for offline analysis.
+
+An alternative to `CloudTraceLoggingSpanExporter` for latency investigations:
+spans become rows of a flat table (one column per field we break latency down
+by) in Parquet files partitioned by the hour the span started, e.g.
+`logs/spans/date=2025-01-31/hour=14/part-1234-000001.parquet`. The files can
+be scanned with `app.utils.trace_queries` or any Arrow-based tool.
+
+pyarrow is imported when the exporter is created; it is installed with
+langchain-google-vertexai.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import format_span_id, format_trace_id
+
+DEFAULT_ANALYTICS_DIRECTORY = Path("logs") / "spans"
+DEFAULT_MAX_ROWS_PER_FILE = 100_000
+DEFAULT_MAX_FILE_AGE_SECONDS = 60.0
+
+# Span name prefixes of the ADK runtime, and the category they are counted in.
+_CATEGORIES = (
+    ("invocation", "invocation"),
+    ("agent_run [", "agent"),
+    ("call_llm", "llm"),
+    ("execute_tool", "tool"),
+)
+
+
+def span_schema() -> Any:
+    """The Arrow schema of the span files."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("trace_id", pa.string()),
+            ("span_id", pa.string()),
+            ("parent_span_id", pa.string()),
+            ("name", pa.string()),
+            ("category", pa.string()),
+            ("agent_name", pa.string()),
+            ("tool_name", pa.string()),
+            ("model", pa.string()),
+            ("status_code", pa.string()),
+            ("start_time", pa.timestamp("us", tz="UTC")),
+            ("duration_ms", pa.float64()),
+            ("input_tokens", pa.int64()),
+            ("output_tokens", pa.int64()),
+            ("invocation_id", pa.string()),
+            ("session_id", pa.string()),
+            ("service_name", pa.string()),
+        ]
+    )
+
+
+def span_category(name: str) -> str:
+    for prefix, category in _CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return "other"
+
+
+def span_row(span: ReadableSpan, service_name: str) -> dict[str, Any]:
+    """
+    Flatten a span into a row of `span_schema`.
+
+    :param span: A finished span
+    :param service_name: Recorded in the `service_name` column
+    :return: The row
+    """
+    attributes = span.attributes or {}
+    name = span.name
+    category = span_category(name)
+    start_ns = span.start_time or 0
+    end_ns = span.end_time or start_ns
+    return {
+        "trace_id": format_trace_id(span.context.trace_id),
+        "span_id": format_span_id(span.context.span_id),
+        "parent_span_id": format_span_id(span.parent.span_id) if span.parent else None,
+        "name": name,
+        "category": category,
+        "agent_name": name[len("agent_run [") : -1] if category == "agent" else None,
+        "tool_name": (
+            attributes.get("gen_ai.tool.name", name.removeprefix("execute_tool "))
+            if category == "tool"
+            else None
+        ),
+        "model": attributes.get("gen_ai.request.model"),
+        "status_code": span.status.status_code.name,
+        "start_time": datetime.fromtimestamp(start_ns / 1e9, tz=timezone.utc),
+        "duration_ms": (end_ns - start_ns) / 1e6,
+        "input_tokens": attributes.get("gen_ai.usage.input_tokens"),
+        "output_tokens": attributes.get("gen_ai.usage.output_tokens"),
+        "invocation_id": attributes.get("gcp.vertex.agent.invocation_id"),
+        "session_id": attributes.get("gcp.vertex.agent.session_id"),
+        "service_name": service_name,
+    }
+
+
+class ParquetSpanExporter(SpanExporter):
+    """Buffers span rows and writes them to hourly-partitioned Parquet files."""
+
+    def __init__(
+        self,
+        directory: str | Path = DEFAULT_ANALYTICS_DIRECTORY,
+        service_name: str = "adk-agent",
+        max_rows_per_file: int = DEFAULT_MAX_ROWS_PER_FILE,
+        max_file_age_seconds: float = DEFAULT_MAX_FILE_AGE_SECONDS,
+    ) -> None:
+        """
+        :param directory: The root of the partitioned files
+        :param service_name: Recorded in the `service_name` column
+        :param max_rows_per_file: Write a file once this many rows are buffered
+        :param max_file_age_seconds: Write buffered rows at least this often
+            (checked on export)
+        """
+        import pyarrow  # noqa: F401  (fail early if it is not installed)
+
+        self.directory = Path(directory)
+        self.service_name = service_name
+        self.max_rows_per_file = max_rows_per_file
+        self.max_file_age_seconds = max_file_age_seconds
+        self._lock = threading.Lock()
+        self._rows: list[dict[str, Any]] = []
+        self._buffered_since = time.monotonic()
+        self._files_written = 0
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        rows = [span_row(span, self.service_name) for span in spans if span.context]
+        with self._lock:
+            if not self._rows:
+                self._buffered_since = time.monotonic()
+            self._rows.extend(rows)
+            if (
+                len(self._rows) < self.max_rows_per_file
+                and time.monotonic() - self._buffered_since < self.max_file_age_seconds
+            ):
+                return SpanExportResult.SUCCESS
+            rows, self._rows = self._rows, []
+        try:
+            self._write(rows)
+        except Exception:
+            logging.exception(f"Failed to write {len(rows)} spans to Parquet")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if rows:
+            self._write(rows)
+        return True
+
+    def shutdown(self) -> None:
+        self.force_flush()
+
+    def _write(self, rows: list[dict[str, Any]]) -> None:
+        """Write rows to one file per hour partition they fall in."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partitions: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for row in rows:
+            start = row["start_time"]
+            key = (start.strftime("%Y-%m-%d"), start.strftime("%H"))
+            partitions.setdefault(key, []).append(row)
+
+        schema = span_schema()
+        for (date, hour), partition_rows in partitions.items():
+            directory = self.directory / f"date={date}" / f"hour={hour}"
+            directory.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._files_written += 1
+                number = self._files_written
+            path = directory / f"part-{os.getpid()}-{number:06d}.parquet"
+            table = pa.Table.from_pylist(partition_rows, schema=schema)
+            pq.write_table(table, path, compression="zstd")
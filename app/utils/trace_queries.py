@@ -0,0 +1,192 @@
+"""
+Latency breakdowns over the span files written by `ParquetSpanExporter`.
+
+All computation is vectorized Arrow (dataset scans with partition pruning,
+hash joins and grouped t-digest percentiles), so millions of spans can be
+analyzed locally.
+
+Usage:
+    uv run python -m app.utils.trace_queries logs/spans --by tool
+    uv run python -m app.utils.trace_queries --by agent --since 2025-01-31T09:00
+"""
+
+import argparse
+import functools
+import operator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# What each breakdown groups by, and which spans it looks at.
+BREAKDOWNS = {
+    "agent": (["agent_name"], "agent"),
+    "tool": (["agent_name", "tool_name"], "tool"),
+    "llm": (["agent_name", "model"], "llm"),
+    "invocation": (["service_name"], "invocation"),
+}
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# Agent spans are attributed up to this many levels above a span.
+_MAX_ATTRIBUTION_DEPTH = 16
+
+
+def _utc(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def load_spans(
+    directory: str | Path,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> pa.Table:
+    """
+    Read the spans that started in [since, until).
+
+    Date partitions outside the range are not read. Naive datetimes are taken
+    as UTC.
+
+    :param directory: The root of the partitioned span files
+    :param since: The earliest start time to include
+    :param until: The start time to stop at
+    :return: The spans
+    """
+    partitioning = ds.partitioning(
+        pa.schema([("date", pa.string()), ("hour", pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(directory, format="parquet", partitioning=partitioning)
+    start_time = ds.field("start_time")
+    clauses = []
+    if since is not None:
+        since = _utc(since)
+        clauses.append(ds.field("date") >= since.strftime("%Y-%m-%d"))
+        clauses.append(start_time >= pa.scalar(since, _TIMESTAMP))
+    if until is not None:
+        until = _utc(until)
+        clauses.append(ds.field("date") <= until.strftime("%Y-%m-%d"))
+        clauses.append(start_time < pa.scalar(until, _TIMESTAMP))
+    condition = functools.reduce(operator.and_, clauses) if clauses else None
+    return dataset.to_table(filter=condition).drop_columns(["date", "hour"])
+
+
+def attribute_agents(spans: pa.Table, ancestors: pa.Table | None = None) -> pa.Table:
+    """
+    Fill `agent_name` of every span with its nearest enclosing agent span.
+
+    :param spans: Spans as read by `load_spans`
+    :param ancestors: The spans to look for ancestors in, if `spans` is only a
+        subset of them
+    :return: The spans with `agent_name` set where an ancestor is an agent
+    """
+    columns = ["trace_id", "span_id", "parent_span_id", "agent_name"]
+    links = (spans if ancestors is None else ancestors).select(columns)
+    resolved = spans.select(columns)
+    for _ in range(_MAX_ATTRIBUTION_DEPTH):
+        missing = pc.and_(
+            pc.is_null(resolved["agent_name"]), pc.is_valid(resolved["parent_span_id"])
+        )
+        if not pc.any(missing).as_py():
+            break
+        # Step one level up: take the parent's agent name, or its parent.
+        parents = links.rename_columns(
+            ["trace_id", "parent_span_id", "grandparent_span_id", "parent_agent_name"]
+        )
+        joined = resolved.join(
+            parents, keys=["trace_id", "parent_span_id"], join_type="left outer"
+        )
+        agent = pc.coalesce(joined["agent_name"], joined["parent_agent_name"])
+        parent = pc.if_else(
+            pc.is_null(joined["agent_name"]),
+            joined["grandparent_span_id"],
+            joined["parent_span_id"],
+        )
+        resolved = pa.table(
+            {
+                "trace_id": joined["trace_id"],
+                "span_id": joined["span_id"],
+                "parent_span_id": parent,
+                "agent_name": agent,
+            }
+        )
+    names = spans.select(["trace_id", "span_id"]).join(
+        resolved.select(["trace_id", "span_id", "agent_name"]),
+        keys=["trace_id", "span_id"],
+        join_type="left outer",
+    )
+    return spans.drop_columns(["agent_name"]).join(
+        names, keys=["trace_id", "span_id"], join_type="left outer"
+    )
+
+
+def latency_breakdown(
+    spans: pa.Table, by: str = "tool", percentiles: tuple[float, ...] = PERCENTILES
+) -> pa.Table:
+    """
+    Count, total and percentile latencies per group, slowest total first.
+
+    :param spans: Spans as read by `load_spans`
+    :param by: One of `BREAKDOWNS`
+    :param percentiles: The latency percentiles to compute
+    :return: One row per group
+    """
+    keys, category = BREAKDOWNS[by]
+    selected = spans.filter(pc.equal(spans["category"], category))
+    if "agent_name" in keys and category != "agent":
+        selected = attribute_agents(selected, ancestors=spans)
+    grouped = selected.group_by(keys).aggregate(
+        [
+            ("duration_ms", "count"),
+            ("duration_ms", "sum"),
+            ("duration_ms", "mean"),
+            ("duration_ms", "tdigest", pc.TDigestOptions(q=list(percentiles))),
+            ("duration_ms", "max"),
+        ]
+    )
+    digest = grouped["duration_ms_tdigest"]
+    columns: dict[str, Any] = {key: grouped[key] for key in keys}
+    columns["count"] = grouped["duration_ms_count"]
+    columns["total_ms"] = grouped["duration_ms_sum"]
+    columns["mean_ms"] = grouped["duration_ms_mean"]
+    for index, q in enumerate(percentiles):
+        columns[f"p{round(q * 100)}_ms"] = pc.list_element(digest, index)
+    columns["max_ms"] = grouped["duration_ms_max"]
+    return pa.table(columns).sort_by([("total_ms", "descending")])
+
+
+def _format(table: pa.Table) -> str:
+    headers = table.column_names
+    rows = [
+        [f"{value:.1f}" if isinstance(value, float) else str(value) for value in row]
+        for row in zip(*(table[name].to_pylist() for name in headers), strict=True)
+    ]
+    widths = [
+        max([len(header), *(len(row[i]) for row in rows)])
+        for i, header in enumerate(headers)
+    ]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths, strict=True))
+        for row in [headers, *rows]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", nargs="?", default="logs/spans")
+    parser.add_argument("--by", choices=sorted(BREAKDOWNS), default="tool")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    spans = load_spans(args.directory, since=args.since, until=args.until)
+    print(f"{spans.num_rows} spans")
+    print(_format(latency_breakdown(spans, by=args.by)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Sampling configuration for the Agent Engine tracing pipeline.
+
+Exporting every span (Cloud Trace, Cloud Logging and GCS payloads) costs more
+than the agent calls being traced, so `AgentEngineApp` only exports some
+traces. Every span is recorded in memory; when the local root span of a trace
+ends, `app.utils.tracing.SamplingSpanProcessor` exports the whole trace if:
+
+- its trace id falls within the head sampling ratio (the highest ratio among
+  matching per-operation overrides, if any), or
+- it is slow: at or above `slow_threshold_ms`, or among the slowest
+  `1 - slow_percentile` of recent traces, or
+- one of its spans has an error status (`keep_errors`).
+
+This module only holds the configuration, so that it can be pickled with the
+app without importing the OpenTelemetry SDK.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+DEFAULT_HEAD_SAMPLING_RATIO = 0.001
+DEFAULT_SLOW_PERCENTILE = 0.99
+DEFAULT_SLOW_WINDOW = 1000
+DEFAULT_MAX_BUFFERED_SPANS = 10_000
+
+
+@dataclass(frozen=True)
+class TraceSamplingConfig:
+    """Which traces `SamplingSpanProcessor` exports."""
+
+    head_ratio: float = DEFAULT_HEAD_SAMPLING_RATIO
+    # Head sampling ratios by span name prefix, e.g. {"execute_tool rag_query":
+    # 0.1}. A trace uses the highest ratio among the prefixes its spans match.
+    operation_ratios: Mapping[str, float] = field(default_factory=dict)
+    slow_threshold_ms: float | None = None
+    # Keep traces at or above this percentile of the last `slow_window` root
+    # span durations. None disables the adaptive threshold.
+    slow_percentile: float | None = DEFAULT_SLOW_PERCENTILE
+    slow_window: int = DEFAULT_SLOW_WINDOW
+    keep_errors: bool = True
+    # Spans of traces still in progress held in memory; the oldest traces are
+    # dropped beyond this.
+    max_buffered_spans: int = DEFAULT_MAX_BUFFERED_SPANS
+
+    def __post_init__(self) -> None:
+        ratios = [self.head_ratio, *self.operation_ratios.values()]
+        if any(not 0.0 <= ratio <= 1.0 for ratio in ratios):
+            raise ValueError("Sampling ratios must be between 0 and 1.")
+        if self.slow_percentile is not None and not 0 < self.slow_percentile < 1:
+            raise ValueError("slow_percentile must be between 0 and 1.")
+
+    def head_ratio_for(self, span_names: list[str]) -> float:
+        """The head sampling ratio of a trace with spans named `span_names`."""
+        matching = [
+            ratio
+            for prefix, ratio in self.operation_ratios.items()
+            if any(name.startswith(prefix) for name in span_names)
+        ]
+        return max(matching) if matching else self.head_ratio
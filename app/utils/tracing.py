@@ -1,13 +1,135 @@
+import base64
+import bisect
+import gzip
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
 from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
 from typing import Any
 
 import google.cloud.storage as storage
+from google.api_core.retry import if_transient_error
 from google.cloud import logging as google_cloud_logging
+from google.cloud.trace_v2 import BatchWriteSpansRequest
+from google.cloud.trace_v2 import types as trace_types
+from opentelemetry import context as otel_context
+from opentelemetry import trace
 from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
-from opentelemetry.sdk.trace import ReadableSpan
-from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExportResult,
+)
+from opentelemetry.sdk.util import ns_to_iso_str
+from opentelemetry.trace import (
+    SpanContext,
+    StatusCode,
+    format_span_id,
+    format_trace_id,
+)
+
+from app.utils.span_spool import DEFAULT_SPOOL_DIRECTORY, SpanSpool
+from app.utils.trace_sampling import TraceSamplingConfig
+
+DEFAULT_LOG_BATCH_SIZE = 500
+DEFAULT_LOG_FLUSH_INTERVAL_SECONDS = 0.0
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_MAX_PENDING_UPLOADS = 64
+DEFAULT_UPLOAD_MAX_ATTEMPTS = 4
+DEFAULT_UPLOAD_INITIAL_BACKOFF_SECONDS = 0.5
+DEFAULT_EXPORT_DEADLINE_SECONDS = 5.0
+DEFAULT_REPLAY_INTERVAL_SECONDS = 30.0
+# How long a missing payload bucket is remembered before it is checked again.
+_BUCKET_RECHECK_SECONDS = 300.0
+# Cloud Logging rejects `entries.write` requests larger than 10 MB.
+_MAX_LOG_WRITE_BYTES = 9 * 1024 * 1024
+# Cloud Logging rejects entries larger than 256 KB; the rest is headroom for
+# the labels and entry metadata.
+_MAX_LOG_ENTRY_BYTES = 250 * 1024
+# Estimated size of a number, boolean or null.
+_SCALAR_JSON_SIZE = 24
+# Root span durations needed before the adaptive slow threshold applies.
+_MIN_SLOW_SAMPLES = 100
+# Decisions remembered for spans that end after their local root.
+_MAX_REMEMBERED_DECISIONS = 10_000
+_TRACE_ID_LIMIT = 1 << 64
+
+# OpenTelemetry's global tracer provider can only be set once per process, so
+# `set_up_sampled_tracing` builds its exporter once and returns the same
+# provider on later calls (e.g. from the `set_up` of cloned apps).
+_installed_provider: TracerProvider | None = None
+_install_lock = threading.Lock()
+
+
+def _estimate_json_size(value: Any) -> int:
+    """
+    Estimate the size of `value` once serialized, without serializing it.
+
+    Strings count their UTF-8 length, so the estimate is close to what Cloud
+    Logging measures rather than to escaped JSON.
+
+    :param value: A JSON-compatible value
+    :return: The estimated size in bytes
+    """
+    if isinstance(value, str):
+        size = len(value) if value.isascii() else len(value.encode())
+        return size + 2
+    if isinstance(value, dict):
+        return 2 + sum(
+            len(key) + 4 + _estimate_json_size(item) for key, item in value.items()
+        )
+    if isinstance(value, list | tuple):
+        return 2 + sum(_estimate_json_size(item) + 1 for item in value)
+    return _SCALAR_JSON_SIZE
+
+
+def _format_context(context: SpanContext) -> dict[str, str]:
+    return {
+        "trace_id": f"0x{format_trace_id(context.trace_id)}",
+        "span_id": f"0x{format_span_id(context.span_id)}",
+        "trace_state": repr(context.trace_state),
+    }
+
+
+def _format_attributes(attributes: Any) -> dict[str, Any]:
+    """Copy span attributes into a dict, with sequences as lists."""
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in (attributes or {}).items()
+    }
+
+
+@dataclass
+class _Delivery:
+    """Cloud Logging batches and Cloud Trace spans still to be written."""
+
+    log_batches: list[list[dict]] = field(default_factory=list)
+    trace_spans: list[trace_types.Span] = field(default_factory=list)
+
+    def to_record(self) -> dict[str, Any]:
+        return {
+            "log_batches": self.log_batches,
+            "trace_spans": [
+                base64.b64encode(trace_types.Span.serialize(span)).decode()
+                for span in self.trace_spans
+            ],
+        }
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "_Delivery":
+        return cls(
+            log_batches=record.get("log_batches", []),
+            trace_spans=[
+                trace_types.Span.deserialize(base64.b64decode(span))
+                for span in record.get("trace_spans", [])
+            ],
+        )
 
 
 class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
@@ -26,17 +148,48 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         bucket_name: str | None = None,
         service_name: str = "adk-agent",
         debug: bool = False,
+        log_batch_size: int = DEFAULT_LOG_BATCH_SIZE,
+        log_flush_interval_seconds: float = DEFAULT_LOG_FLUSH_INTERVAL_SECONDS,
+        upload_workers: int = DEFAULT_UPLOAD_WORKERS,
+        max_pending_uploads: int = DEFAULT_MAX_PENDING_UPLOADS,
+        upload_max_attempts: int = DEFAULT_UPLOAD_MAX_ATTEMPTS,
+        upload_initial_backoff_seconds: float = DEFAULT_UPLOAD_INITIAL_BACKOFF_SECONDS,
+        spool: SpanSpool | None = None,
+        export_deadline_seconds: float = DEFAULT_EXPORT_DEADLINE_SECONDS,
+        replay_interval_seconds: float = DEFAULT_REPLAY_INTERVAL_SECONDS,
         **kwargs: Any,
     ) -> None:
         """
         Initialize the exporter with Google Cloud clients and configuration.
 
+        Span log entries are written with one Cloud Logging request per batch
+        rather than one per span.
+
         :param logging_client: Google Cloud Logging client
         :param storage_client: Google Cloud Storage client
         :param bucket_name: Name of the GCS bucket to store large payloads
         :param debug: Enable debug mode for additional logging
+        :param log_batch_size: Maximum number of log entries per write request
+        :param log_flush_interval_seconds: How long entries may be buffered
+            across `export` calls before they are written. With 0, every export
+            is written before it returns; a positive value helps with
+            `SimpleSpanProcessor`, which exports one span at a time
+        :param upload_workers: Threads uploading offloaded payloads to GCS
+        :param max_pending_uploads: Payloads beyond this many queued or in
+            flight uploads are dropped rather than stalling the export
+        :param upload_max_attempts: Attempts per upload on transient errors
+        :param upload_initial_backoff_seconds: Delay before the first retry,
+            doubled on each further retry
+        :param spool: Where exports go when Cloud Logging or Cloud Trace fails
+            or misses the deadline; they are replayed in the background. Without
+            a spool, failed writes are logged and dropped
+        :param export_deadline_seconds: With a spool, the longest `export`
+            waits for the backends before spooling instead
+        :param replay_interval_seconds: How often the spool is replayed
         :param kwargs: Additional arguments to pass to the parent class
         """
+        if log_batch_size < 1:
+            raise ValueError("log_batch_size must be at least 1.")
         super().__init__(**kwargs)
         self.debug = debug
         self.service_name = service_name
@@ -47,6 +200,48 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         self.storage_client = storage_client or storage.Client(project=self.project_id)
         self.bucket_name = bucket_name or f"{self.project_id}-agent-logs-data"
         self.bucket = self.storage_client.bucket(self.bucket_name)
+        self.log_batch_size = log_batch_size
+        self.log_flush_interval_seconds = log_flush_interval_seconds
+        self._log_lock = threading.Lock()
+        self._pending_entries: list[dict] = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._flush_timer: threading.Timer | None = None
+        self._resource: Resource | None = None
+        self._resource_dict: dict[str, Any] = {}
+
+        # Payloads are gzipped and uploaded off the export thread.
+        self.max_pending_uploads = max_pending_uploads
+        self.upload_max_attempts = upload_max_attempts
+        self.upload_initial_backoff_seconds = upload_initial_backoff_seconds
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=upload_workers, thread_name_prefix="span-payload-upload"
+        )
+        self._upload_lock = threading.Condition()
+        self._pending_uploads = 0
+        self.uploads_dropped = 0
+        self.uploads_failed = 0
+        self._bucket_exists = False
+        self._bucket_checked_at: float | None = None
+
+        # With a spool, writes run on a sender thread that export waits on for
+        # at most the deadline; while the backends are failing, exports go
+        # straight to the spool and a replay thread drains it.
+        self.spool = spool
+        self.export_deadline_seconds = export_deadline_seconds
+        self.replay_interval_seconds = replay_interval_seconds
+        self._backends_available = True
+        self._stop_replay = threading.Event()
+        self._sender: ThreadPoolExecutor | None = None
+        self._replay_thread: threading.Thread | None = None
+        if spool is not None:
+            self._sender = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="span-export-sender"
+            )
+            self._replay_thread = threading.Thread(
+                target=self._replay_loop, name="span-spool-replay", daemon=True
+            )
+            self._replay_thread.start()
 
     def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
         """
@@ -55,13 +250,14 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         :param spans: A sequence of spans to export
         :return: The result of the export operation
         """
+        entries = []
         for span in spans:
             span_context = span.get_span_context()
             if span_context is None:
                 continue
             trace_id = format(span_context.trace_id, "x")
             span_id = format(span_context.span_id, "x")
-            span_dict = json.loads(span.to_json())
+            span_dict = self._span_to_dict(span)
 
             span_dict["trace"] = f"projects/{self.project_id}/traces/{trace_id}"
             span_dict["span_id"] = span_id
@@ -73,67 +269,559 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
             if self.debug:
                 print(span_dict)
 
-            # Log the span data to Google Cloud Logging
-            self.logger.log_struct(
-                span_dict,
+            entries.append((span_dict, _estimate_json_size(span_dict)))
+
+        # Log the span data to Google Cloud Logging and export the spans to
+        # Google Cloud Trace
+        return self._send(self._buffer_log_entries(entries), spans)
+
+    @property
+    def upload_queue_depth(self) -> int:
+        """Payload uploads queued or in flight."""
+        return self._pending_uploads
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Write any buffered span log entries and wait for payload uploads."""
+        self._flush_log_entries()
+        with self._upload_lock:
+            return self._upload_lock.wait_for(
+                lambda: self._pending_uploads == 0, timeout=timeout_millis / 1000
+            )
+
+    def shutdown(self) -> None:
+        """Write any buffered span log entries and finish payload uploads."""
+        with self._log_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self._flush_log_entries()
+        self._upload_pool.shutdown(wait=True)
+        self._stop_replay.set()
+        if self._sender is not None:
+            self._sender.shutdown(wait=False)
+        super().shutdown()
+
+    def _span_to_dict(self, span: ReadableSpan) -> dict[str, Any]:
+        """
+        Build the log entry of a span from its fields.
+
+        The result has the same shape as `json.loads(span.to_json())`, without
+        serializing the span to a string and parsing it back.
+
+        :param span: The span to convert
+        :return: The span data dictionary
+        """
+        if span.resource is not self._resource:
+            # Spans from one tracer provider share a resource.
+            self._resource = span.resource
+            self._resource_dict = json.loads(span.resource.to_json())
+
+        status = {"status_code": span.status.status_code.name}
+        if span.status.description:
+            status["description"] = span.status.description
+
+        return {
+            "name": span.name,
+            "context": _format_context(span.context) if span.context else None,
+            "kind": str(span.kind),
+            "parent_id": (
+                f"0x{format_span_id(span.parent.span_id)}" if span.parent else None
+            ),
+            "start_time": ns_to_iso_str(span.start_time) if span.start_time else None,
+            "end_time": ns_to_iso_str(span.end_time) if span.end_time else None,
+            "status": status,
+            "attributes": _format_attributes(span.attributes),
+            "events": [
+                {
+                    "name": event.name,
+                    "timestamp": ns_to_iso_str(event.timestamp),
+                    "attributes": _format_attributes(event.attributes),
+                }
+                for event in span.events
+            ],
+            "links": [
+                {
+                    "context": _format_context(link.context),
+                    "attributes": _format_attributes(link.attributes),
+                }
+                for link in span.links
+            ],
+            "resource": self._resource_dict,
+        }
+
+    def _buffer_log_entries(self, entries: list[tuple[dict, int]]) -> list[list[dict]]:
+        """
+        Add entries to the pending batch, taking out the batches that are full.
+
+        :param entries: The span log entries of one export, with their
+            estimated sizes
+        :return: The batches to write now
+        """
+        batches = []
+        with self._log_lock:
+            for entry, size in entries:
+                if self._pending_entries and (
+                    len(self._pending_entries) >= self.log_batch_size
+                    or self._pending_bytes + size > _MAX_LOG_WRITE_BYTES
+                ):
+                    batches.append(self._take_pending())
+                if not self._pending_entries:
+                    self._pending_since = time.monotonic()
+                self._pending_entries.append(entry)
+                self._pending_bytes += size
+
+            if self._pending_entries and (
+                len(self._pending_entries) >= self.log_batch_size
+                or time.monotonic() - self._pending_since
+                >= self.log_flush_interval_seconds
+            ):
+                batches.append(self._take_pending())
+            elif self._pending_entries and self._flush_timer is None:
+                # Make sure a quiet period does not leave entries unwritten.
+                self._flush_timer = threading.Timer(
+                    self.log_flush_interval_seconds, self._flush_log_entries
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return batches
+
+    def _take_pending(self) -> list[dict]:
+        """Remove and return the pending entries; the caller holds the lock."""
+        batch = self._pending_entries
+        self._pending_entries = []
+        self._pending_bytes = 0
+        return batch
+
+    def _flush_log_entries(self) -> None:
+        with self._log_lock:
+            self._flush_timer = None
+            batch = self._take_pending()
+        if batch:
+            self._send([batch], [])
+
+    def _send(
+        self, log_batches: list[list[dict]], spans: Sequence[ReadableSpan]
+    ) -> SpanExportResult:
+        """
+        Write log batches and spans, spooling them if the backends are failing.
+
+        :param log_batches: Cloud Logging batches to write
+        :param spans: Spans to export to Cloud Trace
+        :return: The result of the export
+        """
+        if self.spool is None:
+            for batch in log_batches:
+                try:
+                    self._write_log_batch(batch)
+                except Exception:
+                    # Do not also fail the Cloud Trace export.
+                    logging.exception(f"Failed to write {len(batch)} span log entries")
+            # Export spans to Google Cloud Trace using the parent class method
+            return super().export(spans) if spans else SpanExportResult.SUCCESS
+
+        delivery = _Delivery(log_batches, self._translate_to_cloud_trace(spans))
+        if not self._backends_available:
+            self.spool.append(delivery.to_record())
+            return SpanExportResult.SUCCESS
+        future = self._sender.submit(self._deliver, delivery)
+        try:
+            future.result(timeout=self.export_deadline_seconds)
+        except FutureTimeoutError:
+            logging.warning(
+                "Telemetry backends missed the export deadline, spooling exports"
+            )
+            self._backends_available = False
+            future.add_done_callback(
+                lambda done: self._on_late_delivery(delivery, done)
+            )
+        except Exception:
+            logging.exception("Failed to export spans, spooling exports")
+            self._backends_available = False
+            self.spool.append(delivery.to_record())
+        return SpanExportResult.SUCCESS
+
+    def _on_late_delivery(self, delivery: _Delivery, future: Future) -> None:
+        """Spool what a delivery that missed the deadline could not write."""
+        if future.exception() is None:
+            self._backends_available = True
+        else:
+            self.spool.append(delivery.to_record())
+
+    def _deliver(self, delivery: _Delivery) -> None:
+        """
+        Write a delivery, removing each part once it is written.
+
+        :param delivery: The batches and spans to write
+        :raises Exception: If a write fails; `delivery` then holds what is left
+        """
+        while delivery.log_batches:
+            self._write_log_batch(delivery.log_batches[0])
+            delivery.log_batches.pop(0)
+        if delivery.trace_spans:
+            self.client.batch_write_spans(
+                request=BatchWriteSpansRequest(
+                    name=f"projects/{self.project_id}", spans=delivery.trace_spans
+                )
+            )
+            delivery.trace_spans = []
+
+    def _replay_loop(self) -> None:
+        while not self._stop_replay.wait(self.replay_interval_seconds):
+            try:
+                self.replay_spool()
+            except Exception:
+                logging.exception("Failed to replay the span spool")
+
+    def replay_spool(self) -> int:
+        """
+        Write spooled exports, oldest first, until the spool is empty or a
+        write fails.
+
+        :return: The number of spooled exports written
+        """
+        replayed = 0
+        while (segment := self.spool.oldest_segment()) is not None:
+            records = self.spool.read(segment)
+            for index, record in enumerate(records):
+                delivery = _Delivery.from_record(record)
+                try:
+                    self._deliver(delivery)
+                except Exception as e:
+                    logging.warning(f"Span spool replay failed, retrying later: {e}")
+                    self._backends_available = False
+                    remaining = [delivery.to_record(), *records[index + 1 :]]
+                    self.spool.rewrite(segment, remaining)
+                    return replayed
+                replayed += 1
+            self.spool.remove(segment)
+        if replayed:
+            logging.info(f"Replayed {replayed} spooled span exports")
+            self._backends_available = True
+        return replayed
+
+    def _write_log_batch(self, entries: list[dict]) -> None:
+        """
+        Write entries with a single Cloud Logging request.
+
+        :param entries: The span log entries to write
+        """
+        batch = self.logger.batch()
+        for entry in entries:
+            batch.log_struct(
+                entry,
                 labels={
                     "type": "agent_telemetry",
                     "service_name": self.service_name,
                 },
                 severity="INFO",
             )
-        # Export spans to Google Cloud Trace using the parent class method
-        return super().export(spans)
+        batch.commit()
 
     def store_in_gcs(self, content: str, span_id: str) -> str:
         """
-        Initiate storing large content in Google Cloud Storage/
+        Queue large content for upload to Google Cloud Storage.
+
+        The upload (gzip-compressed, with retries on transient errors) happens
+        on a background thread; the URI is returned straight away.
 
         :param content: The content to store
         :param span_id: The ID of the span
-        :return: The  GCS URI of the stored content
+        :return: The GCS URI the content is stored at
         """
-        if not self.storage_client.bucket(self.bucket_name).exists():
+        if not self._bucket_available():
             logging.warning(
                 f"Bucket {self.bucket_name} not found. "
                 "Unable to store span attributes in GCS."
             )
             return "GCS bucket not found"
 
-        blob_name = f"spans/{span_id}.json"
-        blob = self.bucket.blob(blob_name)
+        with self._upload_lock:
+            if self._pending_uploads >= self.max_pending_uploads:
+                self.uploads_dropped += 1
+                logging.warning(
+                    f"Span payload upload queue full ({self._pending_uploads} of "
+                    f"{self.max_pending_uploads} pending), dropping the payload of "
+                    f"span {span_id}; {self.uploads_dropped} dropped so far"
+                )
+                return "GCS upload queue full"
+            self._pending_uploads += 1
 
-        blob.upload_from_string(content, "application/json")
+        blob_name = f"spans/{span_id}.json"
+        self._upload_pool.submit(self._upload, blob_name, content)
         return f"gs://{self.bucket_name}/{blob_name}"
 
+    def _bucket_available(self) -> bool:
+        """Whether the payload bucket exists, checked once and then cached."""
+        now = time.monotonic()
+        if self._bucket_checked_at is None or (
+            not self._bucket_exists
+            and now - self._bucket_checked_at >= _BUCKET_RECHECK_SECONDS
+        ):
+            self._bucket_exists = self.bucket.exists()
+            self._bucket_checked_at = now
+        return self._bucket_exists
+
+    def _upload(self, blob_name: str, content: str) -> None:
+        """
+        Upload gzip-compressed content, retrying transient errors with backoff.
+
+        :param blob_name: The object to write
+        :param content: The JSON content to store
+        """
+        try:
+            data = gzip.compress(content.encode())
+            blob = self.bucket.blob(blob_name)
+            blob.content_encoding = "gzip"
+            delay = self.upload_initial_backoff_seconds
+            for attempt in range(1, self.upload_max_attempts + 1):
+                try:
+                    blob.upload_from_string(data, content_type="application/json")
+                    return
+                except Exception as e:
+                    last_attempt = attempt == self.upload_max_attempts
+                    if last_attempt or not if_transient_error(e):
+                        raise
+                    time.sleep(delay)
+                    delay *= 2
+        except Exception:
+            self.uploads_failed += 1
+            logging.exception(f"Failed to upload span payload {blob_name}")
+        finally:
+            with self._upload_lock:
+                self._pending_uploads -= 1
+                self._upload_lock.notify_all()
+
     def _process_large_attributes(self, span_dict: dict, span_id: str) -> dict:
         """
-        Process large attribute values by storing them in GCS if they exceed the size
-        limit of Google Cloud Logging.
+        Move the largest attribute values to GCS if the span does not fit in a
+        Google Cloud Logging entry.
+
+        Attributes are offloaded largest first, only until the entry fits; each
+        offloaded value is replaced by the GCS URI of an object holding all the
+        offloaded attributes of the span. Small attributes stay inline.
 
         :param span_dict: The span data dictionary
-        :param trace_id: The trace ID
         :param span_id: The span ID
         :return: The updated span dictionary
         """
         attributes = span_dict["attributes"]
-        if len(json.dumps(attributes).encode()) > 255 * 1024:  # 250 KB
-            # Separate large payload from other attributes
-            attributes_payload = dict(attributes.items())
-            attributes_retain = dict(attributes.items())
-
-            # Store large payload in GCS
-            gcs_uri = self.store_in_gcs(json.dumps(attributes_payload), span_id)
-            attributes_retain["uri_payload"] = gcs_uri
-            attributes_retain["url_payload"] = (
-                f"https://storage.mtls.cloud.google.com/"
-                f"{self.bucket_name}/spans/{span_id}.json"
-            )
+        sizes = {
+            key: len(key) + 4 + _estimate_json_size(value)
+            for key, value in attributes.items()
+        }
+        entry_size = sum(sizes.values()) + sum(
+            len(key) + 4 + _estimate_json_size(value)
+            for key, value in span_dict.items()
+            if key != "attributes"
+        )
+        if entry_size <= _MAX_LOG_ENTRY_BYTES:
+            return span_dict
 
-            span_dict["attributes"] = attributes_retain
-            logging.info(
-                "Length of payload span above 250 KB, storing attributes in GCS "
-                "to avoid large log entry errors"
-            )
+        blob_name = f"spans/{span_id}.json"
+        stub = f"gs://{self.bucket_name}/{blob_name}"
+        url = f"https://storage.mtls.cloud.google.com/{self.bucket_name}/{blob_name}"
+        # The URI and queue depth attributes added below.
+        entry_size += 2 * len(url) + 96
+        offloaded = []
+        for key in sorted(sizes, key=sizes.__getitem__, reverse=True):
+            if entry_size <= _MAX_LOG_ENTRY_BYTES:
+                break
+            offloaded.append(key)
+            entry_size += len(key) + 4 + len(stub) + 2 - sizes[key]
+        if not offloaded:
+            return span_dict
 
+        gcs_uri = self.store_in_gcs(
+            json.dumps({key: attributes[key] for key in offloaded}), span_id
+        )
+        # A shallow copy: the values that stay inline are not duplicated.
+        attributes_retain = dict(attributes)
+        for key in offloaded:
+            attributes_retain[key] = gcs_uri
+        attributes_retain["uri_payload"] = gcs_uri
+        attributes_retain["url_payload"] = url
+        # Uploads queued or in flight once this one was queued, so a backlog
+        # shows in the span log entries before payloads are dropped.
+        upload_queue_depth = self.upload_queue_depth
+        attributes_retain["upload_queue_depth"] = upload_queue_depth
+
+        span_dict["attributes"] = attributes_retain
+        logging.info(
+            f"Span {span_id} above 250 KB, storing {len(offloaded)} attribute(s) "
+            f"in GCS to avoid large log entry errors ({upload_queue_depth} "
+            "uploads pending)"
+        )
         return span_dict
+
+
+class SamplingSpanProcessor(SpanProcessor):
+    """
+    Forwards whole traces to another processor when they are sampled.
+
+    Spans are buffered per trace until the local root span ends, and the
+    trace is then kept or dropped as described in `app.utils.trace_sampling`.
+    Spans that end after their root follow the decision made for the trace.
+    """
+
+    def __init__(self, processor: SpanProcessor, config: TraceSamplingConfig) -> None:
+        """
+        :param processor: Receives the spans of sampled traces, e.g. a
+            `BatchSpanProcessor`
+        :param config: Which traces to sample
+        """
+        self.processor = processor
+        self.config = config
+        self._lock = threading.Lock()
+        self._traces: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._buffered_spans = 0
+        self._decisions: OrderedDict[int, bool] = OrderedDict()
+        self._durations: deque[float] = deque(maxlen=config.slow_window)
+        self._sorted_durations: list[float] = []
+        self.traces_kept = 0
+        self.traces_dropped = 0
+        self.spans_evicted = 0
+
+    def on_start(
+        self, span: Span, parent_context: otel_context.Context | None = None
+    ) -> None:
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context is None:
+            return
+        trace_id = span.context.trace_id
+        forward: list[ReadableSpan] = []
+        with self._lock:
+            if trace_id in self._decisions:
+                if self._decisions[trace_id]:
+                    forward = [span]
+            elif span.parent is None or span.parent.is_remote:
+                spans = self._traces.pop(trace_id, [])
+                spans.append(span)
+                self._buffered_spans -= len(spans) - 1
+                keep = self._should_keep(span, spans)
+                self._remember(trace_id, keep)
+                if keep:
+                    self.traces_kept += 1
+                    forward = spans
+                else:
+                    self.traces_dropped += 1
+            else:
+                self._traces.setdefault(trace_id, []).append(span)
+                self._buffered_spans += 1
+                self._evict()
+        for finished in forward:
+            self.processor.on_end(finished)
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+    def _should_keep(self, root: ReadableSpan, spans: list[ReadableSpan]) -> bool:
+        """Decide on a finished trace; the caller holds the lock."""
+        config = self.config
+        duration_ms = ((root.end_time or 0) - (root.start_time or 0)) / 1e6
+        slow = self._is_slow(duration_ms)
+        self._record_duration(duration_ms)
+        if slow:
+            return True
+        if config.keep_errors and any(
+            span.status.status_code is StatusCode.ERROR for span in spans
+        ):
+            return True
+        ratio = config.head_ratio_for([span.name for span in spans])
+        # The same test as TraceIdRatioBased, on the low 64 bits of the id.
+        bound = round(ratio * _TRACE_ID_LIMIT)
+        return (root.context.trace_id & (_TRACE_ID_LIMIT - 1)) < bound
+
+    def _is_slow(self, duration_ms: float) -> bool:
+        config = self.config
+        if config.slow_threshold_ms is not None and (
+            duration_ms >= config.slow_threshold_ms
+        ):
+            return True
+        if config.slow_percentile is None:
+            return False
+        durations = self._sorted_durations
+        if len(durations) < min(_MIN_SLOW_SAMPLES, config.slow_window):
+            return False
+        index = min(len(durations) - 1, int(config.slow_percentile * len(durations)))
+        # Strictly above, so that a steady latency does not keep every trace.
+        return duration_ms > durations[index]
+
+    def _record_duration(self, duration_ms: float) -> None:
+        if len(self._durations) == self._durations.maxlen:
+            oldest = bisect.bisect_left(self._sorted_durations, self._durations[0])
+            del self._sorted_durations[oldest]
+        self._durations.append(duration_ms)
+        bisect.insort(self._sorted_durations, duration_ms)
+
+    def _remember(self, trace_id: int, keep: bool) -> None:
+        self._decisions[trace_id] = keep
+        if len(self._decisions) > _MAX_REMEMBERED_DECISIONS:
+            self._decisions.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Drop the oldest unfinished traces beyond the span budget."""
+        while self._buffered_spans > self.config.max_buffered_spans and self._traces:
+            trace_id, spans = self._traces.popitem(last=False)
+            self._buffered_spans -= len(spans)
+            self.spans_evicted += len(spans)
+            self._remember(trace_id, False)
+
+
+def set_up_sampled_tracing(
+    config: TraceSamplingConfig,
+    service_name: str,
+    project_id: str | None = None,
+    analytics_directory: str | None = None,
+    bucket_name: str | None = None,
+) -> TracerProvider:
+    """
+    Export sampled traces with `CloudTraceLoggingSpanExporter`.
+
+    Installs a global tracer provider whose spans go through a
+    `SamplingSpanProcessor` and then a `BatchSpanProcessor`. Exports that the
+    backends fail or are slow to take are spooled to local disk and replayed
+    later; each worker process claims a spool slot, which a restarted worker
+    takes over along with its backlog (see `SpanSpool.claim`). The provider is
+    installed once per process; later calls return it unchanged.
+
+    :param config: Which traces to export
+    :param service_name: The service name recorded in the span log entries
+    :param project_id: The Google Cloud project; defaults to the environment
+    :param analytics_directory: If set, also write every span to Parquet
+        files in this directory (see `app.utils.trace_analytics`). These spans
+        are not sampled, since the slow and errored traces the sampler keeps
+        would skew the latency percentiles computed from the files
+    :param bucket_name: The GCS bucket large span payloads are offloaded to;
+        defaults to `{project_id}-agent-logs-data`
+    :return: The installed tracer provider
+    """
+    global _installed_provider
+    with _install_lock:
+        if _installed_provider is not None:
+            return _installed_provider
+        provider = TracerProvider()
+        exporter = CloudTraceLoggingSpanExporter(
+            project_id=project_id,
+            service_name=service_name,
+            bucket_name=bucket_name,
+            spool=SpanSpool.claim(DEFAULT_SPOOL_DIRECTORY),
+        )
+        provider.add_span_processor(
+            SamplingSpanProcessor(BatchSpanProcessor(exporter), config)
+        )
+        if analytics_directory:
+            from app.utils.trace_analytics import ParquetSpanExporter
+
+            # Ahead of the sampler: the analytics files get every span.
+            analytics_exporter = ParquetSpanExporter(
+                analytics_directory, service_name=service_name
+            )
+            provider.add_span_processor(BatchSpanProcessor(analytics_exporter))
+        trace.set_tracer_provider(provider)
+        _installed_provider = provider
+        return provider
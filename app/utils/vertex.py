@@ -0,0 +1,57 @@
+import logging
+import threading
+
+import vertexai
+
+from app.utils.settings import get_settings
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def ensure_vertexai_initialized() -> bool:
+    """Initialise Vertex AI once per process, on first use.
+
+    Safe to call from every tool invocation: after the first successful call this
+    is a single flag check. A failed initialisation is logged and retried on the
+    next call instead of breaking the import of the agent package.
+
+    Returns:
+        True if Vertex AI has been initialised with a project and location.
+    """
+    global _initialized
+    if _initialized:
+        return True
+
+    with _init_lock:
+        if _initialized:
+            return True
+
+        settings = get_settings()
+        if not (settings.project_id and settings.location):
+            logging.warning(
+                f"Missing Vertex AI configuration. PROJECT_ID={settings.project_id}, "
+                f"LOCATION={settings.location}. "
+                "Tools requiring Vertex AI may not work properly."
+            )
+            return False
+
+        try:
+            vertexai.init(project=settings.project_id, location=settings.location)
+        except Exception as e:
+            logging.error(f"Failed to initialize Vertex AI: {e!s}")
+            return False
+
+        logging.info(
+            f"Initialized Vertex AI with project={settings.project_id}, "
+            f"location={settings.location}"
+        )
+        _initialized = True
+        return True
+
+
+def reset_vertexai_initialization() -> None:
+    """Forget the initialisation state. Intended for tests."""
+    global _initialized
+    with _init_lock:
+        _initialized = False
@@ -0,0 +1,131 @@
+"""
+Warm-up for a freshly started Agent Engine replica.
+
+Clients, credentials and caches used by the agent are created lazily, so
+without a warm-up the first user query on a new replica pays for all of them.
+`warm_up` does that work up front: it initialises Vertex AI and primes the RAG
+corpus listing, creates the Cloud Logging API client, touches the GCS artifacts
+bucket (fetching credentials and opening a connection) and builds the function
+declarations of every tool in the agent tree. The steps are independent and
+run concurrently. A failing step is reported, not raised.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from google.adk.agents import BaseAgent, LlmAgent
+
+from app.utils.vertex import ensure_vertexai_initialized
+
+RAG_TOOLS_MODULE = "app.agent.rag_agent.tools"
+
+
+def _walk_agents(agent: BaseAgent) -> Iterator[BaseAgent]:
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _walk_agents(sub_agent)
+
+
+def _uses_tools_from(agent: BaseAgent, module_prefix: str) -> bool:
+    for node in _walk_agents(agent):
+        for tool in getattr(node, "tools", None) or []:
+            module = getattr(getattr(tool, "func", tool), "__module__", "") or ""
+            if module.startswith(module_prefix):
+                return True
+    return False
+
+
+def _warm_vertex_ai(app: Any) -> None:
+    if not ensure_vertexai_initialized():
+        raise RuntimeError("Vertex AI project/location are not configured.")
+
+
+def _warm_rag(app: Any) -> None:
+    from app.agent.rag_agent.tools.utils import list_corpora_cached
+
+    _warm_vertex_ai(app)
+    list_corpora_cached()
+
+
+def _warm_cloud_logging(app: Any) -> None:
+    logger = getattr(app, "logger", None)
+    if logger is None:
+        raise RuntimeError("set_up has not created the Cloud Logging logger.")
+    # Creates the underlying API client and its transport.
+    logger.client.logging_api  # noqa: B018
+
+
+def _warm_artifacts(app: Any) -> None:
+    artifact_service = app._tmpl_attrs.get("artifact_service")
+    bucket = getattr(artifact_service, "bucket", None)
+    if bucket is None:
+        return
+    bucket.exists()
+
+
+def _warm_tool_declarations(app: Any) -> None:
+    async def build_declarations() -> None:
+        for node in _walk_agents(app._tmpl_attrs["agent"]):
+            if not isinstance(node, LlmAgent):
+                continue
+            for tool in await node.canonical_tools():
+                tool._get_declaration()
+
+    asyncio.run(build_declarations())
+
+
+def warmup_steps(app: Any) -> dict[str, Callable[[Any], None]]:
+    """The warm-up steps that apply to `app`'s agent tree."""
+    steps: dict[str, Callable[[Any], None]] = {
+        "cloud_logging": _warm_cloud_logging,
+        "artifacts": _warm_artifacts,
+        "tool_declarations": _warm_tool_declarations,
+    }
+    if _uses_tools_from(app._tmpl_attrs["agent"], RAG_TOOLS_MODULE):
+        steps["rag"] = _warm_rag
+    else:
+        steps["vertex_ai"] = _warm_vertex_ai
+    return steps
+
+
+def _timed(name: str, step: Callable[[Any], None], app: Any) -> dict[str, Any]:
+    start = time.perf_counter()
+    result: dict[str, Any] = {"ok": True}
+    try:
+        step(app)
+    except Exception as e:
+        logging.warning(f"Warm-up step {name} failed: {e}")
+        result = {"ok": False, "error": str(e)}
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def warm_up(app: Any) -> dict[str, Any]:
+    """
+    Run every warm-up step for `app` concurrently.
+
+    :param app: An `AgentEngineApp` whose `set_up` has run
+    :return: A JSON-serialisable report with the outcome and duration per step
+    """
+    start = time.perf_counter()
+    steps = warmup_steps(app)
+    with ThreadPoolExecutor(
+        max_workers=len(steps), thread_name_prefix="warmup"
+    ) as executor:
+        futures = {
+            name: executor.submit(_timed, name, step, app)
+            for name, step in steps.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    report = {
+        "status": "ok" if all(r["ok"] for r in results.values()) else "partial",
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        "steps": results,
+    }
+    logging.info(f"Warm-up finished: {report}")
+    return report
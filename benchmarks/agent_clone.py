@@ -0,0 +1,105 @@
+"""
+Benchmark: AgentEngineApp clone cost, structural sharing vs `copy.deepcopy`.
+
+Compares the time and memory allocated per clone of the deployed agent tree
+(`root_agent`), at the agent level and through `AgentEngineApp.clone()`.
+
+Usage:
+    uv run python -m benchmarks.agent_clone
+    uv run python -m benchmarks.agent_clone --iterations 500
+"""
+
+import argparse
+import copy
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import vertexai
+
+from app.agent.root_agent.agent import root_agent
+from app.agent_engine_app import AgentEngineApp
+from app.utils.agent_clone import clone_agent
+
+
+def _time_per_call(fn: Callable[[], Any], iterations: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def _allocated_per_call(fn: Callable[[], Any], iterations: int) -> float:
+    """Net bytes still allocated per call while all results are kept alive."""
+    keep = []
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(iterations):
+        keep.append(fn())
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / iterations
+
+
+def _report(label: str, fn: Callable[[], Any], iterations: int) -> tuple[float, float]:
+    seconds = _time_per_call(fn, iterations)
+    allocated = _allocated_per_call(fn, min(iterations, 50))
+    print(f"  {label:<34} {seconds * 1e3:9.3f} ms  {allocated / 1024:9.1f} KiB")
+    return seconds, allocated
+
+
+def _deepcopy_app_clone(app: AgentEngineApp) -> AgentEngineApp:
+    """The previous AgentEngineApp.clone() implementation."""
+    attrs = app._tmpl_attrs
+    return AgentEngineApp(
+        agent_name=app.agent_name,
+        agent=copy.deepcopy(attrs["agent"]),
+        enable_tracing=bool(attrs.get("enable_tracing", False)),
+        env_vars=attrs.get("env_vars"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"\n🧬 Cloning root_agent ({args.iterations} iterations)")
+    print(f"  {'':<34} {'per clone':>12}  {'allocated':>12}")
+    deep_t, deep_m = _report(
+        "agent: copy.deepcopy", lambda: copy.deepcopy(root_agent), args.iterations
+    )
+    share_t, share_m = _report(
+        "agent: clone_agent", lambda: clone_agent(root_agent), args.iterations
+    )
+
+    # AdkApp reads the project/location from the Vertex AI config on construction.
+    vertexai.init(
+        project=os.environ.get("GOOGLE_CLOUD_PROJECT", "benchmark-project"),
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION", "europe-west4"),
+    )
+    app = AgentEngineApp(agent_name="root_agent", agent=root_agent)
+    app_deep_t, app_deep_m = _report(
+        "AgentEngineApp: deepcopy clone",
+        lambda: _deepcopy_app_clone(app),
+        args.iterations,
+    )
+    app_share_t, app_share_m = _report(
+        "AgentEngineApp.clone()", app.clone, args.iterations
+    )
+
+    print(
+        f"\n  agent clone: {deep_t / share_t:.1f}x faster, "
+        f"{deep_m / max(share_m, 1):.1f}x less memory"
+    )
+    print(
+        f"  app clone:   {app_deep_t / app_share_t:.1f}x faster, "
+        f"{app_deep_m / max(app_share_m, 1):.1f}x less memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
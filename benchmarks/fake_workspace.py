@@ -0,0 +1,279 @@
+"""
+An in-memory stand-in for the Google Workspace REST APIs the MCP servers call.
+
+Serves the Slides (presentations create/get/batchUpdate), Drive (files
+copy/get/update/list, permissions create) and Calendar (calendars get, events
+insert) endpoints at their real paths, so a client built with its root URL
+pointed here (`GoogleServices(root_url=...)`, or `GOOGLE_API_ROOT_URL` for
+mcp_server/main.py) works unchanged. Every call takes `latency_ms`, fails with
+a 503 at `error_rate`, and gets a 429 once its API has had `quota_per_minute`
+calls in the current minute; errors use the Google API error format, so the
+client library raises `HttpError` as it would for the real APIs.
+
+Usage:
+    uv run python -m benchmarks.fake_workspace --port 8090 --latency-ms 80
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_STATUSES = {429: "RESOURCE_EXHAUSTED", 404: "NOT_FOUND", 503: "UNAVAILABLE"}
+
+
+@dataclass
+class FakeWorkspaceConfig:
+    """How the fake APIs behave."""
+
+    latency_ms: float = 50.0
+    # The fraction of calls that fail with 503.
+    error_rate: float = 0.0
+    # Calls per API per minute before 429s; None for no quota.
+    quota_per_minute: int | None = None
+    seed: int | None = None
+
+
+class FakeApiError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeWorkspace:
+    """The state of the fake APIs, and the FastAPI app serving them."""
+
+    def __init__(self, config: FakeWorkspaceConfig | None = None) -> None:
+        self.config = config or FakeWorkspaceConfig()
+        self.presentations: dict[str, dict[str, Any]] = {}
+        self.files: dict[str, dict[str, Any]] = {}
+        self.permissions: dict[str, list[dict[str, Any]]] = {}
+        self.events: dict[str, list[dict[str, Any]]] = {}
+        # Calls, 503s and 429s per API.
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.throttled: Counter[str] = Counter()
+        self._random = random.Random(self.config.seed)
+        self._ids = itertools.count(1)
+        self._window: tuple[int, Counter[str]] = (0, Counter())
+        self.app = self._create_app()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}"
+
+    async def _admit(self, api: str) -> None:
+        """Take the configured latency, then apply the error rate and quota."""
+        self.calls[api] += 1
+        await asyncio.sleep(self.config.latency_ms / 1000)
+        minute = int(time.monotonic() // 60)
+        if self._window[0] != minute:
+            self._window = (minute, Counter())
+        used = self._window[1]
+        quota = self.config.quota_per_minute
+        if quota is not None and used[api] >= quota:
+            self.throttled[api] += 1
+            raise FakeApiError(429, f"Quota exceeded for {api}")
+        used[api] += 1
+        if self._random.random() < self.config.error_rate:
+            self.errors[api] += 1
+            raise FakeApiError(503, "The service is currently unavailable.")
+
+    def _presentation(self, presentation_id: str) -> dict[str, Any]:
+        if presentation_id not in self.presentations:
+            raise FakeApiError(404, f"Presentation {presentation_id} not found")
+        return self.presentations[presentation_id]
+
+    def _file(self, file_id: str) -> dict[str, Any]:
+        if file_id not in self.files:
+            raise FakeApiError(404, f"File {file_id} not found")
+        return self.files[file_id]
+
+    def add_presentation(self, presentation_id: str, title: str) -> dict[str, Any]:
+        """Add an empty presentation, e.g. a template to copy."""
+        presentation = {
+            "presentationId": presentation_id,
+            "title": title,
+            "slides": [],
+            "layouts": [{"objectId": "layout-title", "layoutProperties": {}}],
+        }
+        self.presentations[presentation_id] = presentation
+        self.files[presentation_id] = {
+            "id": presentation_id,
+            "name": title,
+            "parents": ["root"],
+        }
+        return presentation
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Google Workspace APIs")
+
+        @app.exception_handler(FakeApiError)
+        async def api_error(request: Request, error: FakeApiError) -> JSONResponse:
+            body = {
+                "error": {
+                    "code": error.code,
+                    "message": error.message,
+                    "status": _STATUSES.get(error.code, "UNKNOWN"),
+                }
+            }
+            return JSONResponse(body, status_code=error.code)
+
+        # --- Slides ---
+        @app.post("/v1/presentations")
+        async def create_presentation(body: dict[str, Any]) -> dict[str, Any]:
+            await self._admit("slides")
+            presentation_id = self._new_id("presentation")
+            return self.add_presentation(presentation_id, body.get("title", ""))
+
+        @app.get("/v1/presentations/{presentation_id}")
+        async def get_presentation(presentation_id: str) -> dict[str, Any]:
+            await self._admit("slides")
+            return self._presentation(presentation_id)
+
+        @app.post("/v1/presentations/{presentation_id}:batchUpdate")
+        async def batch_update(
+            presentation_id: str, body: dict[str, Any]
+        ) -> dict[str, Any]:
+            await self._admit("slides")
+            presentation = self._presentation(presentation_id)
+            replies: list[dict[str, Any]] = []
+            for request in body.get("requests", []):
+                if "createSlide" in request:
+                    object_id = request["createSlide"].get("objectId") or (
+                        self._new_id("slide")
+                    )
+                    presentation["slides"].append({"objectId": object_id})
+                    replies.append({"createSlide": {"objectId": object_id}})
+                else:
+                    replies.append({})
+            return {"presentationId": presentation_id, "replies": replies}
+
+        # --- Drive ---
+        @app.post("/drive/v3/files/{file_id}/copy")
+        async def copy_file(file_id: str, body: dict[str, Any]) -> dict[str, Any]:
+            await self._admit("drive")
+            source = self._file(file_id)
+            copy_id = self._new_id("file")
+            name = body.get("name", source["name"])
+            if file_id in self.presentations:
+                copy = self.add_presentation(copy_id, name)
+                copy["slides"] = list(self.presentations[file_id]["slides"])
+            else:
+                self.files[copy_id] = {"id": copy_id, "name": name, "parents": []}
+            return {"id": copy_id, "name": name}
+
+        @app.get("/drive/v3/files/{file_id}")
+        async def get_file(file_id: str) -> dict[str, Any]:
+            await self._admit("drive")
+            return self._file(file_id)
+
+        @app.patch("/drive/v3/files/{file_id}")
+        async def update_file(
+            file_id: str,
+            addParents: str | None = None,
+            removeParents: str | None = None,
+        ) -> dict[str, Any]:
+            await self._admit("drive")
+            file = self._file(file_id)
+            removed = set((removeParents or "").split(","))
+            parents = [parent for parent in file["parents"] if parent not in removed]
+            file["parents"] = parents + ([addParents] if addParents else [])
+            return file
+
+        @app.get("/drive/v3/files")
+        async def list_files(q: str = "") -> dict[str, Any]:
+            await self._admit("drive")
+            files = [
+                {"id": file["id"], "name": file["name"]}
+                for file in self.files.values()
+                if f"'{file['name']}'" in q or not q
+            ]
+            return {"files": files}
+
+        @app.post("/drive/v3/files/{file_id}/permissions")
+        async def create_permission(
+            file_id: str, body: dict[str, Any]
+        ) -> dict[str, Any]:
+            await self._admit("drive")
+            self._file(file_id)
+            permission = {"id": self._new_id("permission"), **body}
+            self.permissions.setdefault(file_id, []).append(permission)
+            return {"id": permission["id"]}
+
+        # --- Calendar ---
+        @app.get("/calendar/v3/calendars/{calendar_id}")
+        async def get_calendar(calendar_id: str) -> dict[str, Any]:
+            await self._admit("calendar")
+            return {"id": calendar_id, "summary": calendar_id, "timeZone": "UTC"}
+
+        @app.post("/calendar/v3/calendars/{calendar_id}/events")
+        async def insert_event(
+            calendar_id: str, body: dict[str, Any]
+        ) -> dict[str, Any]:
+            await self._admit("calendar")
+            event = {"id": self._new_id("event"), "status": "confirmed", **body}
+            self.events.setdefault(calendar_id, []).append(event)
+            return event
+
+        return app
+
+
+@contextlib.contextmanager
+def serving(workspace: FakeWorkspace) -> Iterator[str]:
+    """Serve the fake APIs on a free local port; yields their root URL."""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(workspace.app, log_level="warning", access_log=False)
+    )
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-per-minute", type=int, default=None)
+    args = parser.parse_args()
+
+    workspace = FakeWorkspace(
+        FakeWorkspaceConfig(
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            quota_per_minute=args.quota_per_minute,
+        )
+    )
+    uvicorn.run(workspace.app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
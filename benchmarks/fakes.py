@@ -0,0 +1,166 @@
+"""
+Fake backends for running the agent locally in benchmarks.
+
+`FakeLlm` answers requests after a fixed latency, optionally calling a scripted
+sequence of tools first, so the agent runtime (runner, sessions, tool
+dispatch) can be measured without calling Gemini. `fake_rag_backend` stands in
+for the Vertex AI RAG API, and `offline_cloud_logging` lets `set_up` create its
+Cloud Logging client without Application Default Credentials.
+`FakeLoggingClient` counts Cloud Logging write requests and adds a latency to
+each.
+"""
+
+import asyncio
+import contextlib
+import functools
+import time
+from collections.abc import AsyncGenerator, Iterator, Mapping
+from typing import Any
+from unittest import mock
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from app.utils.agent_clone import clone_agent
+
+
+def _tool_results_since_user_turn(llm_request: LlmRequest) -> int:
+    count = 0
+    for content in reversed(llm_request.contents):
+        parts = content.parts or []
+        if content.role == "user" and any(part.text for part in parts):
+            break
+        count += sum(1 for part in parts if part.function_response)
+    return count
+
+
+class FakeLlm(BaseLlm):
+    """
+    An LLM that takes `latency_seconds` per call.
+
+    It first calls the tools in `tool_calls`, one per turn, and then replies
+    with `reply`.
+    """
+
+    latency_seconds: float = 0.0
+    reply: str = "ok"
+    tool_calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        step = _tool_results_since_user_turn(llm_request)
+        if step < len(self.tool_calls):
+            name, args = self.tool_calls[step]
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+        else:
+            part = types.Part(text=self.reply)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def with_fake_models(
+    agent: BaseAgent,
+    latency_seconds: float = 0.0,
+    tool_calls: Mapping[str, list[tuple[str, dict[str, Any]]]] | None = None,
+) -> BaseAgent:
+    """
+    Clone `agent` with every LlmAgent's model replaced by a `FakeLlm`.
+
+    :param agent: The agent tree to clone
+    :param latency_seconds: The latency of every model call
+    :param tool_calls: Tool calls to script, by agent name
+    """
+    cloned = clone_agent(agent)
+    stack = [cloned]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, LlmAgent):
+            node.model = FakeLlm(
+                model="fake-llm",
+                latency_seconds=latency_seconds,
+                tool_calls=list((tool_calls or {}).get(node.name, [])),
+            )
+        stack.extend(node.sub_agents)
+    return cloned
+
+
+@contextlib.contextmanager
+def fake_rag_backend(latency_seconds: float = 0.0) -> Iterator[None]:
+    """Replace the Vertex AI RAG calls made by the RAG tools with local fakes."""
+    from vertexai import rag
+
+    def list_corpora(*args: Any, **kwargs: Any) -> list:
+        time.sleep(latency_seconds)
+        return []
+
+    def retrieval_query(*args: Any, **kwargs: Any) -> Any:
+        time.sleep(latency_seconds)
+        return mock.Mock(contexts=mock.Mock(contexts=[]))
+
+    with (
+        mock.patch.object(rag, "list_corpora", list_corpora),
+        mock.patch.object(rag, "retrieval_query", retrieval_query),
+    ):
+        yield
+
+
+@contextlib.contextmanager
+def offline_cloud_logging(project: str = "benchmark-project") -> Iterator[None]:
+    """Make `google.cloud.logging.Client()` work without credentials."""
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import logging as google_cloud_logging
+
+    client = functools.partial(
+        google_cloud_logging.Client,
+        project=project,
+        credentials=AnonymousCredentials(),
+    )
+    with mock.patch.object(google_cloud_logging, "Client", client):
+        yield
+
+
+class FakeLoggingClient:
+    """
+    A stand-in for `google.cloud.logging.Client` that counts write requests.
+
+    Each write request (a `log_struct` call or a batch commit) takes
+    `latency_seconds`, like a round trip to Cloud Logging would.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self.entries = 0
+
+    def _write(self, entries: int) -> None:
+        time.sleep(self.latency_seconds)
+        self.requests += 1
+        self.entries += entries
+
+    def logger(self, name: str) -> "FakeLoggingClient._Logger":
+        return self._Logger(self)
+
+    class _Logger:
+        def __init__(self, client: "FakeLoggingClient") -> None:
+            self.client = client
+
+        def log_struct(self, info: dict, **kwargs: Any) -> None:
+            self.client._write(1)
+
+        def batch(self) -> "FakeLoggingClient._Batch":
+            return FakeLoggingClient._Batch(self.client)
+
+    class _Batch:
+        def __init__(self, client: "FakeLoggingClient") -> None:
+            self.client = client
+            self.entries: list[dict] = []
+
+        def log_struct(self, info: dict, **kwargs: Any) -> None:
+            self.entries.append(info)
+
+        def commit(self, **kwargs: Any) -> None:
+            self.client._write(len(self.entries))
+            self.entries = []
@@ -0,0 +1,120 @@
+"""
+Benchmark: first-query latency on a fresh replica, with and without warm-up.
+
+Each trial starts a new Python process (a fresh "replica"), builds the
+AgentEngineApp for `root_agent`, runs `set_up` (with or without
+`warmup_on_set_up`) and then times the first and second `stream_query`.
+
+By default the real model, Vertex AI and Cloud Logging are used, which needs
+Application Default Credentials and GOOGLE_CLOUD_PROJECT. With `--fake-llm`
+the agent's models are replaced by a canned fake and Cloud Logging uses
+anonymous credentials, so only the local part of the cold start is measured.
+
+Usage:
+    uv run python -m benchmarks.first_query_latency
+    uv run python -m benchmarks.first_query_latency --fake-llm --trials 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+QUERY = "Which RAG corpora are available?"
+
+
+def _run_trial(warm: bool, fake_llm: bool) -> dict:
+    """Run in the child process: set up a fresh app and time two queries."""
+    import vertexai
+
+    from app.agent.root_agent.agent import root_agent
+    from app.agent_engine_app import AgentEngineApp
+
+    vertexai.init(
+        project=os.environ.get("GOOGLE_CLOUD_PROJECT", "benchmark-project"),
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION", "europe-west4"),
+    )
+    agent = root_agent
+    logging_context: contextlib.AbstractContextManager = contextlib.nullcontext()
+    if fake_llm:
+        from benchmarks.fakes import offline_cloud_logging, with_fake_models
+
+        agent = with_fake_models(root_agent)
+        logging_context = offline_cloud_logging()
+
+    app = AgentEngineApp(
+        agent_name="root_agent", agent=agent, warmup_on_set_up=warm
+    )
+    with logging_context:
+        start = time.perf_counter()
+        app.set_up()
+        set_up_ms = (time.perf_counter() - start) * 1000
+
+    def query_ms() -> float:
+        start = time.perf_counter()
+        for _ in app.stream_query(message=QUERY, user_id="benchmark-user"):
+            pass
+        return (time.perf_counter() - start) * 1000
+
+    return {
+        "set_up_ms": set_up_ms,
+        "first_query_ms": query_ms(),
+        "second_query_ms": query_ms(),
+    }
+
+
+def _trial_in_subprocess(warm: bool, fake_llm: bool) -> dict:
+    command = [sys.executable, "-m", "benchmarks.first_query_latency", "--child"]
+    if warm:
+        command.append("--warm")
+    if fake_llm:
+        command.append("--fake-llm")
+    output = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--fake-llm", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_run_trial(args.warm, args.fake_llm)))
+        return
+
+    backend = "fake LLM" if args.fake_llm else "real backends"
+    print(f"\n🔥 First-query latency, {args.trials} fresh processes each ({backend})")
+    print(
+        f"  {'':<8} {'set_up':>10} {'1st query':>10} {'2nd query':>10} "
+        f"{'set_up + 1st':>13}"
+    )
+    medians = {}
+    for label, warm in (("cold", False), ("warm", True)):
+        trials = [
+            _trial_in_subprocess(warm, args.fake_llm) for _ in range(args.trials)
+        ]
+        median = {
+            key: statistics.median(trial[key] for trial in trials)
+            for key in trials[0]
+        }
+        medians[label] = median
+        print(
+            f"  {label:<8} {median['set_up_ms']:8.0f}ms "
+            f"{median['first_query_ms']:8.0f}ms "
+            f"{median['second_query_ms']:8.0f}ms "
+            f"{median['set_up_ms'] + median['first_query_ms']:11.0f}ms"
+        )
+
+    saved = medians["cold"]["first_query_ms"] - medians["warm"]["first_query_ms"]
+    print(f"\n  warm-up removes {saved:.0f}ms from the first user query")
+
+
+if __name__ == "__main__":
+    main()
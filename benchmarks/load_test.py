@@ -0,0 +1,179 @@
+"""
+Load test: one AgentEngineApp worker at increasing request concurrency.
+
+The app runs in this process with its models replaced by `FakeLlm` (a fixed
+latency per model call, scripted tool calls) and the RAG API replaced by a
+fake with a fixed latency, so the curve reflects the agent runtime and tool
+dispatch rather than Gemini. Each level sends `--requests` queries with at
+most `--concurrency` in flight and records throughput, p50/p95 latency, errors
+and the CPU the worker used.
+
+From the curve, `app.utils.capacity.recommend_worker_config` picks the worker
+count and per-worker concurrency; paste the printed `worker_config` into the
+agent's entry in `agents_to_deploy` (app/agent_engine_deploy.py). The full
+results are written to logs/load_test_<agent>.json.
+
+Usage:
+    uv run python -m benchmarks.load_test
+    uv run python -m benchmarks.load_test --levels 1,4,16,64 --llm-latency-ms 800
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import vertexai
+
+from app.utils.capacity import LoadPoint, recommend_worker_config
+
+# What each agent's fake model does per query: root_agent hands over to the
+# RAG agent, which lists the corpora and answers.
+TOOL_SCRIPTS: dict[str, dict[str, list[tuple[str, dict[str, Any]]]]] = {
+    "root_agent": {
+        "root_agent": [("transfer_to_agent", {"agent_name": "rag_agent"})],
+        "rag_agent": [("list_corpora", {})],
+    },
+}
+
+Query = Callable[[str, str], Awaitable[None]]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_level(query: Query, concurrency: int, requests: int) -> LoadPoint:
+    """Send `requests` queries with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies_ms: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await query(f"load-user-{i}", "Which corpora are available?")
+            except Exception:
+                errors += 1
+                return
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    duration = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+
+    return LoadPoint(
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        duration_seconds=duration,
+        cpu_seconds=cpu_seconds,
+        p50_ms=statistics.median(latencies_ms) if latencies_ms else float("inf"),
+        p95_ms=_percentile(latencies_ms, 0.95) if latencies_ms else float("inf"),
+    )
+
+
+def _build_app(agent_name: str, llm_latency_seconds: float) -> Any:
+    from app.agent.root_agent.agent import root_agent
+    from app.agent_engine_app import AgentEngineApp
+    from benchmarks.fakes import with_fake_models
+
+    agents = {"root_agent": root_agent}
+    agent = with_fake_models(
+        agents[agent_name], llm_latency_seconds, TOOL_SCRIPTS.get(agent_name)
+    )
+    return AgentEngineApp(agent_name=agent_name, agent=agent)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agent", default="root_agent", choices=sorted(TOOL_SCRIPTS))
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--tool-latency-ms", type=float, default=150.0)
+    parser.add_argument("--replica-cpus", type=int, default=4)
+    parser.add_argument("--latency-slo-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    from benchmarks.fakes import fake_rag_backend, offline_cloud_logging
+
+    vertexai.init(
+        project=os.environ.get("GOOGLE_CLOUD_PROJECT", "benchmark-project"),
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION", "europe-west4"),
+    )
+    app = _build_app(args.agent, args.llm_latency_ms / 1000)
+
+    async def query(user_id: str, message: str) -> None:
+        async for _ in app.async_stream_query(message=message, user_id=user_id):
+            pass
+
+    levels = [int(level) for level in args.levels.split(",")]
+    print(
+        f"\n📈 Load test: {args.agent}, {args.requests} requests per level, "
+        f"LLM {args.llm_latency_ms:.0f}ms, tools {args.tool_latency_ms:.0f}ms"
+    )
+    print(
+        f"  {'concurrency':>11} {'req/s':>8} {'p50':>8} {'p95':>8} "
+        f"{'errors':>7} {'cpu':>6}"
+    )
+    points = []
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(offline_cloud_logging())
+        stack.enter_context(fake_rag_backend(args.tool_latency_ms / 1000))
+        app.set_up()
+        for level in levels:
+            point = asyncio.run(run_level(query, level, args.requests))
+            points.append(point)
+            print(
+                f"  {level:>11} {point.throughput_rps:8.1f} {point.p50_ms:6.0f}ms "
+                f"{point.p95_ms:6.0f}ms {point.error_rate:7.1%} "
+                f"{point.cpu_utilization:5.2f}c"
+            )
+
+    recommendation = recommend_worker_config(
+        points, replica_cpus=args.replica_cpus, latency_slo_ms=args.latency_slo_ms
+    )
+    config = recommendation.worker_config
+    print(
+        f"\n  knee at concurrency {recommendation.knee.concurrency}: "
+        f"{config.num_workers} workers x {config.per_worker_concurrency} "
+        f"concurrent requests, ~{recommendation.replica_throughput_rps:.1f} req/s "
+        f"per {args.replica_cpus}-vCPU replica"
+    )
+    print(
+        f'  "worker_config": WorkerConfig(num_workers={config.num_workers}, '
+        f"per_worker_concurrency={config.per_worker_concurrency}),"
+    )
+
+    output = Path("logs") / f"load_test_{args.agent}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "args": vars(args),
+                "points": [
+                    {**vars(point), "throughput_rps": point.throughput_rps}
+                    for point in points
+                ],
+                "recommendation": recommendation.to_dict(),
+            },
+            indent=2,
+        )
+    )
+    print(f"  results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
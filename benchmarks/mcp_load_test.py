@@ -0,0 +1,245 @@
+"""
+MCP load test: the MCP servers' Google API calls against fake Workspace APIs.
+
+Starts `benchmarks.fake_workspace` on a local port (with the given latency,
+error rate and quota) and drives, at a fixed concurrency:
+
+- mcp_server/main.py `POST /generate_slides`, in-process through its ASGI
+  app, building the slides one by one and from a template
+- slides_mcp's `create_presentation` and `batch_update_presentation`
+- schedule_mcp's `create_calendar_event`
+
+and reports the throughput and p50/p95/p99 latency of each, with the calls
+each fake API received, so MCP server performance can be measured (and
+compared across changes) without Google API quota.
+
+Usage:
+    uv run python -m benchmarks.mcp_load_test
+    uv run python -m benchmarks.mcp_load_test --concurrency 32 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from google.auth.credentials import AnonymousCredentials
+
+from benchmarks.fake_workspace import FakeWorkspace, FakeWorkspaceConfig, serving
+from mcp_server.google_services import GoogleServices
+
+SLIDES_PER_DECK = 5
+TEMPLATE_ID = "template-report"
+
+Call = Callable[[int], Awaitable[None]]
+
+
+@dataclass
+class EndpointResult:
+    endpoint: str
+    requests: int
+    errors: int
+    duration_seconds: float
+    latencies_ms: list[float]
+
+    @property
+    def throughput_rps(self) -> float:
+        return (self.requests - self.errors) / self.duration_seconds
+
+    def percentile_ms(self, fraction: float) -> float:
+        ordered = sorted(self.latencies_ms)
+        if not ordered:
+            return float("inf")
+        index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+        return ordered[index]
+
+
+async def run_endpoint(
+    endpoint: str, call: Call, concurrency: int, requests: int
+) -> EndpointResult:
+    """Make `requests` calls with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies_ms: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+                return
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return EndpointResult(
+        endpoint, requests, errors, time.perf_counter() - start, latencies_ms
+    )
+
+
+def _slides(i: int) -> list[dict[str, str]]:
+    return [
+        {"title": f"Slide {n}", "content": f"Point {n} of deck {i}"}
+        for n in range(SLIDES_PER_DECK)
+    ]
+
+
+def main_server_calls() -> dict[str, Call]:
+    """`POST /generate_slides` of mcp_server/main.py, in-process."""
+    import httpx
+
+    from mcp_server import main
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app), base_url="http://mcp"
+    )
+
+    def generate(template: str | None) -> Call:
+        async def call(i: int) -> None:
+            body = {
+                "title": f"Deck {i} {template}",
+                "slides": _slides(i),
+                "email": "load@example.com",
+                "template": template,
+            }
+            response = await client.post("/generate_slides", json=body)
+            response.raise_for_status()
+
+        return call
+
+    return {
+        "main /generate_slides": generate(None),
+        "main /generate_slides (template)": generate("report"),
+    }
+
+
+def client_library_calls(root_url: str, concurrency: int) -> dict[str, Call]:
+    """The Google API client functions of slides_mcp and schedule_mcp."""
+    from mcp_server.schedule_mcp import google_calendar_client
+    from mcp_server.slides_mcp import google_slides_client
+
+    # The clients call execute() on the services' own transport, which is not
+    # thread-safe: give each thread its own services.
+    local = threading.local()
+    executor = ThreadPoolExecutor(concurrency)
+
+    def services() -> GoogleServices:
+        if not hasattr(local, "services"):
+            local.services = GoogleServices(AnonymousCredentials, root_url=root_url)
+        return local.services
+
+    def create_deck(i: int) -> None:
+        slides = services().service("slides", "v1")
+        drive = services().service("drive", "v3")
+        presentation = google_slides_client.create_presentation(
+            f"Deck {i}", drive, slides
+        )
+        requests = [
+            {"createSlide": {"objectId": f"slide_{n}"}} for n in range(SLIDES_PER_DECK)
+        ]
+        google_slides_client.batch_update_presentation(
+            presentation["presentationId"], requests, slides
+        )
+
+    def create_event(i: int) -> None:
+        event = {
+            "summary": f"Appointment {i}",
+            "start": {"dateTime": "2025-01-31T09:00:00Z"},
+            "end": {"dateTime": "2025-01-31T09:30:00Z"},
+        }
+        google_calendar_client.create_calendar_event(
+            "primary", event, services().service("calendar", "v3")
+        )
+
+    def in_thread(function: Callable[[int], None]) -> Call:
+        async def call(i: int) -> None:
+            await asyncio.get_running_loop().run_in_executor(executor, function, i)
+
+        return call
+
+    return {
+        "slides_mcp create + batchUpdate": in_thread(create_deck),
+        "schedule_mcp create_calendar_event": in_thread(create_event),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--api-latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-per-minute", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workspace = FakeWorkspace(
+        FakeWorkspaceConfig(
+            latency_ms=args.api_latency_ms,
+            error_rate=args.error_rate,
+            quota_per_minute=args.quota_per_minute,
+            seed=args.seed,
+        )
+    )
+    template = workspace.add_presentation(TEMPLATE_ID, "Report template")
+    template["slides"] = [
+        {
+            "objectId": f"template_slide_{n}",
+            "pageElements": [
+                {"shape": {"text": {"textElements": [{"textRun": {"content": text}}]}}}
+                for text in (f"{{{{slide{n}.title}}}}", f"{{{{slide{n}.content}}}}")
+            ],
+        }
+        for n in range(1, SLIDES_PER_DECK + 1)
+    ]
+
+    with serving(workspace) as root_url:
+        # mcp_server/main.py reads these when it is imported.
+        os.environ["GOOGLE_API_ROOT_URL"] = root_url
+        os.environ["SLIDE_TEMPLATES"] = json.dumps({"report": TEMPLATE_ID})
+        calls = {
+            **main_server_calls(),
+            **client_library_calls(root_url, args.concurrency),
+        }
+
+        quota = args.quota_per_minute or "no"
+        print(
+            f"\n🧪 MCP load test: {args.requests} requests per endpoint, "
+            f"{args.concurrency} concurrent; fake APIs {args.api_latency_ms:.0f}ms, "
+            f"{args.error_rate:.0%} errors, {quota} quota"
+        )
+        print(
+            f"  {'endpoint':<36} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'errors':>7}"
+        )
+        for endpoint, call in calls.items():
+            result = asyncio.run(
+                run_endpoint(endpoint, call, args.concurrency, args.requests)
+            )
+            print(
+                f"  {endpoint:<36} {result.throughput_rps:7.1f} "
+                f"{result.percentile_ms(0.5):6.0f}ms "
+                f"{result.percentile_ms(0.95):6.0f}ms "
+                f"{result.percentile_ms(0.99):6.0f}ms {result.errors:>7}"
+            )
+
+    print("\n  Fake API calls (503s, 429s):")
+    for api in sorted(workspace.calls):
+        print(
+            f"  {api:<10} {workspace.calls[api]:>7} "
+            f"({workspace.errors[api]}, {workspace.throttled[api]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Slides MCP benchmark: building Google API services per request vs. reusing them.
+
+Runs the API calls of `generate_slides` (create, share, batchUpdate) from a
+thread pool the size of FastAPI's, against an in-process HTTP transport that
+answers after a fixed latency, so only the client-side cost is measured:
+`build` per request (the previous behaviour) against `GoogleServices`.
+
+Usage:
+    uv run python -m benchmarks.slides_service_reuse
+    uv run python -m benchmarks.slides_service_reuse --api-latency-ms 20
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest import mock
+
+import httplib2
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+
+from mcp_server.google_services import GoogleServices
+
+# The default size of the thread pool FastAPI runs sync endpoints in.
+THREADS = 40
+
+
+class FakeHttp(httplib2.Http):
+    """Answers every request with a presentation id after `latency_seconds`."""
+
+    latency_seconds = 0.0
+
+    def request(self, uri: str, method: str = "GET", *args: Any, **kwargs: Any):
+        time.sleep(self.latency_seconds)
+        body = json.dumps({"presentationId": "presentation", "id": "permission"})
+        return httplib2.Response({"status": "200"}), body.encode()
+
+
+def _calls(presentations: Any, permissions: Any) -> list[Any]:
+    return [
+        presentations.create(body={"title": "Benchmark"}),
+        permissions.create(
+            fileId="presentation",
+            body={"type": "user", "role": "writer", "emailAddress": "a@b.c"},
+            fields="id",
+        ),
+        presentations.batchUpdate(presentationId="presentation", body={"requests": []}),
+    ]
+
+
+def rebuild_per_request(credentials: AnonymousCredentials) -> None:
+    slides = build("slides", "v1", credentials=credentials)
+    drive = build("drive", "v3", credentials=credentials)
+    for call in _calls(slides.presentations(), drive.permissions()):
+        call.execute()
+
+
+def reuse_services(services: GoogleServices) -> None:
+    for call in _calls(services.presentations, services.permissions):
+        services.execute(call)
+
+
+def run(handler: Any, argument: Any, requests: int) -> float:
+    """Run `requests` handler calls on the thread pool; return requests/s."""
+    with ThreadPoolExecutor(THREADS) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda _: handler(argument), range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    FakeHttp.latency_seconds = args.api_latency_ms / 1000
+    credentials = AnonymousCredentials()
+    services = GoogleServices(lambda: credentials)
+    with mock.patch("httplib2.Http", FakeHttp):
+        # Warm up imports and the (cached) services.
+        rebuild_per_request(credentials)
+        reuse_services(services)
+        before = run(rebuild_per_request, credentials, args.requests)
+        after = run(reuse_services, services, args.requests)
+
+    print(
+        f"\n🛝 generate_slides API calls: {args.requests} requests, "
+        f"{THREADS} threads, {args.api_latency_ms:.0f}ms per call"
+    )
+    print(f"  {'build per request (previous)':<32} {before:10.0f} requests/s")
+    print(f"  {'shared services':<32} {after:10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Span exporter benchmark: CloudTraceLoggingSpanExporter throughput.
+
+Spans are exported to a `FakeLoggingClient` that adds a fixed latency per
+write request (and to a no-op Cloud Trace client), comparing one Cloud Logging
+request per span with batched writes. Exports are made the way the span
+processors make them: `BatchSpanProcessor` exports up to 512 spans at a time,
+`SimpleSpanProcessor` one span at a time.
+
+Usage:
+    uv run python -m benchmarks.span_exporter_throughput
+    uv run python -m benchmarks.span_exporter_throughput --write-latency-ms 50
+"""
+
+import argparse
+import time
+from unittest import mock
+
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+
+from app.utils.tracing import CloudTraceLoggingSpanExporter
+from benchmarks.fakes import FakeLoggingClient
+
+# BatchSpanProcessor's default max_export_batch_size.
+PROCESSOR_BATCH_SIZE = 512
+
+
+def make_spans(count: int, attribute_bytes: int) -> list[ReadableSpan]:
+    """Finished spans with attributes the size of a typical LLM call span."""
+    tracer = TracerProvider().get_tracer(__name__)
+    spans = []
+    for i in range(count):
+        span = tracer.start_span(f"call_llm {i}")
+        span.set_attribute("gcp.vertex.agent.llm_request", "x" * attribute_bytes)
+        span.set_attribute("gcp.vertex.agent.invocation_id", f"e-{i}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def run(
+    spans: list[ReadableSpan],
+    export_size: int,
+    write_latency_seconds: float,
+    **exporter_kwargs: float,
+) -> tuple[float, int]:
+    """Export `spans` in chunks of `export_size`; return (seconds, requests)."""
+    logging_client = FakeLoggingClient(write_latency_seconds)
+    exporter = CloudTraceLoggingSpanExporter(
+        project_id="benchmark-project",
+        client=mock.Mock(),
+        logging_client=logging_client,
+        storage_client=mock.Mock(),
+        **exporter_kwargs,
+    )
+    start = time.perf_counter()
+    for i in range(0, len(spans), export_size):
+        exporter.export(spans[i : i + export_size])
+    exporter.shutdown()
+    elapsed = time.perf_counter() - start
+    assert logging_client.entries == len(spans)
+    return elapsed, logging_client.requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spans", type=int, default=2000)
+    parser.add_argument("--attribute-bytes", type=int, default=2000)
+    parser.add_argument("--write-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    spans = make_spans(args.spans, args.attribute_bytes)
+    latency = args.write_latency_ms / 1000
+    scenarios = [
+        ("per span (previous)", PROCESSOR_BATCH_SIZE, {"log_batch_size": 1}),
+        ("batched", PROCESSOR_BATCH_SIZE, {}),
+        (
+            "one span per export, 1s flush",
+            1,
+            {"log_flush_interval_seconds": 1.0},
+        ),
+    ]
+
+    print(
+        f"\n📤 Span exporter: {args.spans} spans, "
+        f"{args.write_latency_ms:.0f}ms per Cloud Logging write"
+    )
+    print(f"  {'scenario':<32} {'spans/s':>10} {'requests':>9}")
+    for name, export_size, kwargs in scenarios:
+        elapsed, requests = run(spans, export_size, latency, **kwargs)
+        print(f"  {name:<32} {args.spans / elapsed:10.0f} {requests:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Start-up benchmark: module-level import cost of the Agent Engine entry points.
+
+Each module is imported in a fresh interpreter with `-X importtime`, so the
+numbers reflect a cold replica rather than a warm test process.
+
+Usage:
+    uv run python -m benchmarks.startup_import_cost
+    uv run python -m benchmarks.startup_import_cost --repeat 5 app.agent_engine_app
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = [
+    "app.agent_engine_app",
+    "app.agent.root_agent.agent",
+    "app.agent_engine_deploy",
+]
+
+# Modules only needed at deploy time (or lazily in set_up); their presence in a
+# runtime import is worth calling out. resourcemanager/iam_policy protobufs are
+# not listed because aiplatform itself imports them.
+DEPLOY_TIME_MODULES = [
+    "google.cloud.iam_admin_v1",
+    "google.cloud.logging",
+    "opentelemetry.sdk.trace",
+    "app.agent.root_agent.agent",
+    "app.agent_engine_deploy",
+]
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    timings: dict[str, tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        timings[module.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(module: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def report(module: str, repeat: int, top: int) -> None:
+    runs = [measure(module) for _ in range(repeat)]
+    totals_ms = [run[module][1] / 1000 for run in runs]
+    last = runs[-1]
+
+    print(f"\n📦 {module}")
+    print(
+        f"   cumulative import: median {statistics.median(totals_ms):8.1f} ms  "
+        f"min {min(totals_ms):8.1f} ms  ({repeat} run(s))"
+    )
+    print(f"   modules imported:  {len(last)}")
+
+    loaded = [name for name in DEPLOY_TIME_MODULES if name in last and name != module]
+    if loaded:
+        print(f"   deploy-time modules pulled in: {', '.join(loaded)}")
+
+    heaviest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    print(f"   top {top} by self time:")
+    for name, (self_us, cumulative_us) in heaviest:
+        print(f"     {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cum  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        report(module, args.repeat, args.top)
+
+
+if __name__ == "__main__":
+    main()
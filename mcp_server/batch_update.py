@@ -0,0 +1,149 @@
+"""
+Slides batchUpdate for decks of any size.
+
+One `batchUpdate` with every request of a large deck can go over the API's
+request size limits, and then the whole deck fails. `batch_update` splits the
+requests into batches bounded by request count and JSON size and runs them in
+order. A `create*` request and the requests after it that refer to the
+objects it creates (e.g. the inserts into the slide's placeholders) are kept in
+one batch, so every slide is added whole.
+Batches that fail with 429 or 5xx are retried with jittered exponential
+backoff, and the time each batch took is logged and returned.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from googleapiclient.errors import HttpError
+
+from mcp_server.google_services import GoogleServices
+
+DEFAULT_MAX_REQUESTS_PER_BATCH = 100
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_INITIAL_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 32.0
+
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _created_ids(request: dict[str, Any]) -> set[str]:
+    ((kind, body),) = request.items()
+    if not kind.startswith("create"):
+        return set()
+    mappings = body.get("placeholderIdMappings", [])
+    ids = {body.get("objectId"), *(mapping["objectId"] for mapping in mappings)}
+    ids.discard(None)
+    return ids
+
+
+@dataclass
+class BatchTiming:
+    """How one batch went."""
+
+    requests: int
+    attempts: int
+    seconds: float
+
+
+def chunk_requests(
+    requests: list[dict[str, Any]],
+    max_requests: int = DEFAULT_MAX_REQUESTS_PER_BATCH,
+    max_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+) -> list[list[dict[str, Any]]]:
+    """
+    Split batchUpdate requests into batches, keeping their order.
+
+    A request that refers to an object created by an earlier request (by its
+    `objectId`) is never split from it. A group of such requests over the
+    limits on its own becomes a batch of its own.
+
+    :param requests: The requests, in the order they must be applied
+    :param max_requests: The most requests per batch
+    :param max_bytes: The largest JSON size of a batch's requests
+    :return: The batches
+    """
+    groups: list[list[dict[str, Any]]] = []
+    group_ids: set[str] = set()
+    for request in requests:
+        ((_, body),) = request.items()
+        if not groups or body.get("objectId") not in group_ids:
+            groups.append([])
+            group_ids = set()
+        groups[-1].append(request)
+        group_ids |= _created_ids(request)
+
+    batches: list[list[dict[str, Any]]] = []
+    batch: list[dict[str, Any]] = []
+    size = 0
+    for group in groups:
+        group_size = sum(len(json.dumps(request)) for request in group)
+        if batch and (
+            len(batch) + len(group) > max_requests or size + group_size > max_bytes
+        ):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.extend(group)
+        size += group_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def batch_update(
+    services: GoogleServices,
+    presentation_id: str,
+    requests: list[dict[str, Any]],
+    max_requests_per_batch: int = DEFAULT_MAX_REQUESTS_PER_BATCH,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    initial_backoff_seconds: float = DEFAULT_INITIAL_BACKOFF_SECONDS,
+    max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+) -> list[BatchTiming]:
+    """
+    Apply requests to a presentation in size-bounded batches, in order.
+
+    :param services: The services to call the Slides API with
+    :param presentation_id: The presentation to update
+    :param requests: The batchUpdate requests
+    :param max_requests_per_batch: The most requests per batch
+    :param max_batch_bytes: The largest JSON size of a batch's requests
+    :param max_attempts: Attempts per batch on 429 and 5xx responses
+    :param initial_backoff_seconds: The upper bound of the first retry delay,
+        doubled for each retry
+    :param max_backoff_seconds: The largest upper bound of a retry delay
+    :return: The timing of each batch
+    """
+    batches = chunk_requests(requests, max_requests_per_batch, max_batch_bytes)
+    timings = []
+    for number, batch in enumerate(batches, start=1):
+        start = time.perf_counter()
+        for attempt in range(1, max_attempts + 1):
+            try:
+                await services.execute_async(
+                    services.presentations.batchUpdate(
+                        presentationId=presentation_id, body={"requests": batch}
+                    )
+                )
+                break
+            except HttpError as e:
+                last_attempt = attempt == max_attempts
+                if last_attempt or e.resp.status not in _RETRYABLE_STATUSES:
+                    raise
+                backoff = min(
+                    initial_backoff_seconds * 2 ** (attempt - 1), max_backoff_seconds
+                )
+                await asyncio.sleep(random.uniform(0, backoff))
+        timing = BatchTiming(len(batch), attempt, time.perf_counter() - start)
+        timings.append(timing)
+        logging.info(
+            f"batchUpdate {number}/{len(batches)} of {presentation_id}: "
+            f"{timing.requests} requests, {timing.attempts} attempt(s), "
+            f"{timing.seconds:.2f}s"
+        )
+    return timings
@@ -0,0 +1,129 @@
+"""
+Process-wide Google credentials with refresh-ahead.
+
+One `CredentialManager` per process loads the credentials once and a
+background thread refreshes them `refresh_margin_seconds` before they expire,
+so request handlers get a valid token without refreshing it or touching the
+token file themselves. Only a cold start (or a refresh thread that has fallen
+behind) makes a caller wait.
+"""
+
+import datetime
+import logging
+import threading
+from collections.abc import Callable
+
+import google.auth.credentials
+import requests
+from google.auth.transport.requests import Request
+
+# Refresh this long before expiry. google-auth itself refreshes a token in the
+# transport once it is within about four minutes of expiry, which is what this
+# stays ahead of.
+DEFAULT_REFRESH_MARGIN_SECONDS = 300.0
+# Retry delay after a failed refresh, and the check interval for credentials
+# without an expiry.
+DEFAULT_RETRY_SECONDS = 30.0
+_NO_EXPIRY_CHECK_SECONDS = 600.0
+
+Loader = Callable[[], google.auth.credentials.Credentials]
+Saver = Callable[[google.auth.credentials.Credentials], None]
+
+
+def _utcnow() -> datetime.datetime:
+    # google-auth keeps `expiry` as a naive UTC datetime.
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """Holds one credential object and keeps it fresh in the background."""
+
+    def __init__(
+        self,
+        loader: Loader,
+        saver: Saver | None = None,
+        refresh_margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ) -> None:
+        """
+        :param loader: Loads the credentials (once per process)
+        :param saver: Persists refreshed credentials, e.g. to token.json;
+            called on the refresh thread
+        :param refresh_margin_seconds: Refresh this long before expiry
+        :param retry_seconds: Wait this long after a failed refresh
+        """
+        self.loader = loader
+        self.saver = saver
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+        self._credentials: google.auth.credentials.Credentials | None = None
+        self._lock = threading.Lock()
+        self._request = Request(session=requests.Session())
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get(self) -> google.auth.credentials.Credentials:
+        """The current credentials, loading or refreshing them only if needed."""
+        credentials = self._credentials
+        if credentials is not None and credentials.valid:
+            return credentials
+        return self.refresh(force=False)
+
+    def refresh(self, force: bool = True) -> google.auth.credentials.Credentials:
+        """
+        Load the credentials if needed and refresh them if they are due.
+
+        :param force: Refresh even if the token is not yet due
+        :return: The refreshed credentials
+        """
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self.loader()
+            credentials = self._credentials
+            if force or self._due(credentials):
+                credentials.refresh(self._request)
+                if self.saver is not None:
+                    self.saver(credentials)
+            return credentials
+
+    def _due(self, credentials: google.auth.credentials.Credentials) -> bool:
+        if not credentials.valid:
+            return True
+        expiry = credentials.expiry
+        if expiry is None:
+            return False
+        remaining = (expiry - _utcnow()).total_seconds()
+        return remaining <= self.refresh_margin_seconds
+
+    def _seconds_until_due(self) -> float:
+        expiry = self._credentials.expiry if self._credentials else None
+        if expiry is None:
+            return _NO_EXPIRY_CHECK_SECONDS
+        remaining = (expiry - _utcnow()).total_seconds()
+        return max(1.0, remaining - self.refresh_margin_seconds)
+
+    def start(self) -> None:
+        """Start refreshing in the background (loading the credentials first)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="credential-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh(force=False)
+                delay = self._seconds_until_due()
+            except Exception:
+                logging.exception("Failed to refresh Google credentials")
+                delay = self.retry_seconds
+            self._stop.wait(delay)
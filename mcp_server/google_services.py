@@ -0,0 +1,155 @@
+"""
+Google API service objects shared across requests.
+
+Building a service with `googleapiclient.discovery.build` parses its discovery
+document and creates a new HTTP transport, which costs more than the API calls
+a request makes. `GoogleServices` builds each service once, from the discovery
+documents bundled with the client library, and executes requests on an
+authorized transport per thread: `httplib2.Http` is not thread-safe, and
+keeping one per thread reuses its connections across requests. Collections
+(e.g. `presentations()`) are cached too, since calling one builds its methods,
+docstrings included, from the discovery document again.
+
+`execute_async` runs a request from asyncio on a thread pool per upstream API,
+sized to that API's concurrency cap, so independent calls can be awaited
+together without any one API getting more calls in flight than its cap.
+"""
+
+import asyncio
+import json
+import threading
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import google.auth.credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import Resource, build, build_from_document
+from googleapiclient.http import HttpRequest, build_http
+
+# Calls in flight per upstream API (the first part of a request's method id,
+# e.g. "slides" or "drive"), unless configured otherwise.
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+class GoogleServices:
+    """Service objects built once, executed on per-thread transports."""
+
+    def __init__(
+        self,
+        credentials: Callable[[], google.auth.credentials.Credentials],
+        max_concurrency: Mapping[str, int] | None = None,
+        root_url: str | None = None,
+    ) -> None:
+        """
+        :param credentials: Returns the current credentials, e.g.
+            `CredentialManager.get`
+        :param max_concurrency: Calls in flight per upstream API for
+            `execute_async`, e.g. {"drive": 4}; `DEFAULT_MAX_CONCURRENCY` for
+            the others
+        :param root_url: Send requests here instead of to the APIs' own root
+            URLs, e.g. "http://localhost:8090/" for a fake Workspace API
+        """
+        self.credentials = credentials
+        self.max_concurrency = dict(max_concurrency or {})
+        self.root_url = root_url
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._resources: dict[tuple[str, ...], Resource] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _cached(self, key: tuple[str, ...], create: Callable[[], Resource]) -> Resource:
+        resource = self._resources.get(key)
+        if resource is None:
+            with self._lock:
+                resource = self._resources.get(key)
+                if resource is None:
+                    resource = create()
+                    self._resources[key] = resource
+        return resource
+
+    def service(self, name: str, version: str) -> Resource:
+        """
+        The service object for an API, built on first use.
+
+        Its requests must be run with `execute`: the service's own transport
+        is not authorized.
+        """
+        return self._cached((name, version), lambda: self._build(name, version))
+
+    def _build(self, name: str, version: str) -> Resource:
+        if self.root_url is None:
+            return build(
+                name,
+                version,
+                http=build_http(),
+                static_discovery=True,
+                cache_discovery=False,
+            )
+        document = json.loads(discovery_cache.get_static_doc(name, version))
+        document["rootUrl"] = self.root_url
+        return build_from_document(document, http=build_http())
+
+    def collection(self, name: str, version: str, collection: str) -> Resource:
+        """A collection of an API's service, e.g. Slides `presentations`."""
+        service = self.service(name, version)
+        return self._cached(
+            (name, version, collection), lambda: getattr(service, collection)()
+        )
+
+    @property
+    def presentations(self) -> Resource:
+        return self.collection("slides", "v1", "presentations")
+
+    @property
+    def permissions(self) -> Resource:
+        return self.collection("drive", "v3", "permissions")
+
+    @property
+    def files(self) -> Resource:
+        return self.collection("drive", "v3", "files")
+
+    def http(self) -> AuthorizedHttp:
+        """The calling thread's transport, authorized with the current credentials."""
+        credentials = self.credentials()
+        http = getattr(self._local, "http", None)
+        if http is None or http.credentials is not credentials:
+            http = AuthorizedHttp(credentials, http=build_http())
+            self._local.http = http
+        return http
+
+    def execute(self, request: HttpRequest) -> Any:
+        """Run a request built from one of the services on this thread's transport."""
+        return request.execute(http=self.http())
+
+    def _executor(self, api: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(api)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(api)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        self.max_concurrency.get(api, DEFAULT_MAX_CONCURRENCY),
+                        thread_name_prefix=f"google-api-{api}",
+                    )
+                    self._executors[api] = executor
+        return executor
+
+    async def execute_async(self, request: HttpRequest) -> Any:
+        """
+        Run a request on its upstream API's thread pool.
+
+        :param request: A request built from one of the services
+        :return: The response
+        """
+        api = request.methodId.split(".", 1)[0]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(api), self.execute, request)
+
+    def shutdown(self) -> None:
+        """Shut the thread pools down after their calls complete."""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True)
@@ -0,0 +1,127 @@
+"""
+Idempotent request handling: in-flight coalescing and a TTL result cache.
+
+An agent that retries a tool call sends the same request again, often while
+the first one is still running. `IdempotencyCache.run` makes every call with
+the same key share one task, and returns the result of a completed call for
+`ttl_seconds` instead of running it again. Failures are not cached, so a
+retry after an error runs the call again. A key can be bound to a fingerprint
+of the request body: reusing it with a different body raises
+`IdempotencyKeyReused` rather than returning the other body's result.
+
+The cache belongs to one event loop (one server process).
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 1024
+
+T = TypeVar("T")
+
+
+class IdempotencyKeyReused(ValueError):
+    """An idempotency key was reused with a different request body."""
+
+
+def request_key(request: BaseModel) -> str:
+    """A key for a request body: the SHA-256 of its canonical JSON."""
+    body = json.dumps(request.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyCache(Generic[T]):
+    """Coalesces concurrent calls by key and caches their results for a TTL."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """
+        :param ttl_seconds: How long a completed result is returned
+        :param max_entries: The most results kept; the oldest are evicted
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.coalesced = 0
+        # Result (or task) by key, with the fingerprint it was created with.
+        self._results: OrderedDict[str, tuple[float, str | None, T]] = OrderedDict()
+        self._in_flight: dict[str, tuple[str | None, asyncio.Task[T]]] = {}
+
+    def _cached(self, key: str) -> tuple[bool, str | None, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None, None
+        expires_at, fingerprint, result = entry
+        if expires_at <= time.monotonic():
+            del self._results[key]
+            return False, None, None
+        return True, fingerprint, result
+
+    def _store(self, key: str, fingerprint: str | None, result: T) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._results[key] = (expires_at, fingerprint, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _check(key: str, expected: str | None, fingerprint: str | None) -> None:
+        if expected != fingerprint:
+            raise IdempotencyKeyReused(
+                f"Idempotency key {key!r} was used with a different request."
+            )
+
+    async def run(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        fingerprint: str | None = None,
+    ) -> T:
+        """
+        Return the result for `key`, running `call` only if no call with the
+        same key is in flight or completed within the TTL.
+
+        :param key: The idempotency key
+        :param call: Produces the result
+        :param fingerprint: Identifies the request, e.g. `request_key` of its
+            body; the key only matches calls with the same fingerprint
+        :return: The result
+        :raises IdempotencyKeyReused: If the in-flight or cached call for the
+            key has a different fingerprint
+        """
+        found, expected, result = self._cached(key)
+        if found:
+            self._check(key, expected, fingerprint)
+            self.hits += 1
+            return result
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = (fingerprint, task)
+            task.add_done_callback(lambda done: self._finish(key, fingerprint, done))
+        else:
+            expected, task = in_flight
+            self._check(key, expected, fingerprint)
+            self.coalesced += 1
+        # A caller that disconnects does not cancel the call the others await.
+        return await asyncio.shield(task)
+
+    def _finish(
+        self, key: str, fingerprint: str | None, task: "asyncio.Task[T]"
+    ) -> None:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None and in_flight[1] is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, fingerprint, task.result())
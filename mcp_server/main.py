@@ -1,23 +1,118 @@
+import asyncio
+import json
 import logging
 import os
+import re
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from typing import Annotated, Any
 
 import google.auth
-from fastapi import FastAPI, HTTPException
-from google.auth.transport.requests import Request
+import google.auth.credentials
+from fastapi import FastAPI, Header, HTTPException
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from pydantic import BaseModel
 
+from mcp_server.batch_update import batch_update
+from mcp_server.credentials import CredentialManager
+from mcp_server.google_services import DEFAULT_MAX_CONCURRENCY, GoogleServices
+from mcp_server.idempotency import (
+    DEFAULT_TTL_SECONDS,
+    IdempotencyCache,
+    IdempotencyKeyReused,
+    request_key,
+)
+
 # --- Configuration ---
+# Template decks by name, as JSON, e.g. {"weekly_report": "<Drive file ID>"}.
+SLIDE_TEMPLATES: dict[str, str] = json.loads(os.environ.get("SLIDE_TEMPLATES", "{}"))
 SCOPES = [
     "https://www.googleapis.com/auth/presentations",
     "https://www.googleapis.com/auth/drive.file",
 ]
+if SLIDE_TEMPLATES:
+    # Templates are not created by this app, so drive.file does not cover them.
+    SCOPES.append("https://www.googleapis.com/auth/drive.readonly")
+# Calls in flight to each Google API, across all requests.
+SLIDES_API_MAX_CONCURRENCY = int(
+    os.environ.get("SLIDES_API_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+)
+DRIVE_API_MAX_CONCURRENCY = int(
+    os.environ.get("DRIVE_API_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+)
+# Where to send Google API requests instead of googleapis.com, e.g. the fake
+# Workspace API of benchmarks/fake_workspace.py; no credentials are used then.
+GOOGLE_API_ROOT_URL = os.environ.get("GOOGLE_API_ROOT_URL")
+# How long a repeated request gets the presentation of the first one.
+IDEMPOTENCY_TTL_SECONDS = float(
+    os.environ.get("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+)
+
+
+# --- Credentials ---
+def _load_credentials() -> google.auth.credentials.Credentials:
+    """Loads the Google credentials for the application."""
+    if GOOGLE_API_ROOT_URL:
+        return google.auth.credentials.AnonymousCredentials()
+    # For Cloud Run, use Application Default Credentials
+    if os.environ.get("K_SERVICE"):
+        creds, project = google.auth.default(scopes=SCOPES)
+        return creds
+    # For local development, use user's gcloud credentials; an expired token
+    # with a refresh token is refreshed by the credential manager.
+    if os.path.exists("token.json"):
+        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+        if creds.valid or creds.refresh_token:
+            return creds
+    # This will trigger the OAuth flow in a local environment
+    # if no token.json is present.
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
+    creds = flow.run_local_server(port=0)
+    _save_token(creds)
+    return creds
+
+
+def _save_token(creds: google.auth.credentials.Credentials) -> None:
+    if os.environ.get("K_SERVICE"):
+        return
+    with open("token.json", "w") as token:
+        token.write(creds.to_json())
+
+
+# One credential object per process, refreshed ahead of expiry in the
+# background so that requests never wait on a token refresh or token.json.
+credential_manager = CredentialManager(_load_credentials, saver=_save_token)
+# Slides and Drive services, built once and shared by all requests, with a cap
+# on the calls in flight to each API.
+google_services = GoogleServices(
+    credential_manager.get,
+    max_concurrency={
+        "slides": SLIDES_API_MAX_CONCURRENCY,
+        "drive": DRIVE_API_MAX_CONCURRENCY,
+    },
+    root_url=GOOGLE_API_ROOT_URL,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    credential_manager.start()
+    # Build the services before the first request rather than during it.
+    google_services.collection("slides", "v1", "presentations")
+    google_services.collection("drive", "v3", "permissions")
+    google_services.collection("drive", "v3", "files")
+    yield
+    google_services.shutdown()
+    credential_manager.stop()
+
 
 # --- FastAPI App ---
 app = FastAPI(
     title="MCP Server for Google Slides",
     description="A server to generate Google Slides presentations.",
+    lifespan=lifespan,
 )
 
 
@@ -31,150 +126,260 @@ class PresentationRequest(BaseModel):
     title: str
     slides: list[Slide]
     email: str
+    # The name of a template in SLIDE_TEMPLATES to copy instead of building
+    # the slides one by one.
+    template: str | None = None
 
 
 class PresentationResponse(BaseModel):
     presentation_url: str
 
 
+# Presentations of recent and in-flight requests, by idempotency key.
+presentation_results: IdempotencyCache[PresentationResponse] = IdempotencyCache(
+    ttl_seconds=IDEMPOTENCY_TTL_SECONDS
+)
+
+
 # --- Helper Functions ---
-def get_credentials() -> Credentials:
+def get_credentials() -> google.auth.credentials.Credentials:
     """Gets the Google credentials for the application."""
-    # For Cloud Run, use Application Default Credentials
-    if os.environ.get("K_SERVICE"):
-        creds, project = google.auth.default(scopes=SCOPES)
-        return creds
-    else:
-        # For local development, use user's gcloud credentials
-        creds = None
-        if os.path.exists("token.json"):
-            creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                # This will trigger the OAuth flow in a local environment
-                # if no token.json is present.
-                from google_auth_oauthlib.flow import InstalledAppFlow
-
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    "credentials.json", SCOPES
-                )
-                creds = flow.run_local_server(port=0)
-            with open("token.json", "w") as token:
-                token.write(creds.to_json())
-        return creds
-
+    return credential_manager.get()
 
-# --- API Endpoints ---
-@app.post("/generate_slides", response_model=PresentationResponse)
-def generate_slides(request: PresentationRequest) -> PresentationResponse:
-    """Generates a Google Slides presentation."""
-    try:
-        creds = get_credentials()
-        slides_service = build("slides", "v1", credentials=creds)
-        drive_service = build("drive", "v3", credentials=creds)
-
-        # Create the presentation
-        presentation = (
-            slides_service.presentations()
-            .create(body={"title": request.title})
-            .execute()
-        )
-        presentation_id = presentation.get("presentationId")
-        presentation_url = (
-            f"https://docs.google.com/presentation/d/{presentation_id}/edit"
-        )
 
-        # Share the presentation with the user
-        permission = {"type": "user", "role": "writer", "emailAddress": request.email}
-        drive_service.permissions().create(
-            fileId=presentation_id, body=permission, fields="id"
-        ).execute()
-
-        # Add slides
-        requests = []
-        for i, slide_data in enumerate(request.slides):
-            # Title slide
-            if i == 0:
-                requests.append(
-                    {
-                        "createSlide": {
-                            "slideLayoutReference": {"predefinedLayout": "TITLE"},
-                            "placeholderIdMappings": [
-                                {
-                                    "layoutPlaceholder": {"type": "CENTERED_TITLE"},
-                                    "objectId": f"title_{i}",
-                                },
-                                {
-                                    "layoutPlaceholder": {"type": "SUBTITLE"},
-                                    "objectId": f"subtitle_{i}",
-                                },
-                            ],
-                        }
+def _slide_requests(slides: list[Slide]) -> list[dict[str, Any]]:
+    """The batchUpdate requests that create and fill in the slides."""
+    requests = []
+    for i, slide_data in enumerate(slides):
+        # Title slide
+        if i == 0:
+            requests.append(
+                {
+                    "createSlide": {
+                        "slideLayoutReference": {"predefinedLayout": "TITLE"},
+                        "placeholderIdMappings": [
+                            {
+                                "layoutPlaceholder": {"type": "CENTERED_TITLE"},
+                                "objectId": f"title_{i}",
+                            },
+                            {
+                                "layoutPlaceholder": {"type": "SUBTITLE"},
+                                "objectId": f"subtitle_{i}",
+                            },
+                        ],
                     }
-                )
-                requests.append(
-                    {
-                        "insertText": {
-                            "objectId": f"title_{i}",
-                            "text": slide_data.title,
-                        }
+                }
+            )
+            requests.append(
+                {
+                    "insertText": {
+                        "objectId": f"title_{i}",
+                        "text": slide_data.title,
                     }
-                )
-                requests.append(
-                    {
-                        "insertText": {
-                            "objectId": f"subtitle_{i}",
-                            "text": slide_data.content,
-                        }
+                }
+            )
+            requests.append(
+                {
+                    "insertText": {
+                        "objectId": f"subtitle_{i}",
+                        "text": slide_data.content,
                     }
-                )
-            else:
-                # Content slide
-                requests.append(
-                    {
-                        "createSlide": {
-                            "slideLayoutReference": {
-                                "predefinedLayout": "TITLE_AND_BODY"
+                }
+            )
+        else:
+            # Content slide
+            requests.append(
+                {
+                    "createSlide": {
+                        "slideLayoutReference": {
+                            "predefinedLayout": "TITLE_AND_BODY"
+                        },
+                        "placeholderIdMappings": [
+                            {
+                                "layoutPlaceholder": {"type": "TITLE"},
+                                "objectId": f"title_{i}",
+                            },
+                            {
+                                "layoutPlaceholder": {"type": "BODY"},
+                                "objectId": f"body_{i}",
                             },
-                            "placeholderIdMappings": [
-                                {
-                                    "layoutPlaceholder": {"type": "TITLE"},
-                                    "objectId": f"title_{i}",
-                                },
-                                {
-                                    "layoutPlaceholder": {"type": "BODY"},
-                                    "objectId": f"body_{i}",
-                                },
-                            ],
-                        }
+                        ],
                     }
-                )
-                requests.append(
-                    {
-                        "insertText": {
-                            "objectId": f"title_{i}",
-                            "text": slide_data.title,
-                        }
+                }
+            )
+            requests.append(
+                {
+                    "insertText": {
+                        "objectId": f"title_{i}",
+                        "text": slide_data.title,
                     }
-                )
-                requests.append(
-                    {
-                        "insertText": {
-                            "objectId": f"body_{i}",
-                            "text": slide_data.content,
-                        }
+                }
+            )
+            requests.append(
+                {
+                    "insertText": {
+                        "objectId": f"body_{i}",
+                        "text": slide_data.content,
                     }
-                )
+                }
+            )
+    return requests
+
+
+# The placeholders `_template_requests` fills in.
+_PLACEHOLDER = re.compile(r"\{\{(title|slide\d+\.(?:title|content))\}\}")
+_SLIDE_PLACEHOLDER = re.compile(r"slide(\d+)\.(?:title|content)")
+# The placeholders of each template, read on first use; a template edited
+# while the server runs keeps its old placeholders until a restart.
+_template_placeholders: dict[str, set[str]] = {}
 
-        if requests:
-            slides_service.presentations().batchUpdate(
-                presentationId=presentation_id, body={"requests": requests}
-            ).execute()
 
-        return PresentationResponse(presentation_url=presentation_url)
+async def _placeholders(template: str) -> set[str]:
+    """The placeholders in a template deck, e.g. {"title", "slide1.title"}."""
+    if template not in _template_placeholders:
+        deck = await google_services.execute_async(
+            google_services.presentations.get(
+                presentationId=SLIDE_TEMPLATES[template], fields="slides"
+            )
+        )
+        _template_placeholders[template] = {
+            match.group(1) for match in _PLACEHOLDER.finditer(json.dumps(deck))
+        }
+    return _template_placeholders[template]
+
+
+def _template_slide_count(placeholders: set[str]) -> int:
+    """How many slides of a request a template has placeholders for."""
+    numbers = [
+        int(match.group(1))
+        for name in placeholders
+        if (match := _SLIDE_PLACEHOLDER.fullmatch(name))
+    ]
+    return max(numbers, default=0)
+
+
+def _template_requests(
+    request: PresentationRequest, placeholders: set[str]
+) -> list[dict[str, Any]]:
+    """
+    The batchUpdate requests that fill in the placeholders of a template.
+
+    Templates contain `{{title}}` and, for the Nth slide of the request,
+    `{{slideN.title}}` and `{{slideN.content}}`. Placeholders of slides the
+    request does not have are replaced with "".
+    """
+    values = {"title": request.title}
+    for number, slide_data in enumerate(request.slides, start=1):
+        values[f"slide{number}.title"] = slide_data.title
+        values[f"slide{number}.content"] = slide_data.content
+    for name in sorted(placeholders - values.keys()):
+        values[name] = ""
+    return [
+        {
+            "replaceAllText": {
+                "containsText": {"text": f"{{{{{name}}}}}", "matchCase": True},
+                "replaceText": value,
+            }
+        }
+        for name, value in values.items()
+    ]
+
+
+async def _all_or_cancel(*calls: Awaitable[Any]) -> list[Any]:
+    """Await calls concurrently; on the first failure, cancel the others."""
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 
+async def _create_presentation(request: PresentationRequest) -> PresentationResponse:
+    """Creates, shares and fills in a presentation."""
+    if request.template is None:
+        # Create a blank presentation and build the slides
+        presentation = await google_services.execute_async(
+            google_services.presentations.create(body={"title": request.title})
+        )
+        presentation_id = presentation.get("presentationId")
+        requests = _slide_requests(request.slides)
+    else:
+        # Copy the template and fill in its placeholders
+        copy = await google_services.execute_async(
+            google_services.files.copy(
+                fileId=SLIDE_TEMPLATES[request.template],
+                body={"name": request.title},
+                fields="id",
+            )
+        )
+        presentation_id = copy["id"]
+        requests = _template_requests(
+            request, await _placeholders(request.template)
+        )
+    presentation_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
+
+    # Share the presentation with the user and add the slides; neither
+    # depends on the other, so they run concurrently. If one fails, the other
+    # is cancelled rather than left spending quota on a failed request.
+    permission = {"type": "user", "role": "writer", "emailAddress": request.email}
+    share = google_services.execute_async(
+        google_services.permissions.create(
+            fileId=presentation_id, body=permission, fields="id"
+        )
+    )
+    populate = batch_update(google_services, presentation_id, requests)
+    await _all_or_cancel(share, populate)
+
+    return PresentationResponse(presentation_url=presentation_url)
+
+
+# --- API Endpoints ---
+@app.post("/generate_slides", response_model=PresentationResponse)
+async def generate_slides(
+    request: PresentationRequest,
+    idempotency_key: Annotated[str | None, Header()] = None,
+) -> PresentationResponse:
+    """
+    Generates a Google Slides presentation.
+
+    With a `template`, the template deck is copied and its placeholders are
+    filled in: one copy and one batchUpdate instead of a slide-by-slide build.
+    A request with more slides than the template has placeholders for is
+    rejected with 400, since the extra slides would be lost; placeholders of
+    slides the request does not have are replaced with "".
+
+    Requests with the same Idempotency-Key header and body, or without one but
+    with the same body, create one presentation: a repeat while it is being
+    created waits for it, and a repeat within the TTL gets the same URL. An
+    Idempotency-Key reused with a different body within the TTL gets 422.
+    """
+    if request.template is not None and request.template not in SLIDE_TEMPLATES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown template: {request.template}"
+        )
+    fingerprint = request_key(request)
+    key = idempotency_key or fingerprint
+    try:
+        if request.template is not None:
+            slide_count = _template_slide_count(await _placeholders(request.template))
+            if len(request.slides) > slide_count:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"Template {request.template} has room for {slide_count} "
+                        f"slides, not {len(request.slides)}"
+                    ),
+                )
+        return await presentation_results.run(
+            key, lambda: _create_presentation(request), fingerprint=fingerprint
+        )
+    except HTTPException:
+        raise
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     except Exception as e:
         logging.error(f"Error generating slides: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) from e
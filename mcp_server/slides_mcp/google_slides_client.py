@@ -30,32 +30,33 @@ def get_drive_service():
 
 def create_presentation(title: str, drive_service, slides_service, parent_folder_id: str = None, source_presentation_id: str = None):
     """Creates a new presentation with the given title in the specified folder."""
-    if source_presentation_id:
-        # Copy the source presentation
-        copied_file = drive_service.files().copy(fileId=source_presentation_id, body={'name': title}).execute()
-        presentation_id = copied_file.get('id')
-        new_presentation = slides_service.presentations().get(presentationId=presentation_id).execute()
-    else:
-        # Create a new blank presentation
-        presentation = {
-            'title': title
-        }
-        new_presentation = slides_service.presentations().create(body=presentation).execute()
-        presentation_id = new_presentation.get('presentationId')
-
-        # Move to the specified folder if parent_folder_id is provided
-        if parent_folder_id:
-            file_id = presentation_id
-            # Retrieve the existing parents to remove them
-            file = drive_service.files().get(fileId=file_id, fields='parents').execute()
-            previous_parents = ",".join(file.get('parents'))
-            # Move the file to the new folder
-            drive_service.files().update(
-                fileId=file_id,
-                addParents=parent_folder_id,
-                removeParents=previous_parents,
-                fields='id, parents'
-            ).execute()
+    try:
+        if source_presentation_id:
+            # Copy the source presentation
+            copied_file = drive_service.files().copy(fileId=source_presentation_id, body={'name': title}).execute()
+            presentation_id = copied_file.get('id')
+            new_presentation = slides_service.presentations().get(presentationId=presentation_id).execute()
+        else:
+            # Create a new blank presentation
+            presentation = {
+                'title': title
+            }
+            new_presentation = slides_service.presentations().create(body=presentation).execute()
+            presentation_id = new_presentation.get('presentationId')
+
+            # Move to the specified folder if parent_folder_id is provided
+            if parent_folder_id:
+                file_id = presentation_id
+                # Retrieve the existing parents to remove them
+                file = drive_service.files().get(fileId=file_id, fields='parents').execute()
+                previous_parents = ",".join(file.get('parents'))
+                # Move the file to the new folder
+                drive_service.files().update(
+                    fileId=file_id,
+                    addParents=parent_folder_id,
+                    removeParents=previous_parents,
+                    fields='id, parents'
+                ).execute()
 
         return new_presentation
     except HttpError as error:
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from mcp_server import main
+from mcp_server.batch_update import batch_update, chunk_requests
+from mcp_server.main import Slide
+
+
+class FakeServices:
+    """Records batchUpdate calls; fails with the given statuses first."""
+
+    def __init__(self, statuses: list[int]) -> None:
+        self.statuses = statuses
+        self.batches: list[list[dict[str, Any]]] = []
+        self.presentations = self
+
+    def batchUpdate(self, presentationId: str, body: dict[str, Any]) -> Any:
+        return body["requests"]
+
+    async def execute_async(self, batch: list[dict[str, Any]]) -> dict[str, Any]:
+        if self.statuses:
+            status = self.statuses.pop(0)
+            raise HttpError(httplib2.Response({"status": status}), b"{}")
+        self.batches.append(batch)
+        return {}
+
+
+def test_chunks_keep_each_slide_whole() -> None:
+    requests = main._slide_requests(
+        [Slide(title=f"Slide {i}", content="x") for i in range(10)]
+    )
+    batches = chunk_requests(requests, max_requests=7)
+    assert [len(batch) for batch in batches] == [6, 6, 6, 6, 6]
+    assert [request for batch in batches for request in batch] == requests
+    assert all("createSlide" in batch[0] for batch in batches)
+
+
+def test_chunks_are_bounded_by_size() -> None:
+    requests = main._slide_requests(
+        [Slide(title="Slide", content="x" * 1000) for _ in range(4)]
+    )
+    batches = chunk_requests(requests, max_requests=100, max_bytes=3000)
+    assert [len(batch) for batch in batches] == [6, 6]
+
+
+def test_batches_are_retried_on_429_and_5xx() -> None:
+    services = FakeServices([429, 503])
+    requests = main._slide_requests([Slide(title="A", content="b")] * 3)
+    timings = asyncio.run(
+        batch_update(
+            services,
+            "deck",
+            requests,
+            max_requests_per_batch=3,
+            initial_backoff_seconds=0,
+        )
+    )
+    assert services.batches == [requests[0:3], requests[3:6], requests[6:9]]
+    assert [timing.attempts for timing in timings] == [3, 1, 1]
+
+
+def test_other_errors_are_not_retried() -> None:
+    services = FakeServices([400])
+    requests = main._slide_requests([Slide(title="A", content="b")])
+    with pytest.raises(HttpError):
+        asyncio.run(batch_update(services, "deck", requests))
+    assert services.batches == []
@@ -0,0 +1,66 @@
+import datetime
+import time
+
+from mcp_server.credentials import CredentialManager, _utcnow
+
+
+class FakeCredentials:
+    def __init__(self, lifetime_seconds: float) -> None:
+        self.lifetime_seconds = lifetime_seconds
+        self.refreshes = 0
+        self.expiry = _utcnow() + datetime.timedelta(seconds=lifetime_seconds)
+
+    @property
+    def valid(self) -> bool:
+        return _utcnow() < self.expiry
+
+    def refresh(self, request: object) -> None:
+        self.refreshes += 1
+        self.expiry = _utcnow() + datetime.timedelta(seconds=self.lifetime_seconds)
+
+
+def test_get_loads_once_and_does_not_refresh_valid_credentials() -> None:
+    loads = []
+
+    def loader() -> FakeCredentials:
+        loads.append(1)
+        return FakeCredentials(3600)
+
+    manager = CredentialManager(loader)
+    first = manager.get()
+    assert manager.get() is first
+    assert len(loads) == 1
+    assert first.refreshes == 0
+
+
+def test_refresh_within_margin_and_save() -> None:
+    credentials = FakeCredentials(60)
+    saved = []
+    manager = CredentialManager(
+        lambda: credentials, saver=saved.append, refresh_margin_seconds=300
+    )
+    manager.refresh(force=False)
+    assert credentials.refreshes == 1
+    assert saved == [credentials]
+
+
+def test_expired_credentials_are_refreshed_by_get() -> None:
+    credentials = FakeCredentials(3600)
+    credentials.expiry = _utcnow() - datetime.timedelta(seconds=1)
+    manager = CredentialManager(lambda: credentials)
+    assert manager.get().valid
+    assert credentials.refreshes == 1
+
+
+def test_background_thread_refreshes_ahead_of_expiry() -> None:
+    credentials = FakeCredentials(3)
+    manager = CredentialManager(lambda: credentials, refresh_margin_seconds=1.5)
+    manager.start()
+    try:
+        deadline = time.monotonic() + 5
+        while credentials.refreshes < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert credentials.refreshes >= 1
+        assert credentials.valid
+    finally:
+        manager.stop()
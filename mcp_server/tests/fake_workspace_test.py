@@ -0,0 +1,57 @@
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.errors import HttpError
+
+from benchmarks.fake_workspace import FakeWorkspace, FakeWorkspaceConfig, serving
+from mcp_server.google_services import GoogleServices
+
+
+def test_client_library_calls_are_served_from_memory() -> None:
+    workspace = FakeWorkspace(FakeWorkspaceConfig(latency_ms=0))
+    with serving(workspace) as root_url:
+        services = GoogleServices(AnonymousCredentials, root_url=root_url)
+        presentation = services.execute(
+            services.presentations.create(body={"title": "Deck"})
+        )
+        presentation_id = presentation["presentationId"]
+        services.execute(
+            services.presentations.batchUpdate(
+                presentationId=presentation_id,
+                body={"requests": [{"createSlide": {"objectId": "intro"}}]},
+            )
+        )
+        copy = services.execute(
+            services.files.copy(fileId=presentation_id, body={"name": "Copy"})
+        )
+        services.execute(
+            services.permissions.create(
+                fileId=copy["id"], body={"type": "user", "role": "writer"}
+            )
+        )
+        event = services.execute(
+            services.service("calendar", "v3")
+            .events()
+            .insert(calendarId="primary", body={"summary": "Visit"})
+        )
+
+    assert workspace.presentations[copy["id"]]["slides"] == [{"objectId": "intro"}]
+    assert workspace.permissions[copy["id"]][0]["role"] == "writer"
+    assert workspace.events["primary"] == [event]
+    assert workspace.calls == {"slides": 2, "drive": 2, "calendar": 1}
+
+
+def test_errors_and_quota_are_google_api_errors() -> None:
+    config = FakeWorkspaceConfig(latency_ms=0, quota_per_minute=2, error_rate=0.5)
+    workspace = FakeWorkspace(config)
+    statuses = []
+    with serving(workspace) as root_url:
+        services = GoogleServices(AnonymousCredentials, root_url=root_url)
+        for _ in range(6):
+            try:
+                services.execute(services.presentations.create(body={}))
+                statuses.append(200)
+            except HttpError as e:
+                statuses.append(e.resp.status)
+
+    assert statuses[2:] == [429, 429, 429, 429]
+    assert workspace.throttled["slides"] == 4
+    assert statuses[:2].count(503) == workspace.errors["slides"]
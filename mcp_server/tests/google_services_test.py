@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from typing import Any
+from unittest import mock
+
+import httplib2
+from google.auth.credentials import AnonymousCredentials
+
+from mcp_server.google_services import GoogleServices
+
+
+class RecordingHttp(httplib2.Http):
+    requests: list[str] = []
+
+    def request(self, uri: str, method: str = "GET", *args: Any, **kwargs: Any):
+        self.requests.append(f"{method} {uri}")
+        return httplib2.Response({"status": "200"}), b'{"presentationId": "p"}'
+
+
+def test_services_and_collections_are_built_once() -> None:
+    services = GoogleServices(AnonymousCredentials)
+    assert services.service("slides", "v1") is services.service("slides", "v1")
+    assert services.presentations is services.presentations
+    assert services.permissions is services.collection("drive", "v3", "permissions")
+
+
+def test_each_thread_gets_its_own_transport() -> None:
+    credentials = AnonymousCredentials()
+    services = GoogleServices(lambda: credentials)
+    transports = []
+    threads = [
+        threading.Thread(target=lambda: transports.append(services.http()))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert transports[0] is not transports[1]
+    assert services.http() is services.http()
+
+
+def test_execute_uses_the_authorized_transport() -> None:
+    credentials = AnonymousCredentials()
+    services = GoogleServices(lambda: credentials)
+    with mock.patch("httplib2.Http", RecordingHttp):
+        response = services.execute(services.presentations.create(body={}))
+    assert response == {"presentationId": "p"}
+    assert RecordingHttp.requests == [
+        "POST https://slides.googleapis.com/v1/presentations?alt=json"
+    ]
+
+
+tracker_lock = threading.Lock()
+
+
+class SlowRequest:
+    def __init__(self, method_id: str, tracker: dict[str, int]) -> None:
+        self.methodId = method_id
+        self.tracker = tracker
+
+    def execute(self, http: Any) -> str:
+        with tracker_lock:
+            self.tracker["running"] += 1
+            self.tracker["peak"] = max(self.tracker["peak"], self.tracker["running"])
+        time.sleep(0.05)
+        with tracker_lock:
+            self.tracker["running"] -= 1
+        return self.methodId
+
+
+def test_execute_async_caps_calls_in_flight_per_api() -> None:
+    services = GoogleServices(AnonymousCredentials, max_concurrency={"slides": 2})
+    slides = {"running": 0, "peak": 0}
+    drive = {"running": 0, "peak": 0}
+
+    async def run() -> list[str]:
+        requests = [SlowRequest("slides.presentations.create", slides)] * 6 + [
+            SlowRequest("drive.permissions.create", drive)
+        ] * 6
+        return await asyncio.gather(*map(services.execute_async, requests))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        services.shutdown()
+    assert results.count("slides.presentations.create") == 6
+    assert slides["peak"] == 2
+    assert drive["peak"] > 2
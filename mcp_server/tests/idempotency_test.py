@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from mcp_server.idempotency import (
+    IdempotencyCache,
+    IdempotencyKeyReused,
+    request_key,
+)
+
+
+class Body(BaseModel):
+    title: str
+    tags: list[str]
+
+
+def test_request_key_depends_only_on_the_body() -> None:
+    assert request_key(Body(title="a", tags=["x"])) == request_key(
+        Body(tags=["x"], title="a")
+    )
+    assert request_key(Body(title="a", tags=["x"])) != request_key(
+        Body(title="a", tags=["y"])
+    )
+
+
+def test_concurrent_calls_share_one_run_and_results_are_cached() -> None:
+    cache: IdempotencyCache[int] = IdempotencyCache(ttl_seconds=60)
+    runs = []
+
+    async def call() -> int:
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def scenario() -> list[int]:
+        results = await asyncio.gather(*(cache.run("key", call) for _ in range(5)))
+        return [*results, await cache.run("key", call), await cache.run("other", call)]
+
+    assert asyncio.run(scenario()) == [1, 1, 1, 1, 1, 1, 2]
+    assert cache.coalesced == 4
+    assert cache.hits == 1
+
+
+def test_failures_and_expired_results_are_not_reused() -> None:
+    cache: IdempotencyCache[int] = IdempotencyCache(ttl_seconds=0)
+    attempts = []
+
+    async def flaky() -> int:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("quota exceeded")
+        return len(attempts)
+
+    async def scenario() -> list[int]:
+        with pytest.raises(RuntimeError):
+            await cache.run("key", flaky)
+        return [await cache.run("key", flaky), await cache.run("key", flaky)]
+
+    assert asyncio.run(scenario()) == [2, 3]
+
+
+def test_oldest_results_are_evicted() -> None:
+    cache: IdempotencyCache[str] = IdempotencyCache(max_entries=2)
+
+    async def scenario() -> None:
+        for key in ("a", "b", "c"):
+            await cache.run(key, lambda key=key: asyncio.sleep(0, result=key))
+
+    asyncio.run(scenario())
+    assert list(cache._results) == ["b", "c"]
+
+
+def test_a_key_reused_with_another_fingerprint_is_rejected() -> None:
+    cache: IdempotencyCache[str] = IdempotencyCache(ttl_seconds=60)
+
+    async def call() -> str:
+        await asyncio.sleep(0.01)
+        return "deck"
+
+    async def scenario() -> None:
+        first = asyncio.ensure_future(cache.run("key", call, fingerprint="a"))
+        await asyncio.sleep(0)
+        # While the first call is in flight, and after it completed.
+        with pytest.raises(IdempotencyKeyReused):
+            await cache.run("key", call, fingerprint="b")
+        assert await first == "deck"
+        with pytest.raises(IdempotencyKeyReused):
+            await cache.run("key", call, fingerprint="b")
+        assert await cache.run("key", call, fingerprint="a") == "deck"
+
+    asyncio.run(scenario())
+    assert cache.hits == 1
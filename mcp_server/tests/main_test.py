@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+from typing import Any
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from mcp_server import main
+
+
+def test_generate_slides_shares_and_populates_concurrently() -> None:
+    # Both calls after create wait for each other, so they must overlap.
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def execute(request: Any) -> dict[str, str]:
+        calls.append(request.methodId)
+        if request.methodId != "slides.presentations.create":
+            barrier.wait()
+        return {"presentationId": "deck"}
+
+    with mock.patch.object(main.google_services, "execute", execute):
+        response = TestClient(main.app).post(
+            "/generate_slides",
+            json={
+                "title": "Deck",
+                "slides": [{"title": "Intro", "content": "Hello"}],
+                "email": "user@example.com",
+            },
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "presentation_url": "https://docs.google.com/presentation/d/deck/edit"
+    }
+    assert calls[0] == "slides.presentations.create"
+    assert sorted(calls[1:]) == [
+        "drive.permissions.create",
+        "slides.presentations.batchUpdate",
+    ]
+
+
+def test_a_failed_share_cancels_populating_the_slides() -> None:
+    populate_cancelled = []
+
+    def execute(request: Any) -> dict[str, str]:
+        if request.methodId == "drive.permissions.create":
+            raise RuntimeError("share failed")
+        return {"presentationId": "deck"}
+
+    async def batch_update(*args: Any) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            populate_cancelled.append(True)
+            raise
+
+    with (
+        mock.patch.object(main.google_services, "execute", execute),
+        mock.patch.object(main, "batch_update", batch_update),
+    ):
+        response = TestClient(main.app).post(
+            "/generate_slides",
+            json={"title": "Failing", "slides": [], "email": "user@example.com"},
+        )
+
+    assert response.status_code == 500
+    assert populate_cancelled == [True]
+
+
+def test_repeated_requests_create_one_presentation() -> None:
+    created = []
+
+    def execute(request: Any) -> dict[str, str]:
+        if request.methodId == "slides.presentations.create":
+            created.append(request.body)
+        return {"presentationId": f"deck-{len(created)}"}
+
+    client = TestClient(main.app)
+    body = {"title": "Retry", "slides": [], "email": "user@example.com"}
+    with mock.patch.object(main.google_services, "execute", execute):
+        first = client.post("/generate_slides", json=body)
+        repeat = client.post("/generate_slides", json=body)
+        keyed = client.post(
+            "/generate_slides", json=body, headers={"Idempotency-Key": "attempt-1"}
+        )
+        keyed_repeat = client.post(
+            "/generate_slides", json=body, headers={"Idempotency-Key": "attempt-1"}
+        )
+        reused_key = client.post(
+            "/generate_slides",
+            json={**body, "title": "Edited"},
+            headers={"Idempotency-Key": "attempt-1"},
+        )
+
+    assert first.json() == repeat.json()
+    assert keyed.json() == keyed_repeat.json() != first.json()
+    assert reused_key.status_code == 422
+    assert len(created) == 2
+
+
+def _template_deck(*placeholders: str) -> dict[str, Any]:
+    """A presentations.get response with a text box per placeholder."""
+    text_boxes = [
+        {"shape": {"text": {"textElements": [{"textRun": {"content": text}}]}}}
+        for text in placeholders
+    ]
+    return {"slides": [{"pageElements": text_boxes}]}
+
+
+def _template_calls(body: dict[str, Any], deck: dict[str, Any]) -> tuple[Any, list]:
+    calls = []
+
+    def execute(request: Any) -> dict[str, Any]:
+        calls.append((request.methodId, request.uri, request.body))
+        if request.methodId == "slides.presentations.get":
+            return deck
+        return {"id": "copy"}
+
+    with (
+        mock.patch.dict(main.SLIDE_TEMPLATES, {"weekly": "template-id"}),
+        mock.patch.dict(main._template_placeholders, clear=True),
+        mock.patch.object(main.google_services, "execute", execute),
+    ):
+        response = TestClient(main.app).post("/generate_slides", json=body)
+    return response, calls
+
+
+def _replacements(calls: list) -> dict[str, str]:
+    (update,) = [body for method, _, body in calls if method.endswith("batchUpdate")]
+    replacements = {}
+    for request in json.loads(update)["requests"]:
+        replace = request["replaceAllText"]
+        replacements[replace["containsText"]["text"]] = replace["replaceText"]
+    return replacements
+
+
+def test_template_mode_copies_the_template_and_replaces_placeholders() -> None:
+    body = {
+        "title": "Weekly report",
+        "slides": [{"title": "Summary", "content": "All good"}],
+        "email": "user@example.com",
+        "template": "weekly",
+    }
+    deck = _template_deck(
+        "{{title}}", "{{slide1.title}}", "{{slide1.content}}", "{{slide2.title}}"
+    )
+
+    response, calls = _template_calls(body, deck)
+
+    assert response.json() == {
+        "presentation_url": "https://docs.google.com/presentation/d/copy/edit"
+    }
+    assert [method for method, _, _ in calls[:2]] == [
+        "slides.presentations.get",
+        "drive.files.copy",
+    ]
+    assert "/files/template-id/copy" in calls[1][1]
+    assert sorted(method for method, _, _ in calls[2:]) == [
+        "drive.permissions.create",
+        "slides.presentations.batchUpdate",
+    ]
+    # The template's second slide is left empty, not with its placeholder.
+    assert _replacements(calls) == {
+        "{{title}}": "Weekly report",
+        "{{slide1.title}}": "Summary",
+        "{{slide1.content}}": "All good",
+        "{{slide2.title}}": "",
+    }
+
+
+def test_more_slides_than_the_template_has_are_rejected() -> None:
+    body = {
+        "title": "Weekly report",
+        "slides": [{"title": "One", "content": "1"}, {"title": "Two", "content": "2"}],
+        "email": "user@example.com",
+        "template": "weekly",
+    }
+    deck = _template_deck("{{title}}", "{{slide1.title}}", "{{slide1.content}}")
+
+    response, calls = _template_calls(body, deck)
+
+    assert response.status_code == 400
+    assert [method for method, _, _ in calls] == ["slides.presentations.get"]
+
+
+def test_unknown_template_is_rejected() -> None:
+    response = TestClient(main.app).post(
+        "/generate_slides",
+        json={"title": "T", "slides": [], "email": "e@x.com", "template": "nope"},
+    )
+    assert response.status_code == 400